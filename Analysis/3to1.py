@@ -1,20 +1,17 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 from scipy.optimize import curve_fit
-
-# Función para calcular la distancia Euclidiana para relPos
-def calcular_distancia_relPos(df):
-    df['Distance'] = np.sqrt(df['R_N/Lon']**2 + df['R_E/Lat']**2 + (df['R_D/Hgt'])**2)  # Convertir altitud a metros
-    return df
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'Modules')))
+from angles import angular_difference
+from sessioncache import load_session
 
 # Función para ajustar los valores de MAG para que estén dentro de -180 a 180 grados
 def adjust_MAG(MAG, reference_MAG):
-    adjusted_MAG = MAG - reference_MAG
-    adjusted_MAG[adjusted_MAG > 180] -= 360
-    adjusted_MAG[adjusted_MAG < -180] += 360
-    return adjusted_MAG
+    return angular_difference(MAG, reference_MAG)
 
 # Función para corregir los valores de PowerRx basada en una ecuación proporcionada
 def correct_PowerRx(row, beamwidth_func):
@@ -23,15 +20,13 @@ def correct_PowerRx(row, beamwidth_func):
 
 # Función para procesar cada archivo CSV
 def procesar_archivo(csv_file, beamwidth_func, distanceB):
-    df = pd.read_csv(csv_file)
+    df = load_session(csv_file)
 
     # Filtrar datos basados en PosType 'relPos'
     relPos_df = df[df['PosType'] == 'relPos'].copy()
 
-    # Calcular distancias para relPos
+    # Distancias para relPos: columna 'Distance' de load_session
     if not relPos_df.empty:
-        relPos_df = calcular_distancia_relPos(relPos_df)
-
         max_power_idx_relPos = relPos_df['PowerRx'].idxmax()
         max_power_relPos = relPos_df.loc[max_power_idx_relPos]
 
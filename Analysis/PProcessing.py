@@ -1,52 +1,29 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-
-# Función para calcular la distancia Euclidiana para relPos
-def calcular_distancia_relPos(df):
-    df['Distance'] = np.sqrt(df['R_N/Lon']**2 + df['R_E/Lat']**2 + (df['R_D/Hgt']/1000)**2)  # Convertir altitud a metros
-    return df
-
-# Función para calcular la distancia 3D para absPos
-def calcular_distancia_absPos(df, ref_lat, ref_lon, ref_alt):
-    # Convertir latitud y longitud a radianes
-    df['Lat_rad'] = np.radians(df['R_E/Lat'])
-    df['Lon_rad'] = np.radians(df['R_N/Lon'])
-    ref_lat_rad = np.radians(ref_lat)
-    ref_lon_rad = np.radians(ref_lon)
-
-    # Calcular distancia horizontal usando la fórmula de Haversine
-    R = 6371  # Radio de la Tierra en kilómetros
-    delta_lat = df['Lat_rad'] - ref_lat_rad
-    delta_lon = df['Lon_rad'] - ref_lon_rad
-    a = np.sin(delta_lat / 2)**2 + np.cos(ref_lat_rad) * np.cos(df['Lat_rad']) * np.sin(delta_lon / 2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    horizontal_distance_km = R * c  # Distancia horizontal en kilómetros
-
-    # Convertir la distancia horizontal a metros
-    horizontal_distance_m = horizontal_distance_km * 1000
-
-    # Diferencia de altitud en milimetros
-    delta_alt = (df['R_D/Hgt']) - ref_alt
-
-    # Calcular la distancia total 3D
-    df['Distance'] = np.sqrt(horizontal_distance_m**2 + (delta_alt/1000)**2)
-    return df
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'Modules')))
+from angles import angular_difference
+from sessioncache import load_session
 
 # Función para ajustar los valores de MAG para que estén dentro de -180 a 180 grados
 def adjust_MAG(MAG, reference_MAG):
-    adjusted_MAG = MAG - reference_MAG
-    adjusted_MAG[adjusted_MAG > 180] -= 360
-    adjusted_MAG[adjusted_MAG < -180] += 360
-    return adjusted_MAG
+    return angular_difference(MAG, reference_MAG)
 
 # Función para corregir los valores de PowerRx basada en una ecuación proporcionada
 def correct_PowerRx(row, beamwidth_func):
     correction = beamwidth_func(0) - beamwidth_func(row['MAG'])
     return row['PowerRx'] + correction
 
-# Cargar el archivo CSV
-df = pd.read_csv(r'C:\Users\sofia\OneDrive\Documentos\GitHub\5G_characterization\Data\5G_loss\5G_loss_MEAS_01-08-2024\5G_loss_MEAS_01-08-2024-13-03-52.csv')
+# Punto específico de referencia (latitud, longitud, altitud en metros)
+ref_lat = 4.63600930
+ref_lon = -74.08904440
+ref_alt = 2579.220
+
+# Cargar el archivo CSV, con 'Distance' desde la base (relPos, con R_D/Hgt/1000 como antes) o desde el punto de referencia (absPos)
+df = load_session(r'C:\Users\sofia\OneDrive\Documentos\GitHub\5G_characterization\Data\5G_loss\5G_loss_MEAS_01-08-2024\5G_loss_MEAS_01-08-2024-13-03-52.csv',
+                  reference=(ref_lat, ref_lon, ref_alt), vertical_scale=1e-3)
 
 
 
@@ -55,15 +32,6 @@ df = pd.read_csv(r'C:\Users\sofia\OneDrive\Documentos\GitHub\5G_characterization
 relPos_df = df[df['PosType'] == 'relPos'].copy()
 absPos_df = df[df['PosType'] == 'absPos'].copy()
 
-# Punto específico de referencia (latitud, longitud, altitud en metros)
-ref_lat = 4.63600930
-ref_lon = -74.08904440
-ref_alt = 2579220
-
-
-# Calcular distancias para relPos y absPos
-relPos_df = calcular_distancia_relPos(relPos_df)
-absPos_df = calcular_distancia_absPos(absPos_df, ref_lat, ref_lon, ref_alt)
 print(absPos_df)
 
 
@@ -1,7 +1,12 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 from math import radians, sin, cos, sqrt, atan2
 import numpy as np
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'Modules')))
+from angles import circular_difference
+from sessioncache import load_session
 '''
 # Function to calculate the distance between two points (lat, lon, alt)
 def calculate_distance(lat1, lon1, alt1, lat2, lon2, alt2):
@@ -38,16 +43,11 @@ def calculate_distance(dis_n1, dis_e1, dis_n2, dis_e2):
     horizontal_distance = sqrt((dis_n2 - dis_n1)**2 + (dis_e2 - dis_e1)**2)
     return horizontal_distance
 
-# Function to calculate the circular difference
-def circular_difference(a, b):
-    diff = abs(a - b) % 360
-    return min(diff, 360 - diff)
-
 # Fixed position (Dis_N, Dis_E)
 fixed_position = (dis_n1, dis_e1) = (0, 0)  # Replace with actual values
 
 # Read the CSV file
-df = pd.read_csv(r'C:\Users\sofia\OneDrive\Documentos\GitHub\5G_characterization\Data\5G_loss\5G_loss_MEAS_08-08-2024-11-49-59.csv')
+df = load_session(r'C:\Users\sofia\OneDrive\Documentos\GitHub\5G_characterization\Data\5G_loss\5G_loss_MEAS_08-08-2024-11-49-59.csv')
 
 df1 = df[df['PosType']=='relPos']
 
@@ -58,7 +58,7 @@ first_value1 = df1.loc[df1['PowerRx'].idxmax()]
 first_value = first_value1['MAG']
 df_max = df1.loc[df1.groupby('R_N/Lon')['PowerRx'].idxmax()]
 # Filter the DataFrame according to the circular condition
-filtered_df = df_max[df_max['MAG'].apply(lambda x: circular_difference(x, first_value) <= BW)]
+filtered_df = df_max[circular_difference(df_max['MAG'], first_value) <= BW]
 
 # Calculate the distance for each row
 distance = filtered_df.apply(lambda row: calculate_distance(dis_n1, dis_e1, row['R_N/Lon'], row['R_E/Lat']), axis=1)
@@ -1,6 +1,6 @@
 # controllers.py - Business logic and event handling (Controller layer)
 
-from PyQt6.QtCore import QTimer, QObject, pyqtSlot
+from PyQt6.QtCore import QTimer, QObject, pyqtSignal, pyqtSlot
 from PyQt6.QtWidgets import QMessageBox
 import sys
 import os
@@ -15,9 +15,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
 from aiming import RAiming
 from gps import GPS
 from usrp import USRP
-from filewriter import FileCSV
+from filewriter import FileCSV, AsyncFileWriter
+from scheduler import PeriodicThread, SessionClock
+from startup import DeviceStartup, usrp_streaming, gps_fix, gps_message, aiming_reading
+from records import MEASUREMENT_HEADER, measurement_values, format_record
 
-from models import AppState, MeasurementState, MultiPortConfig, MeasurementRecord, GPSData, USRPData
+from models import AppState, MeasurementState, MultiPortConfig
 from views import (
     SerialPortSelectorView, MultiPortSelectorView, RealTimePlotView, 
     MainWindowView, TerminalLogView
@@ -40,6 +43,8 @@ class ConnectionController(QObject):
                 baudrate=baudrate
             )
             
+            aiming_sensor.startAimingThread()
+            
             # Store sensor in app state
             self.app_state.set_aiming_sensor(aiming_sensor)
             
@@ -59,7 +64,7 @@ class ConnectionController(QObject):
         
         if aiming_sensor:
             try:
-                aiming_sensor.serial.close()
+                aiming_sensor.stopAimingThread()
             except:
                 pass  # Ignore close errors
             
@@ -99,9 +104,9 @@ class DataController(QObject):
         if aiming_sensor:
             try:
                 # Get real aiming data: [bearing, pitch_yz, roll_xz, cal_stat_aim, temp]
-                aiming_data = aiming_sensor.getAiming()
+                aiming_data = aiming_sensor.latest()
 
-                if aiming_data and len(aiming_data) >= 3:
+                if aiming_data and aiming_data[0] is not None:
                     bearing = aiming_data[0]    # bearing/yaw
                     pitch = aiming_data[1]      # Pitch (pitch_yz)
                     roll = aiming_data[2]       # Roll (roll_xz)
@@ -140,24 +145,34 @@ class DataController(QObject):
 class MultiSensorController(QObject):
     """Controller for managing multiple sensors (AIM, GPS, USRP) and measurements"""
     
+    sensors_connected = pyqtSignal(bool)            # all sensors connected, at the end of the startup
+    _startup_finished = pyqtSignal(object, object)  # DeviceStartup, config (emitted by the startup thread)
+    
     def __init__(self, app_state: AppState):
         super().__init__()
         self.app_state = app_state
         
+        # Sensor startup, in its own thread so the UI keeps responding
+        self.startup_thread: Optional[threading.Thread] = None
+        self._startup_finished.connect(self._on_startup_finished)
+        
         # Sensor objects
         self.aiming_sensor: Optional[RAiming] = None
         self.gps_sensor: Optional[GPS] = None
         self.usrp_sensor: Optional[USRP] = None
         
         # CSV file writer
-        self.csv_writer: Optional[FileCSV] = None
+        self.csv_writer: Optional[AsyncFileWriter] = None
         self.metadata_writer: Optional[FileCSV] = None
         
-        # Data acquisition timing
+        # Data acquisition timing: QTimer for the live view, deadline scheduled thread for recording
         self.data_timer: Optional[QTimer] = None
+        self.recording_thread: Optional[PeriodicThread] = None
+        self.recording_rate = 10.0  # Hz
         self.measurement_start_time = 0.0
         self.recording_active = False
         self.paused = False
+        self.session = SessionClock()   # Recording time excluding the paused intervals
         
         # Measurement counters
         self.measurement_counter = 0
@@ -165,57 +180,70 @@ class MultiSensorController(QObject):
         self.last_measurement_count = 0
     
     def connect_all_sensors(self, config: Dict) -> bool:
-        """Connect all sensors with the given configuration"""
+        """Start connecting all sensors in a background thread, the result is reported by 'sensors_connected'"""
+        if self.startup_thread is not None and self.startup_thread.is_alive():
+            self.app_state.add_terminal_log("Sensor connection already in progress")
+            return False
         try:
-            success_count = 0
-            sensor_statuses = {"aim": False, "gps": False, "usrp": False}
-            
-            # Connect Aiming sensor
+            # Open and start the sensors concurrently, each one ready when it delivers data
+            startup = DeviceStartup(timeout=config.get('startup_timeout', 20.0), log=None)
             if config.get('aim_port'):
-                try:
-                    self.aiming_sensor = RAiming(
-                        serial_port=config['aim_port'],
-                        baudrate=config['aim_baudrate']
-                    )
-                    self.app_state.set_aiming_sensor(self.aiming_sensor)
-                    sensor_statuses["aim"] = True
-                    success_count += 1
-                    self.app_state.add_terminal_log(f"Aiming sensor connected to {config['aim_port']}")
-                except Exception as e:
-                    self.app_state.add_terminal_log(f"Failed to connect Aiming sensor: {str(e)}")
-            
-            # Connect GPS sensor
+                startup.add("aim", lambda: RAiming(serial_port=config['aim_port'], baudrate=config['aim_baudrate']),
+                            start=RAiming.startAimingThread, ready=aiming_reading, stop=RAiming.stopAimingThread)
             if config.get('gps_port'):
-                try:
-                    self.gps_sensor = GPS(
-                        port=config['gps_port'],
-                        baudrate=config['gps_baudrate'],
-                        timeout=0.1,
-                        type="all"
-                    )
-                    self.gps_sensor.startGPSThread()
-                    self.app_state.set_gps_sensor(self.gps_sensor)
-                    sensor_statuses["gps"] = True
-                    success_count += 1
-                    self.app_state.add_terminal_log(f"GPS sensor connected to {config['gps_port']}")
-                    # Wait for GPS to stabilize
-                    time.sleep(2)
-                except Exception as e:
-                    self.app_state.add_terminal_log(f"Failed to connect GPS sensor: {str(e)}")
-            
-            # Connect USRP
-            try:
-                self.usrp_sensor = USRP(
-                    rx_center_freq=config.get('usrp_frequency', 500e6),
-                    rx_gain=config.get('usrp_gain_rx', 24.7)
-                )
-                self.usrp_sensor.startRxThread()
-                self.app_state.set_usrp_sensor(self.usrp_sensor)
-                sensor_statuses["usrp"] = True
-                success_count += 1
-                self.app_state.add_terminal_log(f"USRP connected with freq={config.get('usrp_frequency', 500e6)/1e6:.1f}MHz, gain={config.get('usrp_gain_rx', 24.7)}dB")
-            except Exception as e:
-                self.app_state.add_terminal_log(f"Failed to connect USRP: {str(e)}")
+                # Any message is enough (e.g. indoors, without fix) unless an RTK solution is requested
+                startup.add("gps", lambda: GPS(port=config['gps_port'], baudrate=config['gps_baudrate'],
+                                               timeout=0.1, type="all"),
+                            start=GPS.startGPSThread,
+                            ready=gps_fix(config['gps_solution']) if config.get('gps_solution') else gps_message,
+                            stop=GPS.stopGPSThread)
+            startup.add("usrp", lambda: USRP(rx_center_freq=config.get('usrp_frequency', 500e6),
+                                             rx_gain=config.get('usrp_gain_rx', 24.7)),
+                        start=USRP.startRxThread, ready=usrp_streaming, stop=USRP.stopRxThread)
+        except Exception as e:
+            self.app_state.add_terminal_log(f"Connection error: {str(e)}")
+            return False
+        
+        # The startup waits up to its timeout, out of the Qt UI thread
+        self.app_state.add_terminal_log(f"Connecting sensors (up to {startup.timeout:.0f} s)...")
+        self.startup_thread = threading.Thread(target=self._run_startup, args=(startup, config),
+                                               name="SENSOR_STARTUP_THREAD", daemon=True)
+        self.startup_thread.start()
+        return True
+    
+    def _run_startup(self, startup: DeviceStartup, config: Dict):
+        """Startup thread: opens the sensors and hands the result over to the Qt thread"""
+        startup.run(strict=False)
+        self._startup_finished.emit(startup, config)
+    
+    @pyqtSlot(object, object)
+    def _on_startup_finished(self, startup: DeviceStartup, config: Dict):
+        """Take the sensors ready after the startup (Qt thread)"""
+        try:
+            devices = {name: startup.devices[name] for name, status in startup.status.items() if status == 'ready'}
+            
+            self.aiming_sensor = devices.get("aim")
+            self.gps_sensor = devices.get("gps")
+            self.usrp_sensor = devices.get("usrp")
+            self.app_state.set_aiming_sensor(self.aiming_sensor)
+            self.app_state.set_gps_sensor(self.gps_sensor)
+            self.app_state.set_usrp_sensor(self.usrp_sensor)
+            
+            messages = {
+                "aim": f"Aiming sensor connected to {config.get('aim_port')}",
+                "gps": f"GPS sensor connected to {config.get('gps_port')}",
+                "usrp": f"USRP connected with freq={config.get('usrp_frequency', 500e6)/1e6:.1f}MHz, gain={config.get('usrp_gain_rx', 24.7)}dB",
+            }
+            names = {"aim": "Aiming sensor", "gps": "GPS sensor", "usrp": "USRP"}
+            for name, status in startup.status.items():
+                if status == 'ready':
+                    self.app_state.add_terminal_log(f"{messages[name]} (ready in {startup.times[name]:.2f} s)")
+                elif status == 'failed':
+                    self.app_state.add_terminal_log(f"Failed to connect {names[name]}: {startup.errors[name]}")
+                else:
+                    self.app_state.add_terminal_log(f"{names[name]} not ready after {startup.timeout} s")
+            sensor_statuses = {name: name in devices for name in ("aim", "gps", "usrp")}
+            success_count = sum(sensor_statuses.values())
             
             # Update multi-port configuration
             multi_config = MultiPortConfig(
@@ -241,11 +269,11 @@ class MultiSensorController(QObject):
             else:
                 self.app_state.add_terminal_log(f"Connected {success_count}/3 sensors")
             
-            return all_connected
+            self.sensors_connected.emit(all_connected)
             
         except Exception as e:
             self.app_state.add_terminal_log(f"Connection error: {str(e)}")
-            return False
+            self.sensors_connected.emit(False)
     
     def disconnect_all_sensors(self):
         """Disconnect all sensors"""
@@ -261,7 +289,7 @@ class MultiSensorController(QObject):
             # Disconnect sensors
             if self.aiming_sensor:
                 try:
-                    self.aiming_sensor.serial.close()
+                    self.aiming_sensor.stopAimingThread()
                     self.app_state.add_terminal_log("Aiming sensor disconnected")
                 except:
                     pass
@@ -329,20 +357,20 @@ class MultiSensorController(QObject):
                 os.makedirs(session_path, exist_ok=True)
                 os.makedirs(metadata_path, exist_ok=True)
                 
-                self.csv_writer = FileCSV(
+                self.csv_writer = AsyncFileWriter(FileCSV(
                     name=os.path.join(session_path, f"5G_loss_MEAS_{full_timestamp}"),
                     frequency=None,
-                    header=["Timestamp", "R_N/Lon", "R_E/Lat", "R_D/Hgt",
-                           "accN/hMSL", "accE/hAcc", "accD/vAcc", "PosType", "PowerRx",
-                           "Bearing", "Roll_XZ", "Pitch_YZ", "cal_stat_aim", "Temp"],
+                    header=MEASUREMENT_HEADER,
                     type="MEAS"
-                )
+                ), formatter=format_record)  # Records formatted as text in the writer thread
+                self.csv_writer.startWriterThread()
                 
                 self.metadata_writer = FileCSV(
                     name=os.path.join(metadata_path, f"5G_loss_MEAS_{full_timestamp}"),
                     frequency=None,
                     header=["time_elapsed", "number_of_readings", "reading_rate",
-                           "time_per_reading", "usrp_rx_thread", "aiming_thread", "gps_thread"],
+                           "time_per_reading", "usrp_rx_thread", "aiming_thread", "gps_thread",
+                           "paused_time", "pauses", "frequency", "gain_rx"],
                     type="METADATA"
                 )
                 
@@ -352,6 +380,7 @@ class MultiSensorController(QObject):
             self.app_state.reset_measurement_data()
             self.measurement_counter = 0
             self.measurement_start_time = time.time()
+            self.session.start()
             self.last_rate_update = self.measurement_start_time
             self.last_measurement_count = 0
             
@@ -374,31 +403,35 @@ class MultiSensorController(QObject):
             return False
     
     def pause_recording(self):
-        """Pause data recording"""
+        """Pause data recording, the sensors keep streaming so resuming is instant"""
         if self.recording_active and not self.paused:
             self.paused = True
+            self.session.pause()
             self.app_state.set_measurement_state(MeasurementState.PAUSED)
             self.app_state.add_terminal_log("Recording paused")
     
     def resume_recording(self):
         """Resume data recording"""
         if self.recording_active and self.paused:
+            self.session.resume()
             self.paused = False
             self.app_state.set_measurement_state(MeasurementState.RECORDING)
-            self.app_state.add_terminal_log("Recording resumed")
+            self.app_state.add_terminal_log(f"Recording resumed - Recorded time: {self.session.elapsed():.1f}s")
     
     def stop_recording(self):
         """Stop data recording and save metadata"""
         try:
             if self.data_timer:
                 self.data_timer.stop()
+            self._stop_recording_thread()
+            self.session.stop()
             
             self.recording_active = False
             self.paused = False
             
-            # Calculate final statistics
+            # Calculate final statistics, the paused intervals are not part of the recording time
             if self.measurement_counter > 0 and self.measurement_start_time > 0:
-                elapsed_time = time.time() - self.measurement_start_time
+                elapsed_time = self.session.elapsed()
                 reading_rate = self.measurement_counter / elapsed_time if elapsed_time > 0 else 0
                 time_per_reading = (elapsed_time / self.measurement_counter * 1000) if self.measurement_counter > 0 else 0
                 
@@ -408,13 +441,24 @@ class MultiSensorController(QObject):
                         elapsed_time, self.measurement_counter, reading_rate, time_per_reading,
                         str(self.usrp_sensor.rx_thread) if self.usrp_sensor else "None",
                         str(self.aiming_sensor.aiming_thread) if self.aiming_sensor else "None", 
-                        str(self.gps_sensor.gps_thread) if self.gps_sensor else "None"
+                        str(self.gps_sensor.gps_thread) if self.gps_sensor else "None",
+                        self.session.pausedTime(), self.session.pauses,
+                        self.usrp_sensor.rx_center_freq if self.usrp_sensor else None,
+                        self.usrp_sensor.rx_gain if self.usrp_sensor else None
                     ])
                 
                 self.app_state.add_terminal_log(f"Recording stopped - Total measurements: {self.measurement_counter}")
                 self.app_state.add_terminal_log(f"Elapsed time: {elapsed_time:.1f}s, Rate: {reading_rate:.1f} Hz")
             
-            # Reset file writers for next session
+            # Flush, close and reset file writers for next session
+            if self.csv_writer:
+                self.csv_writer.stopWriterThread()
+                stats = self.csv_writer.getStats()
+                if stats['backpressure_events']:
+                    self.app_state.add_terminal_log(f"Writer back-pressure events: {stats['backpressure_events']}, "
+                                                    f"max queue depth: {stats['max_queue_depth']}")
+            if self.metadata_writer:
+                self.metadata_writer.close()
             self.csv_writer = None
             self.metadata_writer = None
             
@@ -460,30 +504,14 @@ class MultiSensorController(QObject):
     @pyqtSlot()
     def _acquire_measurement_data(self):
         """Acquire measurement data from all sensors"""
-        if not self.recording_active or self.paused:
+        if not self.recording_active or self.session.isPaused():
             return
         
         try:
             # Get data from all sensors
             power_rx = self.usrp_sensor.getPower_dBm(self.usrp_sensor.rx_samples) if self.usrp_sensor else 0.0
             gps_data_raw = self.gps_sensor.format_GPSData() if self.gps_sensor else [0]*7
-            aiming_data = self.aiming_sensor.getAiming() if self.aiming_sensor else [0]*5
-            
-            # Create measurement record
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            
-            gps_data = GPSData(
-                timestamp=timestamp,
-                r_n_lon=gps_data_raw[0],
-                r_e_lat=gps_data_raw[1], 
-                r_d_hgt=gps_data_raw[2],
-                acc_n_hmsl=gps_data_raw[3],
-                acc_e_hacc=gps_data_raw[4],
-                acc_d_vacc=gps_data_raw[5],
-                pos_type=str(gps_data_raw[6]) if len(gps_data_raw) > 6 else "Unknown"
-            )
-            
-            usrp_data = USRPData(power_rx=power_rx, timestamp=time.time())
+            aiming_data = self.aiming_sensor.latest() if self.aiming_sensor else [0]*5
             
             # Update sensor data in app state 
             if len(aiming_data) >= 5:
@@ -495,19 +523,13 @@ class MultiSensorController(QObject):
                     calibration_status=int(aiming_data[3]) if aiming_data[3] is not None else 0
                 )
             
-            # Create complete measurement record
-            record = MeasurementRecord(
-                timestamp=timestamp,
-                gps_data=gps_data,
-                usrp_data=usrp_data,
-                sensor_data=self.app_state.get_sensor_data()
-            )
+            # Create complete measurement record (numeric, formatted only by the CSV writer)
+            values = measurement_values(time.time_ns(), gps_data_raw, power_rx, aiming_data)
+            record = self.app_state.add_measurement_record(values)
             
-            # Save to CSV and update app state
+            # Save to CSV
             if self.csv_writer:
-                self.csv_writer.saveData(record.to_csv_row())
-            
-            self.app_state.add_measurement_record(record)
+                self.csv_writer.saveData(record)
             self.measurement_counter += 1
             
             # Update rate calculation periodically
@@ -534,7 +556,7 @@ class MultiSensorController(QObject):
             # Get data from all sensors (same as recording, but without CSV saving)
             power_rx = self.usrp_sensor.getPower_dBm(self.usrp_sensor.rx_samples) if self.usrp_sensor else 0.0
             gps_data_raw = self.gps_sensor.format_GPSData() if self.gps_sensor else [0]*7
-            aiming_data = self.aiming_sensor.getAiming() if self.aiming_sensor else [0]*5
+            aiming_data = self.aiming_sensor.latest() if self.aiming_sensor else [0]*5
             
             # Update sensor data in app state for real-time display
             if len(aiming_data) >= 5:
@@ -546,36 +568,29 @@ class MultiSensorController(QObject):
                     calibration_status=int(aiming_data[3]) if aiming_data[3] is not None else 0
                 )
             
-            # Create GPS data for live visualization
-            gps_data = GPSData(
-                timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                r_n_lon=gps_data_raw[0],
-                r_e_lat=gps_data_raw[1], 
-                r_d_hgt=gps_data_raw[2],
-                acc_n_hmsl=gps_data_raw[3],
-                acc_e_hacc=gps_data_raw[4],
-                acc_d_vacc=gps_data_raw[5],
-                pos_type=str(gps_data_raw[6]) if len(gps_data_raw) > 6 else "Unknown"
-            )
-            
-            usrp_data = USRPData(power_rx=power_rx, timestamp=time.time())
-            
             # Create measurement record for live visualization (not saved to CSV)
-            record = MeasurementRecord(
-                timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                gps_data=gps_data,
-                usrp_data=usrp_data,
-                sensor_data=self.app_state.get_sensor_data()
-            )
+            values = measurement_values(time.time_ns(), gps_data_raw, power_rx, aiming_data)
             
             # Update app state for live visualization (without CSV recording)
-            self.app_state.add_measurement_record(record)
+            self.app_state.add_measurement_record(values)
             
         except Exception as e:
             self.app_state.add_terminal_log(f"Live data acquisition error: {str(e)}")
 
+    def _stop_recording_thread(self):
+        """Stop the recording thread and log its cadence statistics"""
+        if self.recording_thread:
+            self.recording_thread.stopPeriodicThread()
+            stats = self.recording_thread.getStats()
+            self.app_state.add_terminal_log(f"Recording cadence: {stats['ticks']} ticks at {stats['rate']:.1f} Hz, "
+                                            f"missed deadlines: {stats['missed']}, overruns: {stats['overruns']}, "
+                                            f"jitter: {stats['jitter_mean_ms']:.2f} ms mean, "
+                                            f"{stats['jitter_max_ms']:.2f} ms max")
+            self.recording_thread = None
+
     def _switch_to_live_data_mode(self):
         """Switch data acquisition timer to live data mode"""
+        self._stop_recording_thread()
         if self.data_timer and self.data_timer.isActive():
             self.data_timer.stop()
             
@@ -592,19 +607,15 @@ class MultiSensorController(QObject):
         self.app_state.add_terminal_log("Switched to live data visualization mode")
 
     def _switch_to_recording_mode(self):
-        """Switch data acquisition timer to recording mode"""
+        """Switch data acquisition from the live view timer to the recording thread"""
         if self.data_timer and self.data_timer.isActive():
             self.data_timer.stop()
             
-        # Disconnect from live data function and connect to recording function
-        if self.data_timer:
-            self.data_timer.timeout.disconnect()
-            self.data_timer.timeout.connect(self._acquire_measurement_data)
-            self.data_timer.start(100)  # 10Hz for recording
-        else:
-            self.data_timer = QTimer()
-            self.data_timer.timeout.connect(self._acquire_measurement_data)
-            self.data_timer.start(100)  # 10Hz for recording
+        # Recording runs on monotonic deadlines, so a blocking read in the UI thread does not shift the samples
+        self._stop_recording_thread()
+        self.recording_thread = PeriodicThread(self._acquire_measurement_data, rate=self.recording_rate,
+                                               name="RECORDING_THREAD")
+        self.recording_thread.startPeriodicThread()
         
         self.app_state.add_terminal_log("Switched to recording mode")
 
@@ -708,6 +719,7 @@ class MultiPortController(QObject):
         self.view.multi_connection_requested.connect(self._handle_multi_connection_request)
         self.view.multi_disconnection_requested.connect(self._handle_multi_disconnection_request)
         self.app_state.multi_port_connection_changed.connect(self._update_connection_status)
+        self.multi_sensor_controller.sensors_connected.connect(self.view.update_overall_status)
     
     @pyqtSlot()
     def refresh_ports(self):
@@ -718,10 +730,8 @@ class MultiPortController(QObject):
     def _handle_multi_connection_request(self, config: dict):
         """Handle multi-sensor connection request"""
         try:
-            success = self.multi_sensor_controller.connect_all_sensors(config)
-            if success:
-                self.view.update_overall_status(True)
-            else:
+            # The overall status is updated by 'sensors_connected' when the startup finishes
+            if not self.multi_sensor_controller.connect_all_sensors(config):
                 self.view.update_overall_status(False)
         except Exception as e:
             QMessageBox.critical(self.view, "Connection Error", str(e))
@@ -1,12 +1,13 @@
 # models.py - Data models and application state management
 
 from dataclasses import dataclass, field
-from typing import Optional, List, Tuple, Any
+from typing import Optional, List, Tuple
 import threading
 from PyQt6.QtCore import QObject, pyqtSignal
 from enum import Enum
 import time
 from datetime import datetime
+from records import RecordBuffer, format_time_ns, pos_type_name
 
 
 class MeasurementState(Enum):
@@ -46,47 +47,6 @@ class MultiPortConfig:
         return self.aim_connected and self.gps_connected and self.usrp_connected
 
 
-@dataclass
-class GPSData:
-    """Data structure for GPS readings"""
-    timestamp: str = ""
-    r_n_lon: float = 0.0
-    r_e_lat: float = 0.0
-    r_d_hgt: float = 0.0
-    acc_n_hmsl: float = 0.0
-    acc_e_hacc: float = 0.0
-    acc_d_vacc: float = 0.0
-    pos_type: str = ""
-
-
-@dataclass
-class USRPData:
-    """Data structure for USRP readings"""
-    power_rx: float = 0.0
-    timestamp: float = 0.0
-
-
-@dataclass
-class MeasurementRecord:
-    """Complete measurement record as saved to CSV"""
-    counter: int = 0
-    timestamp: str = ""
-    gps_data: GPSData = field(default_factory=GPSData)
-    usrp_data: USRPData = field(default_factory=USRPData)
-    sensor_data: 'SensorData' = field(default_factory=lambda: SensorData())
-    
-    def to_csv_row(self) -> List[Any]:
-        """Convert to CSV row format matching 5G_loss_with_pause.py"""
-        return [
-            self.timestamp,
-            self.gps_data.r_n_lon, self.gps_data.r_e_lat, self.gps_data.r_d_hgt,
-            self.gps_data.acc_n_hmsl, self.gps_data.acc_e_hacc, self.gps_data.acc_d_vacc,
-            self.gps_data.pos_type, self.usrp_data.power_rx,
-            self.sensor_data.bearing, self.sensor_data.roll, self.sensor_data.pitch, 
-            self.sensor_data.calibration_status, self.sensor_data.temperature
-        ]
-    
-
 @dataclass 
 class SensorData:
     """Data structure for sensor readings"""
@@ -184,7 +144,7 @@ class AppState(QObject):
         # Measurement state
         self.measurement_state = MeasurementState.DISCONNECTED
         self.recording_counter = 0
-        self.measurement_records: List[MeasurementRecord] = []
+        self.measurement_records = RecordBuffer()  # Structured array chunks (records.MEASUREMENT_DTYPE)
         
         # Terminal log buffer
         self.terminal_log_buffer: List[str] = []
@@ -279,22 +239,23 @@ class AppState(QObject):
         with self._lock:
             return self.terminal_log_buffer.copy()
     
-    def add_measurement_record(self, record: MeasurementRecord):
-        """Add a complete measurement record"""
+    def add_measurement_record(self, values: tuple):
+        """Add a complete measurement record (values in the order of records.MEASUREMENT_DTYPE)"""
         with self._lock:
-            self.recording_counter += 1
-            record.counter = self.recording_counter
-            self.measurement_records.append(record)
+            record = self.measurement_records.append(values)
+            self.recording_counter = len(self.measurement_records)
             
             # Add to graph data
-            self.add_power_measurement(record.usrp_data.power_rx)
+            self.add_power_measurement(record['power_rx'], record['time_ns'] / 1e9)
             # Convert GPS data to relative position (this would need proper GPS conversion)
             # For now, using placeholder values
-            self.add_gps_measurement(record.gps_data.r_e_lat * 100, record.gps_data.r_n_lon * 100)
+            self.add_gps_measurement(record['r_e_lat'] * 100, record['r_n_lon'] * 100)
             
             # Add to terminal log
-            log_msg = f"{record.counter} | {record.timestamp} | GPS: {record.gps_data.pos_type} | Power: {record.usrp_data.power_rx:.2f} dBm"
+            log_msg = (f"{self.recording_counter} | {format_time_ns(int(record['time_ns']))} | "
+                       f"GPS: {pos_type_name(record['pos_type'])} | Power: {record['power_rx']:.2f} dBm")
             self.add_terminal_log(log_msg)
+            return record
     
     def get_sensor_data(self) -> SensorData:
         """Get current sensor data"""
@@ -26,25 +26,24 @@ sys.path.append(os.path.abspath(os.path.join(
 
 from gps import GPS
 from usrp import USRP
-from time import sleep
-from datetime import datetime
 from aiming import RAiming
-from pytictoc import TicToc
-from filewriter import FileCSV
-
-def interrupt(chronometer, usrp_UT, aiming_UT, gps_rtk):
-    chronometer.toc()
-    print('\nCtrl + C -> Interrupted!')
-    print("\nT1: ", usrp_UT.rx_thread, "\nT2: ", aiming_UT.aiming_thread, "\nT3: ", gps_rtk.gps_thread)
-
-    usrp_UT.stopRxThread()
-    aiming_UT.serial.close()
-    #aiming_UT.stopAimingThread()
-    usrp_UT.stopRxStream()
-    gps_rtk.stopGPSThread()
-    
-    
+from filewriter import FileCSV, AsyncFileWriter
+from journal import FileJournal, join_journal
+from instrumentation import Instrumentation
+from tracing import Tracer
+from startup import DeviceStartup, usrp_streaming, gps_fix, aiming_reading
+from alignment import TimestampJoin
+from emission import AdaptiveEmission
+from fusion import PoseEKF, PoseFusion, POSE_HEADER
+from acquisition import (AcquisitionEngine, USRPProducer, GPSProducer, AimingProducer,
+                         ConsolePrinter, format_row)
+
+
 def oneShot():
+    # Serial ports
+    aim_port = "COM8"
+    gps_port = "COM11"
+
     # Baudrates
     aim_baudrate = 19200
     gps_baudrate = 19200
@@ -53,72 +52,110 @@ def oneShot():
     frequency = 500e6
     gain_rx = 24.7
 
+    # Startup: RTK solution required before recording ('fixed', 'float' or 'none') and maximum wait [s]
+    gps_solution = "fixed"
+    startup_timeout = 120
+
+    # Records per second on monotonic deadlines (uniform spacing), None: one record per USRP frame
+    rate = None
 
-    counter = 1
+    # Adaptive emission: a record when the relative position moves 5 cm, the power changes 1 dB or every
+    # second, with the PowerRx mean/min/max of the frames it stands for; None: one record per frame/tick
+    emission = AdaptiveEmission(distance={"relPos": 5.0}, power_tolerance=1.0, heartbeat=1.0)
 
+    # GPS/compass pose fused by an EKF at the time of every record (Pose_* columns); None: no fused pose
+    pose = PoseFusion(PoseEKF(frame="relPos"))
+
+    # Chrome trace of the acquisition threads (chrome://tracing, ui.perfetto.dev), written next to the data file
+    trace = False
+
+    # Latency histograms and rates of the acquisition stages, summarized in the METADATA file
+    instruments = Instrumentation(tracer=Tracer() if trace else None)
+
+    # The devices are opened and started concurrently; recording starts when all of them are ready
+    startup = DeviceStartup(timeout=startup_timeout)
+    startup.add("gps", lambda: GPS(port=gps_port, baudrate=gps_baudrate, timeout=0.1, type="all"),
+                start=GPS.startGPSThread, ready=gps_fix(gps_solution), stop=GPS.stopGPSThread)
+    startup.add("usrp", lambda: USRP(rx_center_freq=frequency, rx_gain=gain_rx),
+                start=USRP.startRxThread, ready=usrp_streaming, stop=USRP.stopRxThread)
+    startup.add("aiming", lambda: RAiming(serial_port=aim_port, baudrate=aim_baudrate),
+                start=RAiming.startAimingThread, ready=aiming_reading, stop=RAiming.stopAimingThread)
+    try:
+        devices = startup.run()
+    except (TimeoutError, RuntimeError) as e:
+        print(e)
+        return
+
+    file = AsyncFileWriter(FileJournal(name="Data/5G_loss/5G_loss",
+                                       frequency=None, 
+                                       header=["Timestamp",
+                                               "R_N/Lon", "R_E/Lat", "R_D/Hgt",
+                                               "accN/hMSL", "accE/hAcc", "accD/vAcc",
+                                               "PosType", "PowerRx",
+                                               "Bearing", "Roll_XZ", "Pitch_YZ", "cal_stat_aim", "Temp",
+                                               "GPS_dt", "Aiming_dt",
+                                               *(POSE_HEADER if pose else []),
+                                               *(["PowerRx_mean", "PowerRx_min", "PowerRx_max", "Samples"]
+                                                 if emission else [])],
+                                       type="MEAS"),
+                           formatter=format_row,
+                           instruments=instruments)
+    file.startWriterThread()
+    file_metadata = FileCSV(name="Data/5G_loss/Metadata/5G_loss", frequency=None, header=["time_elapsed","number_of_readings",
+                                                                                          "reading_rate","time_per_reading",
+                                                                                          "usrp_rx_thread","aiming_thread",
+                                                                                          "gps_thread", "frequency", "gain_rx",
+                                                                                          *instruments.metadataHeader()],
+                            type="METADATA")
+
+    # Record: [Timestamp, GPS data, PowerRx, aiming, alignment errors, fused pose, PowerRx aggregates], one per frame
+    # kept by the emission policy, with the GPS and aiming samples aligned to the frame time; the alignment
+    # errors [ms] are the 'GPS_dt' and 'Aiming_dt' columns
+    engine = AcquisitionEngine(producers={"gps": GPSProducer(devices["gps"]),
+                                          "usrp": USRPProducer(devices["usrp"]),
+                                          "aiming": AimingProducer(devices["aiming"])},
+                               consumers=[file.saveData, ConsolePrinter(instruments=instruments)],
+                               clock="usrp",
+                               rate=rate,
+                               join=TimestampJoin(tolerance={"gps": 0.5, "aiming": 0.1}, method="linear"),
+                               instruments=instruments,
+                               emission=emission,
+                               pose=pose)
     try:
-        # Serial ports
-        aim_port = "COM8"
-        gps_port = "COM11"
-
-        chronometer = TicToc()
-
-        file = FileCSV(name="Data/5G_loss/5G_loss",
-                       frequency=None, 
-                       header=["Timestamp",
-                               "R_N/Lon", "R_E/Lat", "R_D/Hgt",
-                               "accN/hMSL", "accE/hAcc", "accD/vAcc",
-                               "PosType", "PowerRx",
-                               "Bearing", "Roll_XZ", "Pitch_YZ", "cal_stat_aim", "Temp"],
-                       type="MEAS")
-        file_metadata = FileCSV(name="Data/5G_loss/Metadata/5G_loss", frequency=None, header=["time_elapsed","number_of_readings",
-                                                                                              "reading_rate","time_per_reading",
-                                                                                              "usrp_rx_thread","aiming_thread",
-                                                                                              "gps_thread"], type="METADATA")
-
-        usrp_UT = USRP(rx_center_freq=frequency, rx_gain=gain_rx)
-        usrp_UT.startRxThread()
-        aiming_UT = RAiming(serial_port=aim_port, baudrate=aim_baudrate)
-        #aiming_UT.startAimingThread()
-        gps_rtk = GPS(port=gps_port, baudrate=gps_baudrate, timeout=0.1, type="all")
-        gps_rtk.startGPSThread()
-
-        sleep(5) # Wait for GPS to stabilize in the thread
-
-
-        chronometer.tic()
-        while True:
-            powerRx = usrp_UT.getPower_dBm(usrp_UT.rx_samples)
-            gps_data = gps_rtk.format_GPSData()
-            aiming = aiming_UT.getAiming()
-            date_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            loss_data = [date_time, gps_data[0], gps_data[1], gps_data[2], gps_data[3], gps_data[4], gps_data[5], gps_data[6],
-                         powerRx,
-                         aiming[0], aiming[1], aiming[2], aiming[3], aiming[4]
-                         ]
-
-            print("\t", counter, loss_data)
-            file.saveData(loss_data)
-            counter += 1
-
-    except KeyboardInterrupt:
-        interrupt(chronometer, usrp_UT, aiming_UT, gps_rtk)
+        engine.run()
     finally:
-        time_elapsed = chronometer.tocvalue()
-        reading_rate = counter/chronometer.tocvalue()
+        stats = engine.getStats()
+        threads = engine.getThreads()
 
         print("\n\nResults:")
-        print("\tTime elapsed: ", time_elapsed)
-        print("\tNumber of readings: ", counter)
-        print("\tReading rate: ", reading_rate, "M/s.\t", 1000/reading_rate, "ms/M\n.")
+        print("\tTime elapsed: ", stats['time_elapsed'])
+        print("\tNumber of readings: ", stats['number_of_readings'])
+        print("\tReading rate: ", stats['reading_rate'], "M/s.\t", stats['time_per_reading'], "ms/M\n.")
+        print("\tStartup: ", startup.getStats())
+        print("\tAlignment: ", stats['alignment'])
+        if stats['emission']:
+            print("\tEmission: ", stats['emission'])
+        if stats['pose']:
+            print("\tPose fusion: ", stats['pose'])
+        if stats['scheduler']:
+            print("\tScheduler: ", stats['scheduler'])
         try:
-            file_metadata.saveData([time_elapsed, counter, reading_rate, 1000/reading_rate,
-                                    usrp_UT.rx_thread, aiming_UT.aiming_thread, gps_rtk.gps_thread])
+            file_metadata.saveData([stats['time_elapsed'], stats['number_of_readings'], stats['reading_rate'],
+                                    stats['time_per_reading'], threads['usrp'], threads['aiming'], threads['gps'],
+                                    frequency, gain_rx, *instruments.metadataRow()])
 
         except Exception as e:
             print(e)
+        finally:
+            file.stopWriterThread()
+            file_metadata.close()
+            print("\tWriter queue: ", file.getStats())
+            # Single CSV file as FileCSV; if this fails, the journal can be recovered and joined with journal.py
+            print("\tData file: ", join_journal(file.filename))
+            if instruments.tracer is not None:
+                print("\tTrace file: ", instruments.tracer.save(file.filename + ".trace.json"))
 
 
  
 if __name__ == "__main__":
-    oneShot()
\ No newline at end of file
+    oneShot()
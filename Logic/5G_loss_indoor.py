@@ -23,22 +23,30 @@ import sys
 sys.path.append('../5G_CHARACTERIZATION/Modules')
 
 from usrp import USRP
-from time import sleep
 from aiming import RAiming
 from threading import Event
-from pytictoc import TicToc
 from pynput import keyboard
-from filewriter import FileCSV
+from filewriter import FileCSV, AsyncFileWriter
+from journal import FileJournal, join_journal
+from instrumentation import Instrumentation
+from tracing import Tracer
+from startup import DeviceStartup, usrp_streaming, aiming_reading
+from acquisition import AcquisitionEngine, USRPProducer, AimingProducer, ValueProducer, ConsolePrinter
 
 def oneShot():
 
     def keyboard_interrupt(key):
         if key == keyboard.Key.esc:
             print('Stopped...')
-            measuring_flag.set()
-        elif key == keyboard.Key.enter:
+            engine.pause()
+            stopped.set()
+        elif key == keyboard.Key.enter and not stopped.is_set():
             print('Continuing...')
-            measuring_flag.clear()
+            engine.resume()
+
+    def indoor_record(timestamp, samples):
+        # [PosLabel, PowerRx, aiming[0], aiming[1], aiming[2]], without timestamp
+        return [samples["label"][0], samples["usrp"][0], *samples["aiming"][:3]]
 
     # Serial ports
     aim_port = "COM13"
@@ -49,87 +57,93 @@ def oneShot():
     # USRP parameters
     frequency = 500e6
     gain_rx = 24.7
-    
-    
-    counter = 1
-
-    time_elapsed = 0        # Hold the total measuring elapsed time
-    update_time = False     # Allows time_elapsed updating
-    
-    try:
-        chronometer = TicToc()
 
-        file = FileCSV(name="Data/5G_loss/5G_loss", 
-                       frequency=None, 
-                       header=["PosLabel", "PowerRx","Roll_XZ","Pitch_YZ", "Bearing_MAG"], 
-                       type="MEAS")
-        file_metadata = FileCSV(name="Data/5G_loss/Metadata/5G_loss", frequency=None, header=["time_elapsed","number_of_readings","reading_rate","time_per_reading","usrp_rx_thread","aiming_thread"], type="METADATA")
-        
-        usrp_UT = USRP(rx_center_freq=frequency, rx_gain=gain_rx)
-        usrp_UT.startRxThread()
-        aiming_UT = RAiming(serial_port=aim_port, baudrate=aim_baudrate)
-        
-        
+    # Startup: maximum wait for the devices [s]
+    startup_timeout = 60
 
-        # Objects needed for keyboard measurement control
-        # 'Esc' -> Stop saving readings
-        # 'Enter' -> Continue saving readings
-        measuring_flag = Event()
-        key_listener = keyboard.Listener(on_press=keyboard_interrupt)   # Use threading
-        key_listener.start()
+    # Chrome trace of the acquisition threads (chrome://tracing, ui.perfetto.dev), written next to the data file
+    trace = False
 
-        posLabel = input("Initial Position Label: ")
+    # Latency histograms and rates of the acquisition stages, summarized in the METADATA file
+    instruments = Instrumentation(tracer=Tracer() if trace else None)
 
-        sleep(5) # Wait for threads for stabilize
+    # The devices are opened and started concurrently; recording starts when both are ready
+    startup = DeviceStartup(timeout=startup_timeout)
+    startup.add("usrp", lambda: USRP(rx_center_freq=frequency, rx_gain=gain_rx),
+                start=USRP.startRxThread, ready=usrp_streaming, stop=USRP.stopRxThread)
+    startup.add("aiming", lambda: RAiming(serial_port=aim_port, baudrate=aim_baudrate),
+                start=RAiming.startAimingThread, ready=aiming_reading, stop=RAiming.stopAimingThread)
+    try:
+        devices = startup.run()
+    except (TimeoutError, RuntimeError) as e:
+        print(e)
+        return
+
+    file = AsyncFileWriter(FileJournal(name="Data/5G_loss/5G_loss", 
+                                       frequency=None, 
+                                       header=["PosLabel", "PowerRx","Roll_XZ","Pitch_YZ", "Bearing_MAG"], 
+                                       type="MEAS"),
+                           instruments=instruments)
+    file.startWriterThread()
+    file_metadata = FileCSV(name="Data/5G_loss/Metadata/5G_loss", frequency=None, header=["time_elapsed","number_of_readings","reading_rate","time_per_reading","usrp_rx_thread","aiming_thread","paused_time","pauses","frequency","gain_rx", *instruments.metadataHeader()], type="METADATA")
+
+    label = ValueProducer()
+    engine = AcquisitionEngine(producers={"label": label,
+                                          "usrp": USRPProducer(devices["usrp"]),
+                                          "aiming": AimingProducer(devices["aiming"])},
+                               consumers=[file.saveData, ConsolePrinter(formatter=None, instruments=instruments)],
+                               assemble=indoor_record,
+                               clock="usrp",
+                               instruments=instruments)
+
+    # Objects needed for keyboard measurement control
+    # 'Esc' -> Stop saving readings and ask for the next position label
+    # 'Enter' -> Continue saving readings
+    stopped = Event()
+    key_listener = keyboard.Listener(on_press=keyboard_interrupt)   # Use threading
 
-        
-        chronometer.tic()
+    try:
+        label.set([input("Initial Position Label: ")])
+        engine.start()
+        key_listener.start()
         while True:
-            chronometer.tocvalue(restart=True) # Restart chronometer for more precise time measuring
-            while not measuring_flag.is_set():
-                powerRx = usrp_UT.getPower_dBm(usrp_UT.rx_samples)
-                aiming = aiming_UT.getAiming()
-                loss_data = [posLabel,powerRx,
-                            aiming[0],aiming[1],aiming[2]]
-                
-                print("\t", counter, loss_data)
-                file.saveData(loss_data)
-                counter += 1
-                update_time = True
-
-            if update_time:
-                time_elapsed += chronometer.tocvalue()
-                print('Actual elapsed time: ', time_elapsed)
-                posLabel = input("Next position label: ")
-                update_time = False
+            # The sensors keep sampling while the label is entered
+            if stopped.wait(0.5):
+                print('Actual elapsed time: ', engine.timeElapsed())
+                label.set([input("Next position label: ")])
+                stopped.clear()
 
     except KeyboardInterrupt:
-        chronometer.toc()
         print('\nCtrl + C -> Interrupted!')
-        print("\nT1: ", usrp_UT.rx_thread, "\nT2: ", aiming_UT.aiming_thread)
-
-        usrp_UT.stopRxThread()
-        aiming_UT.serial.close()
-        usrp_UT.stopRxStream()
-        
-        key_listener.stop()
-
 
     finally:
-        # time_elapsed = chronometer.tocvalue()
-        reading_rate = counter/time_elapsed# chronometer.tocvalue()
+        key_listener.stop()
+        engine.stop()
+        stats = engine.getStats()
+        threads = engine.getThreads()
 
         print("\n\nResults:")
-        print("\tTime elapsed: ", time_elapsed)
-        print("\tNumber of readings: ", counter)
-        print("\tReading rate: ", reading_rate, "M/s.\t", 1000/reading_rate, "ms/M\n.")
+        print("\tTime elapsed: ", stats['time_elapsed'])
+        print("\tNumber of readings: ", stats['number_of_readings'])
+        print("\tPaused: ", stats['paused_time'], "s in", stats['pauses'], "pauses.")
+        print("\tReading rate: ", stats['reading_rate'], "M/s.\t", stats['time_per_reading'], "ms/M\n.")
+        print("\tStartup: ", startup.getStats())
         try:
-            file_metadata.saveData([time_elapsed, counter, reading_rate, 1000/reading_rate,
-                                    usrp_UT.rx_thread, aiming_UT.aiming_thread])
+            file_metadata.saveData([stats['time_elapsed'], stats['number_of_readings'], stats['reading_rate'],
+                                    stats['time_per_reading'], threads['usrp'], threads['aiming'],
+                                    stats['paused_time'], stats['pauses'], frequency, gain_rx, *instruments.metadataRow()])
         
         except Exception as e:
             print(e)
+        finally:
+            file.stopWriterThread()
+            file_metadata.close()
+            print("\tWriter queue: ", file.getStats())
+            # Single CSV file as FileCSV; if this fails, the journal can be recovered and joined with journal.py
+            print("\tData file: ", join_journal(file.filename))
+            if instruments.tracer is not None:
+                print("\tTrace file: ", instruments.tracer.save(file.filename + ".trace.json"))
 
         
 if __name__ == "__main__":
-    oneShot()
\ No newline at end of file
+    oneShot()
@@ -89,6 +89,7 @@ def oneShotAim():
         print("T1: ", usrp_UT.rx_thread, "T2: ", aiming_UT.aiming_thread)
     finally:
         usrp_UT.stopRxStream()
+        bw_file.close()
 
 if __name__ == "__main__":
     oneShotAim()
\ No newline at end of file
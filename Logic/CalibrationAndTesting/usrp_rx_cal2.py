@@ -133,4 +133,5 @@ if __name__=="__main__":
         generator.off
     
     finally:
-        generator.off
\ No newline at end of file
+        generator.off
+        cal_file.close()
\ No newline at end of file
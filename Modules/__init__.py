@@ -4,19 +4,81 @@
 Custom modules for 5G mmWave characterization project.
 """
 
-# Import specific modules
-from . import gps
-from . import usrp
-from . import aiming
-from . import filewriter
-
-# Import all main classes/functions from each module
-from .gps import GPS
-from .usrp import USRP
-from .datums import DATUMS
-from .aiming import RAiming
-from .filewriter import FileCSV
-from .instrument import Instrument
+import importlib
+
+# Submodules and main classes/functions, imported on first access (PEP 562) so that
+# importing the package does not load uhd, matplotlib, pyubx2, RsInstrument, pandas...
+# until a tool actually uses the module that needs them
+_SUBMODULES = (
+    'gps', 'usrp', 'aiming', 'filewriter', 'angles', 'datums', 'columnar', 'compression', 'catalog',
+    'convert', 'sessioncache', 'streaming', 'journal', 'instrument', 'ubxlog', 'fusion', 'alignment',
+    'scheduler', 'instrumentation', 'tracing', 'startup', 'emission', 'records', 'acquisition',
+)
+_ATTRIBUTES = {
+    'GPS': 'gps',
+    'USRP': 'usrp',
+    'DATUMS': 'datums',
+    'RAiming': 'aiming',
+    'FileCSV': 'filewriter',
+    'AsyncFileWriter': 'filewriter',
+    'FileParquet': 'columnar',
+    'read_session': 'columnar',
+    'CompressedWriter': 'compression',
+    'open_session': 'compression',
+    'decompress_parallel': 'compression',
+    'Catalog': 'catalog',
+    'convert_tree': 'convert',
+    'read_dataset': 'convert',
+    'SessionCache': 'sessioncache',
+    'load_session': 'sessioncache',
+    'iter_chunks': 'streaming',
+    'TDigest': 'streaming',
+    'BinnedQuantiles': 'streaming',
+    'RunningFit': 'streaming',
+    'path_loss_profile': 'streaming',
+    'FileJournal': 'journal',
+    'recover_journal': 'journal',
+    'join_journal': 'journal',
+    'select_segments': 'journal',
+    'Instrument': 'instrument',
+    'UBXLogWriter': 'ubxlog',
+    'UBXLogReader': 'ubxlog',
+    'PoseEKF': 'fusion',
+    'PoseFusion': 'fusion',
+    'TimestampJoin': 'alignment',
+    'DeadlineScheduler': 'scheduler',
+    'PeriodicThread': 'scheduler',
+    'Instrumentation': 'instrumentation',
+    'LatencyHistogram': 'instrumentation',
+    'RateCounter': 'instrumentation',
+    'Tracer': 'tracing',
+    'DeviceStartup': 'startup',
+    'AdaptiveEmission': 'emission',
+    'RecordBuffer': 'records',
+    'MEASUREMENT_DTYPE': 'records',
+    'SessionClock': 'scheduler',
+    'AcquisitionEngine': 'acquisition',
+    'USRPProducer': 'acquisition',
+    'GPSProducer': 'acquisition',
+    'AimingProducer': 'acquisition',
+    'ValueProducer': 'acquisition',
+    'ConsolePrinter': 'acquisition',
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    if name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(f'.{_ATTRIBUTES[name]}', __name__), name)
+        globals()[name] = value     # Next accesses do not go through __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_ATTRIBUTES))
+
 
 # Define what gets imported with "from Modules import *"
 __all__ = [
@@ -24,8 +86,50 @@ __all__ = [
     'USRP',
     'RAiming',
     'FileCSV',
+    'AsyncFileWriter',
+    'FileParquet',
+    'read_session',
+    'CompressedWriter',
+    'open_session',
+    'decompress_parallel',
+    'FileJournal',
+    'recover_journal',
+    'join_journal',
+    'select_segments',
+    'Catalog',
+    'convert_tree',
+    'read_dataset',
+    'SessionCache',
+    'load_session',
+    'iter_chunks',
+    'TDigest',
+    'BinnedQuantiles',
+    'RunningFit',
+    'path_loss_profile',
     'DATUMS',
-    'Instrument'
+    'Instrument',
+    'UBXLogWriter',
+    'UBXLogReader',
+    'PoseEKF',
+    'PoseFusion',
+    'AcquisitionEngine',
+    'USRPProducer',
+    'GPSProducer',
+    'AimingProducer',
+    'ValueProducer',
+    'ConsolePrinter',
+    'TimestampJoin',
+    'DeadlineScheduler',
+    'PeriodicThread',
+    'Instrumentation',
+    'LatencyHistogram',
+    'RateCounter',
+    'Tracer',
+    'DeviceStartup',
+    'SessionClock',
+    'AdaptiveEmission',
+    'RecordBuffer',
+    'MEASUREMENT_DTYPE'
 ]
 
 # Package metadata
@@ -0,0 +1,672 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Producer/consumer acquisition engine. Each sensor (USRP, GPS,
+                aiming) is an independent producer sampled by its own thread;
+                a fusion thread assembles the records from the latest sample
+                of every producer, at a fixed rate or on every new sample of a
+                clock producer, and hands them to decoupled consumers (file
+                writers, console). The measurement scripts are configurations
+                of this engine.
+'''
+
+import threading
+from abc import ABC, abstractmethod
+from time import monotonic, sleep, time, perf_counter_ns
+from collections import deque
+from datetime import datetime as dt
+from gps import format_ubx
+from scheduler import DeadlineScheduler, SessionClock
+
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def format_timestamp(timestamp:float) -> str:
+    '''
+    Formats an epoch time [s] as the 'Timestamp' column of the session files (ms resolution).
+    '''
+    return dt.fromtimestamp(timestamp).strftime(TIME_FORMAT)[:-3]
+
+
+def format_row(row:list) -> list:
+    '''
+    Formats the epoch time of the first field of a record as in format_timestamp(). Used as
+    the 'formatter' of an AsyncFileWriter, so the formatting runs in the writer thread.
+    '''
+    return [format_timestamp(row[0]), *row[1:]]
+
+
+class Producer(ABC):
+    '''
+    Abstract base class of the sensors of the AcquisitionEngine, subclasses implement latest().
+
+    A producer is sampled by its own thread (started by start(), unless the
+    device was already started, e.g. by a DeviceStartup) and exposes, without
+    blocking, its most recent sample with the monotonic time it was taken,
+    and the recent timestamped samples for the TimestampJoin.
+
+    Attributes:
+        samples (int): Number of distinct samples taken by the engine.
+        aligned (bool): The samples are aligned in time by a TimestampJoin. Default is True.
+        numeric_fields (tuple): Indexes of the values that can be interpolated linearly.
+        angular_fields (tuple): Indexes of the values that are angles [deg] in [0, 360).
+
+    Methods
+    -------
+        start() -> None:
+            Starts the sampling of the sensor.
+        stop() -> None:
+            Stops the sampling of the sensor and releases it.
+        latest() -> tuple:
+            Returns (time, values) of the most recent sample, or None.
+        attach(instruments: Instrumentation) -> None:
+            Enables the instrumentation of the sensor.
+        history() -> list:
+            Returns the recent (time, values) samples, oldest first.
+        timeline() -> tuple:
+            Returns (times, samples) of the recent samples, oldest first, updated in place with the
+            new samples (no copy), for the TimestampJoin.
+        getThread() -> threading.Thread:
+            Returns the sampling thread, if any.
+    '''
+    aligned = True
+    numeric_fields = ()
+    angular_fields = ()
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.instruments = None
+
+    def start(self) -> None:
+        pass
+
+    def attach(self, instruments) -> None:
+        self.instruments = instruments
+
+    def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def latest(self):
+        pass
+
+    def history(self) -> list:
+        return list(self.timeline()[1])
+
+    def timeline(self) -> tuple:
+        sample = self.latest()
+        return ([], []) if sample is None else ([sample[0]], [sample])
+
+    def getThread(self):
+        return None
+
+
+class USRPProducer(Producer):
+    '''
+    Received power of a USRP (USRP_RX_THREAD). The power of a frame is
+    computed once, the first time the frame is requested. The time of a
+    sample is the center of its frame (the frame clock). The history holds
+    the frames requested with latest().
+
+    Args:
+        usrp (USRP): The receiver, not started.
+        buffer_size (int): Number of samples kept in the history. Default is 256.
+
+    Values:
+        [PowerRx] in dBm.
+    '''
+    numeric_fields = (0,)
+
+    def __init__(self, usrp, buffer_size:int = 256) -> None:
+        super().__init__()
+        self.usrp = usrp
+        self.frame_duration = usrp.rx_num_samps/usrp.rx_sample_rate
+        self._rx_time = None
+        self._sample = None
+        self._times = deque(maxlen=buffer_size)
+        self._history = deque(maxlen=buffer_size)
+
+    def start(self) -> None:
+        if self.usrp.rx_thread is None or not self.usrp.rx_thread.is_alive():
+            self.usrp.startRxThread()
+
+    def attach(self, instruments) -> None:
+        self.instruments = instruments
+        self.usrp.instruments = instruments
+
+    def stop(self) -> None:
+        self.usrp.stopRxThread()
+
+    def latest(self):
+        rx_time = self.usrp.rx_time
+        if rx_time is None:
+            return None
+        if rx_time != self._rx_time:
+            self._rx_time = rx_time
+            start = perf_counter_ns()
+            self._sample = (rx_time - self.frame_duration/2, [self.usrp.getPower_dBm(self.usrp.rx_samples)])
+            if self.instruments is not None:
+                self.instruments.record('power_compute', perf_counter_ns() - start)
+            self._times.append(self._sample[0])
+            self._history.append(self._sample)
+            self.samples += 1
+        return self._sample
+
+    def timeline(self) -> tuple:
+        self.latest()
+        return self._times, self._history
+
+    def getThread(self):
+        return self.usrp.rx_thread
+
+
+class GPSProducer(Producer):
+    '''
+    Last NAV-RELPOSNED or NAV-HPPOSLLH message of a GPS (GPS_THREAD).
+
+    Args:
+        gps (GPS): The receiver, not started.
+
+    Values:
+        [R_N/Lon, R_E/Lat, R_D/Hgt, accN/hMSL, accE/hAcc, accD/vAcc, PosType], see gps.format_ubx().
+    '''
+    numeric_fields = (0, 1, 2, 3, 4, 5)
+
+    def __init__(self, gps, buffer_size:int = 256) -> None:
+        super().__init__()
+        self.gps = gps
+        self._sample = None
+        self._times = deque(maxlen=buffer_size)
+        self._history = deque(maxlen=buffer_size)
+
+    def start(self) -> None:
+        if self.gps.gps_thread is None or not self.gps.gps_thread.is_alive():
+            self.gps.startGPSThread()
+
+    def attach(self, instruments) -> None:
+        self.instruments = instruments
+        self.gps.instruments = instruments
+
+    def stop(self) -> None:
+        self.gps.stopGPSThread()
+
+    def latest(self):
+        gps_time, gps_data = self.gps.gps_time, self.gps.gps_data
+        if gps_time is None:
+            return None
+        if self._sample is None or self._sample[0] != gps_time:
+            values = format_ubx(gps_data)
+            if values is None:
+                return self._sample
+            self._sample = (gps_time, values)
+            self.samples += 1
+        return self._sample
+
+    def timeline(self) -> tuple:
+        # Formats only the messages received since the last call, if any
+        since = self._times[-1] if self._times else None
+        if since is None or self.gps.gps_time != since:
+            for gps_time, gps_data in self.gps.getRecords(since):
+                values = format_ubx(gps_data)
+                if values is not None:
+                    self._times.append(gps_time)
+                    self._history.append((gps_time, values))
+                    self.samples += 1
+        return self._times, self._history
+
+    def getThread(self):
+        return self.gps.gps_thread
+
+
+class AimingProducer(Producer):
+    '''
+    Last reading of the aiming module (AIMING_THREAD).
+
+    Args:
+        aiming (RAiming): The reader, not started.
+        buffer_size (int): Number of samples kept in the history. Default is 256.
+
+    Values:
+        [Bearing, Pitch, Roll, cal_stat, Temp].
+    '''
+    numeric_fields = (1, 2, 4)
+    angular_fields = (0,)
+
+    def __init__(self, aiming, buffer_size:int = 256) -> None:
+        super().__init__()
+        self.aiming = aiming
+        self._time = None
+        self._times = deque(maxlen=buffer_size)
+        self._history = deque(maxlen=buffer_size)
+
+    def start(self) -> None:
+        if self.aiming.aiming_thread is None or not self.aiming.aiming_thread.is_alive():
+            self.aiming.startAimingThread()
+
+    def attach(self, instruments) -> None:
+        self.instruments = instruments
+        self.aiming.instruments = instruments
+
+    def stop(self) -> None:
+        self.aiming.stopAimingThread()
+
+    def latest(self):
+        record = self.aiming.latestRecord()
+        if record is None:
+            return None
+        if record[0] != self._time:
+            self._time = record[0]
+            self.samples += 1
+        return record[0], list(record[1:])
+
+    def timeline(self) -> tuple:
+        # Converts only the readings received since the last call, if any
+        record = self.aiming.latestRecord()
+        since = self._times[-1] if self._times else None
+        if record is not None and record[0] != since:
+            for record in self.aiming.getRecords(since):
+                self._times.append(record[0])
+                self._history.append((record[0], list(record[1:])))
+                if self._time is None or record[0] > self._time:
+                    self.samples += 1       # Not counted yet by latest()
+            self._time = max(record[0], self._time or record[0])
+        return self._times, self._history
+
+    def getThread(self):
+        return self.aiming.aiming_thread
+
+
+class ValueProducer(Producer):
+    '''
+    Values set by the application (e.g. the position label of the indoor measurements).
+    Not aligned in time: a record takes the values set last.
+
+    Args:
+        values (list): Initial values. Default is None (no sample until set()).
+    '''
+    aligned = False
+
+    def __init__(self, values:list = None) -> None:
+        super().__init__()
+        self._sample = None
+        if values is not None:
+            self.set(values)
+
+    def set(self, values:list) -> None:
+        self._sample = (monotonic(), list(values))
+        self.samples += 1
+
+    def latest(self):
+        return self._sample
+
+
+class ConsolePrinter:
+    '''
+    Console consumer of the AcquisitionEngine: prints the number of records
+    and the last record from its own thread every 'interval' seconds, instead
+    of one print per record in the acquisition path.
+
+    Args:
+        interval (float): Seconds between prints. Default is 0.5.
+        formatter (callable): Formats a record for printing. Default is format_row.
+        instruments (Instrumentation): Also prints its live rates and p99 latencies every
+                                       'stats_interval' seconds. Default is None.
+        stats_interval (float): Seconds between prints of the live values. Default is 5.
+    '''
+
+    def __init__(self, interval:float = 0.5, formatter = format_row, instruments = None,
+                 stats_interval:float = 5.0) -> None:
+        self.interval = interval
+        self.formatter = formatter
+        self.instruments = instruments
+        self.stats_interval = stats_interval
+        self.count = 0
+        self.last = None
+        self.console_thread = None
+        self._running = threading.Event()
+
+    def __call__(self, row:list) -> None:
+        self.last = row
+        self.count += 1
+
+    def _continuousPrinting(self) -> None:
+        printed = 0
+        stats_time = monotonic()
+        while self._running.is_set():
+            sleep(self.interval)
+            if self.count != printed and self.last is not None:
+                printed = self.count
+                print("\t", printed, self.formatter(self.last) if self.formatter else self.last)
+            if self.instruments is not None and monotonic() - stats_time >= self.stats_interval:
+                stats_time = monotonic()
+                print("\t", ", ".join(f"{name}: {values['rate']:.1f}/s p99 {values['p99_us']:.0f} us"
+                                       for name, values in self.instruments.live().items()))
+
+    def start(self) -> None:
+        self._running.set()
+        self.console_thread = threading.Thread(target=self._continuousPrinting, name="CONSOLE_THREAD", daemon=True)
+        self.console_thread.start()
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self.console_thread is not None:
+            self.console_thread.join()
+
+
+def concatenate(timestamp:float, samples:dict) -> list:
+    '''
+    Default record of the AcquisitionEngine: [timestamp, *values of each producer], in the
+    order of the producers.
+    '''
+    row = [timestamp]
+    for values in samples.values():
+        row.extend(values)
+    return row
+
+
+class AcquisitionEngine:
+    '''
+    Assembles records from independent sensor producers and hands them to consumers.
+
+    A fusion thread (FUSION_THREAD) takes, without blocking, the latest sample
+    of every producer and builds a record with assemble(timestamp, samples),
+    'samples' being a dict name -> values in the order of the producers. The
+    records are emitted at 'rate' records per second or, without rate, once
+    for every new sample of the 'clock' producer, so the record rate is set by
+    the sensors. With 'rate' the ticks are monotonic deadlines of a
+    DeadlineScheduler (uniform spacing, jitter and missed deadlines counted),
+    and a producer whose latest sample is older than 'max_age' is stale: its
+    fields are left empty for that record instead of waiting for it. Records
+    are not emitted until every producer has a sample (this replaces the
+    fixed wait for the GPS). Consumers are callables that
+    receive each record, and must not block (e.g. AsyncFileWriter.saveData,
+    ConsolePrinter); consumers with start()/stop() are started and stopped
+    with the engine.
+
+    With a TimestampJoin, the samples of the producers are aligned to the
+    time of each clock sample (or of each tick with 'rate') instead of taking
+    the latest ones, and the record timestamp is that time.
+
+    pause() gates the records without stopping the devices: the USRP keeps
+    streaming and the GPS and aiming readers keep reading (no setReceiver nor
+    serial port reopening on resume, and no RTK fix lost), while the engine
+    stops computing and assembling records. The records whose time falls
+    inside a paused interval are discarded even if they are aligned later,
+    and the paused intervals are excluded from the elapsed time.
+
+    Args:
+        producers (dict): Name -> Producer.
+        consumers (list): Callables receiving each record.
+        assemble (callable): assemble(timestamp, samples) -> record. Default is concatenate.
+        rate (float): Records per second. Default is None (clock driven).
+        clock (str): Producer that drives the records when there is no rate. Defaults to the first producer.
+        poll_interval (float): Seconds between checks of the clock producer. Default is 0.5 ms.
+        join (TimestampJoin): Aligns the samples in time. Default is None (latest samples).
+        max_age (float | dict): With 'rate', maximum age [s] of the latest sample of the producers, for all
+                                or by name. Default is None (no limit).
+        instruments (Instrumentation): Attached to the producers; the engine records the 'record_assembly'
+                                       stage (assembly and hand over to the consumers) and, with a tracer,
+                                       the pending join times and the pauses. Default is None.
+        emission (AdaptiveEmission): Decides which records are handed to the consumers and adds the
+                                     aggregates of the suppressed ones. Default is None (all the records).
+        pose (PoseFusion): Adds to each record the GPS/aiming pose fused at the record time, as a 'pose'
+                           entry after the alignment errors. Default is None (no fused pose).
+
+    Attributes:
+        records (int): Records handed to the consumers.
+        incomplete (int): Record times skipped because a producer had no sample yet.
+        stale (dict): Records with the fields of each producer empty because its sample was too old.
+        scheduler (DeadlineScheduler): Scheduler of the ticks with 'rate', None otherwise.
+        session (SessionClock): Acquisition time and paused intervals.
+        paused_records (int): Aligned records discarded because their time was inside a pause.
+        fusion_thread (threading.Thread): Thread that assembles the records.
+
+    Methods
+    -------
+        start() -> None:
+            Starts the producers, the consumers and the fusion thread.
+        stop() -> None:
+            Stops the fusion thread, the producers and the consumers.
+        run() -> None:
+            start(), then blocks until Ctrl+C and stop().
+        pause() -> None:
+            Stops emitting records; the device streams stay open and sampling, so resuming is instant.
+        resume() -> None:
+            Emits records again.
+        isPaused() -> bool:
+            True while paused.
+        timeElapsed() -> float:
+            Seconds of acquisition, excluding the paused intervals.
+        getStats() -> dict:
+            Records, rates and samples of each producer.
+        getThreads() -> dict:
+            Sampling thread of each producer.
+    '''
+
+    def __init__(self, producers:dict, consumers:list = (), assemble = concatenate, rate:float = None,
+                 clock:str = None, poll_interval:float = 0.0005, join = None, max_age = None,
+                 instruments = None, emission = None, pose = None) -> None:
+        if not producers:
+            raise ValueError("At least one producer is required.")
+        self.producers = dict(producers)
+        self.consumers = list(consumers)
+        self.assemble = assemble
+        self.rate = rate
+        self.clock = clock or next(iter(self.producers))
+        if self.clock not in self.producers:
+            raise ValueError(f"Unrecognized clock, only {', '.join(map(repr, self.producers))} are valid.")
+        self.poll_interval = poll_interval
+        self.join = join
+        self.max_age = max_age
+        self.scheduler = DeadlineScheduler(rate) if rate else None
+        self.instruments = instruments
+        self.emission = emission
+        self.pose = pose
+        if instruments is not None:
+            for producer in self.producers.values():
+                producer.attach(instruments)
+
+        self.records = 0
+        self.incomplete = 0
+        self.stale = {name: 0 for name in self.producers}
+        self.fusion_thread = None
+        self._running = False
+        self.session = SessionClock()
+        self.paused_records = 0
+        self._join_latest = None
+
+    def _maxAge(self, name:str):
+        if isinstance(self.max_age, dict):
+            return self.max_age.get(name)
+        return self.max_age
+
+    def _emit(self) -> bool:
+        start = perf_counter_ns()
+        samples = {}
+        now = monotonic()
+        for name, producer in self.producers.items():
+            sample = producer.latest()
+            if sample is None:
+                self.incomplete += 1
+                return False
+            max_age = self._maxAge(name) if self.rate else None
+            if max_age is not None and producer.aligned and now - sample[0] > max_age:
+                self.stale[name] += 1
+                samples[name] = [None]*len(sample[1])
+            else:
+                samples[name] = sample[1]
+        if self.pose is not None:
+            samples['pose'] = self.pose.poseAt(now, self.producers)
+        self._deliver(time(), samples)
+        if self.instruments is not None:
+            self.instruments.record('record_assembly', perf_counter_ns() - start)
+        return True
+
+    def _deliver(self, timestamp:float, samples:dict, emission:bool = True) -> None:
+        if emission and self.emission is not None:
+            record = self.emission.update(timestamp, samples)
+            if record is None:
+                return
+            timestamp, samples = record
+        row = self.assemble(timestamp, samples)
+        for consumer in self.consumers:
+            consumer(row)
+        self.records += 1
+
+    def _poll(self) -> None:
+        for producer in self.producers.values():
+            producer.latest()
+
+    def _latestTimes(self) -> tuple:
+        return tuple(None if sample is None else sample[0] for sample in
+                     (producer.latest() for producer in self.producers.values() if producer.aligned))
+
+    def _joinUpdated(self, now:float) -> bool:
+        # The pending times can only be aligned after a new sample of a producer or at their 'max_delay'
+        if not self.join.pending:
+            return False
+        return self._latestTimes() != self._join_latest or self.join.due(now)
+
+    def _emitJoined(self, now:float) -> None:
+        offset = time() - monotonic()       # Monotonic to epoch time
+        start = perf_counter_ns()
+        self._join_latest = self._latestTimes()
+        records = self.join.pop(self.producers, now)
+        for t, samples in records:
+            if not self.session.isActiveAt(t):
+                self.paused_records += 1        # Aligned after the pause, but taken during it
+                continue
+            if self.pose is not None:
+                samples['pose'] = self.pose.poseAt(t, self.producers)
+            self._deliver(t + offset, samples)
+        if records and self.instruments is not None:
+            # Per record latency in the histogram, the whole batch as the traced span
+            elapsed = perf_counter_ns() - start
+            self.instruments.record('record_assembly', elapsed//len(records), len(records), span_ns=elapsed)
+            if self.instruments.tracer is not None:
+                self.instruments.tracer.counter('join', pending=len(self.join.pending))
+
+    # Private function, used in 'start()'
+    def _fusionLoop(self) -> None:
+        clock = self.producers[self.clock]
+        clock_time = None
+        if self.scheduler is not None:
+            self.scheduler.start()
+        while self._running:
+            if self.session.isPaused() and (self.join is None or not self.join.pending):
+                # The sensors keep sampling, but no power is computed nor record assembled until resumed
+                sleep(self.poll_interval)
+                continue
+            if self.scheduler is not None:
+                # With a join, the producers are polled between ticks to fill their histories
+                deadline = self.scheduler.wait(self._poll if self.join is not None else None, self.poll_interval)
+            else:
+                sample = clock.latest()
+                if sample is None or sample[0] == clock_time:
+                    if self.join is not None and self._joinUpdated(monotonic()):
+                        self._emitJoined(monotonic())
+                    sleep(self.poll_interval)
+                    continue
+                clock_time = sample[0]
+            if self.join is None:
+                if not self.session.isPaused():
+                    self._emit()
+                continue
+            if not self.session.isPaused():
+                if self.rate:
+                    self.join.push(deadline)
+                else:
+                    self.join.push(sample[0], self.clock, sample[1])
+            self._emitJoined(monotonic())
+
+    def start(self) -> None:
+        for consumer in self.consumers:
+            if hasattr(consumer, 'start'):
+                consumer.start()
+        for producer in self.producers.values():
+            producer.start()
+        self._running = True
+        self.session.start()
+        self.fusion_thread = threading.Thread(target=self._fusionLoop, name="FUSION_THREAD", daemon=True)
+        self.fusion_thread.start()
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        self.fusion_thread.join()
+        if self.join is not None:
+            self._emitJoined(float('inf'))      # Align the pending times with the samples available
+        if self.emission is not None:
+            record = self.emission.flush()      # Last suppressed samples
+            if record is not None:
+                self._deliver(*record, emission=False)
+        self.session.stop()
+        for producer in self.producers.values():
+            try:
+                producer.stop()
+            except Exception as e:
+                print(f"Error stopping {type(producer).__name__}: {e}")
+        for consumer in self.consumers:
+            if hasattr(consumer, 'stop'):
+                consumer.stop()
+
+    def run(self) -> None:
+        self.start()
+        try:
+            while self.fusion_thread.is_alive():
+                self.fusion_thread.join(0.5)
+        except KeyboardInterrupt:
+            print('\nCtrl + C -> Interrupted!')
+        finally:
+            self.stop()
+
+    def pause(self) -> None:
+        if self.session.pause() and self.instruments is not None and self.instruments.tracer is not None:
+            self.instruments.tracer.instant('pause')
+
+    def resume(self) -> None:
+        if self.session.resume() and self.instruments is not None and self.instruments.tracer is not None:
+            self.instruments.tracer.instant('resume')
+
+    def isPaused(self) -> bool:
+        return self.session.isPaused()
+
+    def timeElapsed(self) -> float:
+        return self.session.elapsed()
+
+    def getStats(self) -> dict:
+        elapsed = self.timeElapsed()
+        rate = self.records/elapsed if elapsed > 0 else 0.0
+        return {
+            'time_elapsed': elapsed,
+            'paused_time': self.session.pausedTime(),
+            'pauses': self.session.pauses,
+            'paused_records': self.paused_records,
+            'number_of_readings': self.records,
+            'reading_rate': rate,
+            'time_per_reading': 1000/rate if rate else float('nan'),
+            'incomplete': self.incomplete,
+            'samples': {name: producer.samples for name, producer in self.producers.items()},
+            'stale': dict(self.stale),
+            'scheduler': self.scheduler.getStats() if self.scheduler is not None else None,
+            'alignment': self.join.getStats() if self.join is not None else None,
+            'emission': self.emission.getStats() if self.emission is not None else None,
+            'pose': self.pose.getStats() if self.pose is not None else None,
+            'stages': self.instruments.summary() if self.instruments is not None else None,
+        }
+
+    def getThreads(self) -> dict:
+        return {name: producer.getThread() for name, producer in self.producers.items()}
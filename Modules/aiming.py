@@ -15,11 +15,117 @@ Develop by:
   Description:  This class is in charge of the acquisition of aiming data, 
                 it reads the serial port assigned to the Raspberry Pi Pico 
                 and parse the data to the required format.
+                Supports the ASCII CSV lines and a compact binary frame format.
 '''
 
 
 import threading
-from serial import Serial
+import numpy as np
+from time import monotonic, sleep, perf_counter_ns
+from binascii import crc_hqx
+from collections import deque
+from serial import Serial, SerialException
+
+
+''' Binary frame of the Pico aiming link (26 bytes, little-endian):
+        sync word (0xAA 0x55) | seq (uint16) | bearing, pitch, roll, cal_stat, temp (float32)
+        | CRC-16/CCITT-FALSE (uint16) of seq + floats (binascii.crc_hqx with initial value 0xFFFF) '''
+FRAME_SYNC = b'\xaa\x55'
+FRAME_DTYPE = np.dtype([('sync', '<u2'), ('seq', '<u2'),
+                        ('bearing', '<f4'), ('pitch', '<f4'), ('roll', '<f4'),
+                        ('cal_stat', '<f4'), ('temp', '<f4'),
+                        ('crc', '<u2')])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+FRAME_FIELDS = ['bearing', 'pitch', 'roll', 'cal_stat', 'temp']
+
+
+def _crc_table():
+    '''
+    Table of the CRC-16/CCITT-FALSE (polynomial 0x1021) of each byte value, for crc16_frames().
+    '''
+    table = np.arange(256, dtype=np.uint32) << 8
+    for _ in range(8):
+        table = np.where(table & 0x8000, (table << 1) ^ 0x1021, table << 1) & 0xFFFF
+    return table
+
+CRC_TABLE = _crc_table()
+
+
+def crc16_frames(data):
+    '''
+    CRC-16/CCITT-FALSE of many byte strings of the same length at once (table driven,
+    one step per byte column), equal to binascii.crc_hqx(row, 0xFFFF) of each row.
+
+    Args:
+        data (numpy.ndarray): uint8 array (n, length), one byte string per row.
+
+    Returns:
+        numpy.ndarray: The n CRC values (uint32).
+    '''
+    crc = np.full(len(data), 0xFFFF, dtype=np.uint32)
+    for column in data.T:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[(crc >> 8) ^ column]
+    return crc
+
+
+def decode_frames(buffer):
+    '''
+    Decodes in bulk the binary aiming frames contained in a buffer.
+
+    The sync word candidates of the whole buffer are located with NumPy, the
+    complete ones are gathered in a (n, FRAME_SIZE) array and their CRC is checked
+    in one pass (crc16_frames); bytes that do not belong to a valid frame are skipped.
+    A valid frame overlapping the previous accepted one is discarded.
+
+    Args:
+        buffer (bytes | bytearray): Received bytes.
+
+    Returns:
+        tuple: (frames, consumed) where frames is a numpy structured array with dtype
+               FRAME_DTYPE and consumed the number of bytes of the buffer already
+               processed; the rest may hold an incomplete frame.
+    '''
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    end = len(data)
+    starts = np.flatnonzero((data[:-1] == FRAME_SYNC[0]) & (data[1:] == FRAME_SYNC[1]))
+    complete = starts[starts + FRAME_SIZE <= end]
+    windows = data[complete[:, None] + np.arange(FRAME_SIZE)]
+    crc = windows[:, -2].astype(np.uint32) | (windows[:, -1].astype(np.uint32) << 8)
+    valid = np.flatnonzero(crc16_frames(windows[:, 2:-2]) == crc)
+    if len(valid) > 1 and np.any(np.diff(complete[valid]) < FRAME_SIZE):
+        # Rare: a sync word inside a valid frame that also passes the CRC, keep the first
+        accepted, last_end = [], 0
+        for index in valid:
+            if complete[index] >= last_end:
+                accepted.append(index)
+                last_end = complete[index] + FRAME_SIZE
+        valid = np.array(accepted, dtype=np.intp)
+    frames = np.ascontiguousarray(windows[valid]).view(FRAME_DTYPE).ravel()
+    position = int(complete[valid[-1]]) + FRAME_SIZE if len(valid) else 0
+    # Keep the first incomplete frame after the last valid one, or a last byte
+    # that may be the first half of a sync word
+    incomplete = starts[(starts >= position) & (starts + FRAME_SIZE > end)]
+    if len(incomplete):
+        position = int(incomplete[0])
+    else:
+        position = max(position, end - 1)
+    return frames, position
+
+
+def encode_frame(seq, bearing, pitch, roll, cal_stat, temp):
+    '''
+    Encodes one binary aiming frame, as sent by the Pico (used for testing and replay).
+
+    Returns:
+        bytes: The 26 bytes frame.
+    '''
+    frame = np.zeros(1, dtype=FRAME_DTYPE)
+    frame['sync'] = int.from_bytes(FRAME_SYNC, 'little')
+    frame['seq'] = seq & 0xFFFF
+    for field, value in zip(FRAME_FIELDS, (bearing, pitch, roll, cal_stat, temp)):
+        frame[field] = value
+    frame['crc'] = crc_hqx(frame.tobytes()[2:-2], 0xFFFF)
+    return frame.tobytes()
 
 class RAiming:
     """
@@ -31,14 +137,46 @@ class RAiming:
     initializes the necessary attributes for continuous measurement, and establishes
     a connection to the specified serial port.
 
+    The background reader (startAimingThread) keeps a ring of the most recent
+    timestamped records, so the acquisition loops can take the latest aiming
+    without blocking on the serial port (latest()).
+
+    The Pico can send either ASCII lines "{bearing},{pitch},{roll},{cal_stat},{temp}"
+    or binary frames (see FRAME_DTYPE) with a sequence counter that makes lost
+    samples visible, and a CRC.
+
     Args:
         baudrate (int): The baud rate for the serial communication. Defaults to 19200.
         serial_port (str): The name of the serial port to connect to. Defaults to "COM13".
+        buffer_size (int): Number of records kept by the background reader. Defaults to 256.
+        timeout (float): Read timeout of the serial port in seconds. Defaults to 1.0.
+        protocol (str): Format sent by the Pico, 'ascii' or 'binary'. Defaults to 'ascii'.
+        frame_rate (float): Binary protocol only, nominal rate of the Pico frames [Hz] used to spread
+                            the timestamps of the frames read together. Defaults to None, estimated
+                            from the sequence counter and the reception times.
     
+    Attributes:
+        aiming_data (list): Most recent reading [bearing, pitch, roll, cal_stat, temp].
+        aiming_records (collections.deque): Ring of (time, bearing, pitch, roll, cal_stat, temp)
+                                            records, time in seconds of time.monotonic().
+        reconnections (int): Number of times the background reader reopened the serial port.
+        lost_frames (int): Binary protocol only, frames lost according to the sequence counter.
+        resyncs (int): Binary protocol only, repeated or backward sequence numbers (e.g. the Pico restarted).
+        instruments (Instrumentation): Records the 'aiming_read' latency of the parsing, None if disabled.
+
     Methods
     -------
         getAiming() -> list:
-            Returns the values of acceleration 'XZ', 'YZ' and magnetometer 'MAG'.
+            Blocking read of the values 'bearing', 'pitch', 'roll', 'cal_stat' and 'temp'.
+        
+        latest() -> list:
+            Non-blocking, returns the most recent reading of the background reader.
+        
+        latestRecord() -> tuple:
+            Non-blocking, returns the most recent timestamped record of the background reader.
+        
+        getRecords(since: float) -> list:
+            Returns the timestamped records newer than a given time.
         
         _continuousAiming() -> None:
             Do continuously acquires aiming data while the measurement flag is set to true.
@@ -50,48 +188,250 @@ class RAiming:
             Stops the continuous aiming data acquisition thread and cleans up resources.
     """ 
        
-    def __init__(self, baudrate = 19200, serial_port = "COM13"):
+    EMPTY_READING = [None, None, None, None, None]
+
+    def __init__(self, baudrate = 19200, serial_port = "COM13", buffer_size = 256, timeout = 1.0, protocol = "ascii",
+                 frame_rate = None):
+        if protocol not in ("ascii", "binary"):
+            raise ValueError("Unrecognized protocol, only 'ascii', 'binary' are valid.")
+        self.protocol = protocol
         self.baudrate = baudrate
         self.serial_port = serial_port
+        self.timeout = timeout
         self.continuous_measure = False
         self.aiming_thread = None
         self.aiming_data = []
-        self.serial = Serial(port = self.serial_port, baudrate = self.baudrate)
+        self.aiming_records = deque(maxlen=buffer_size)
+        self.reconnections = 0
+        self.lost_frames = 0
+        self.resyncs = 0
+        self.last_seq = None
+        self.frame_rate = frame_rate
+        self._frame_count = 0           # Frames received according to the sequence counter
+        self._frame_counts = None       # Frame count of each reading of the last _consumeBinary()
+        self._rate_origin = None        # (time, frame count) of the estimation of the frame rate
+        self.instruments = None     # Instrumentation, records 'aiming_read'
+        self.serial = Serial(port = self.serial_port, baudrate = self.baudrate, timeout = self.timeout)
+
+    @staticmethod
+    def _parseLine(line):
+        """
+        Parse one line sent by the Pico: "{bearing},{pitch},{roll},{cal_stat},{temp}"
 
+        Args:
+            line (bytes): Line read from the serial port, with or without line ending.
+
+        Returns:
+            list: [bearing, pitch, roll, cal_stat, temp] or None if the line is malformed.
+        """
+        values = line.decode('utf-8', errors='ignore').strip().split(',')
+        if len(values) != 5:
+            return None
+        try:
+            return [float(value) for value in values]
+        except ValueError:
+            return None
 
     def getAiming(self):
         """
         Get the values ​​of acceleration 'bearing', 'pitch' and magnetometer 'roll'
 
+        Blocking read, do not use while the background reader is running: use latest().
+
         Returns:
-            accel_mag_values (list): ['bearing', 'pitch','roll']
+            accel_mag_values (list): ['bearing', 'pitch','roll', 'cal_stat', 'temp'], all None if no valid reading.
         """        
-        accel_mag_values = []
         #if self.serial.in_waiting > 0:
         self.serial.reset_input_buffer()
+        # The flushed frames are not lost frames, the sequence counter starts over
+        self.last_seq = None
+        self._rate_origin = None
+        if self.protocol == "binary":
+            # Read until a complete frame arrives (two frames long at most)
+            pending = bytearray(self.serial.read(FRAME_SIZE))
+            readings = self._consumeBinary(pending)
+            if not readings:
+                pending += self.serial.read(FRAME_SIZE)
+                readings = self._consumeBinary(pending)
+            return readings[-1] if readings else list(self.EMPTY_READING)
+
         # Read a line from the serial port
-        str_line = self.serial.readline().decode('utf-8').strip().split(',')
-        #print(str_line)
+        aiming = self._parseLine(self.serial.readline())
         
         # aiming return "{bearing},{pitch},{roll},{cal_stat},{temp}"
-        return (
-            [float(value) for value in str_line]
-            if len(str_line) == 5
-            else [None, None, None]
-        )
+        return aiming if aiming is not None else list(self.EMPTY_READING)
+
+    def _consumeAscii(self, pending):
+        """
+        Parse the complete lines of the pending bytes, removing them from the buffer.
+
+        Args:
+            pending (bytearray): Received bytes; a trailing partial line is kept.
+
+        Returns:
+            list: Readings [bearing, pitch, roll, cal_stat, temp] of the valid lines.
+        """
+        end = pending.rfind(b'\n')
+        if end < 0:
+            return []
+        lines = pending[:end].split(b'\n')
+        del pending[:end + 1]
+        return [aiming for aiming in map(self._parseLine, lines) if aiming is not None]
+
+    def _consumeBinary(self, pending):
+        """
+        Decode the complete binary frames of the pending bytes, removing them from the buffer.
+        Gaps in the sequence counter are accumulated in 'lost_frames'; a repeated or backward
+        sequence number (difference <= 0 as a signed 16 bits value, e.g. the Pico restarted)
+        is a resync and counts no loss.
+
+        Args:
+            pending (bytearray): Received bytes; a trailing partial frame is kept.
+
+        Returns:
+            list: Readings [bearing, pitch, roll, cal_stat, temp] of the valid frames.
+        """
+        frames, consumed = decode_frames(pending)
+        del pending[:consumed]
+        if not len(frames):
+            return []
+        seq = frames['seq'].astype(np.int64)
+        previous = seq[0] - 1 if self.last_seq is None else self.last_seq
+        steps = np.diff(seq, prepend=previous) % 0x10000
+        resync = (steps == 0) | (steps >= 0x8000)
+        if resync.any():
+            self.resyncs += int(np.count_nonzero(resync))
+            self._rate_origin = None
+        steps[resync] = 1
+        self.lost_frames += int(np.sum(steps - 1))
+        self.last_seq = int(seq[-1])
+        self._frame_counts = self._frame_count + np.cumsum(steps)
+        self._frame_count = int(self._frame_counts[-1])
+        values = np.column_stack([frames[field] for field in FRAME_FIELDS]).astype(float)
+        return values.tolist()
+
+    def latest(self):
+        """
+        Get the most recent reading of the background reader, without blocking.
 
-    # WARNING: Private function used in threading. May be blocking.
+        Returns:
+            list: [bearing, pitch, roll, cal_stat, temp], all None if nothing was received yet.
+        """
+        record = self.latestRecord()
+        return list(record[1:]) if record is not None else list(self.EMPTY_READING)
+
+    def latestRecord(self):
+        """
+        Get the most recent timestamped record of the background reader, without blocking.
+
+        Returns:
+            tuple: (time, bearing, pitch, roll, cal_stat, temp) or None if nothing was received yet.
+        """
+        try:
+            return self.aiming_records[-1]
+        except IndexError:
+            return None
+
+    def getRecords(self, since = None):
+        """
+        Get the timestamped records kept in the ring, optionally only the newer ones.
+
+        Args:
+            since (float): Only records with time greater than this [s, time.monotonic()].
+
+        Returns:
+            list: (time, bearing, pitch, roll, cal_stat, temp) records, oldest first.
+        """
+        records = list(self.aiming_records)
+        if since is None:
+            return records
+        return [record for record in records if record[0] > since]
+
+    def _frameTimes(self, now, count):
+        """
+        Timestamps of the frames of the last _consumeBinary(), spread back from the reception
+        time of the last one by their sequence counter and the frame rate (frame_rate, or the
+        one estimated since the last resync). Kept strictly increasing after the previous record.
+
+        Args:
+            now (float): Reception time of the last frame [s, time.monotonic()].
+            count (int): Number of frames.
+
+        Returns:
+            numpy.ndarray: The timestamps, oldest first.
+        """
+        counts = self._frame_counts[-count:]
+        if self._rate_origin is None:
+            self._rate_origin = (now, int(counts[-1]))
+        rate = self.frame_rate
+        if rate is None:
+            elapsed = now - self._rate_origin[0]
+            frames = counts[-1] - self._rate_origin[1]
+            rate = frames/elapsed if elapsed >= 1.0 and frames > 0 else None
+        times = np.full(count, now) if rate is None else now - (counts[-1] - counts)/rate
+        record = self.latestRecord()
+        steps = 1e-6*np.arange(1, count + 1)
+        floor = record[0] if record is not None else -np.inf
+        return np.maximum.accumulate(np.maximum(times - steps, floor)) + steps
+
+    def _reconnect(self):
+        """
+        Reopen the serial port after an error, retrying while the reader is enabled.
+
+        Returns:
+            bool: True if the port was reopened.
+        """
+        while self.continuous_measure:
+            try:
+                self.serial.close()
+                self.serial.open()
+                self.reconnections += 1
+                # The sequence counter starts over, the frames lost meanwhile are unknown
+                self.last_seq = None
+                self._rate_origin = None
+                return True
+            except (SerialException, OSError):
+                sleep(self.timeout)
+        return False
+
+    # WARNING: Private function used in threading.
     def _continuousAiming(self):
         """
         Continuously acquires aiming data while the measurement flag is set to true.
-        This method runs in a loop, calling the `getAiming` method to update the aiming data as long as continuous measurement is enabled. It is intended to be used in a separate thread to allow for real-time data acquisition without blocking other operations.
-
-        Raises:
-            Exception: May raise exceptions from the `getAiming` method if data acquisition fails.
+        This method runs in a loop, reading the bytes available in the serial port and
+        splitting them in lines or binary frames; partial ones are kept until their end
+        arrives. Every complete reading is appended, timestamped, to the ring of records (binary
+        frames read together are spread by their sequence counter, see _frameTimes()). It is
+        intended to be used in a separate thread to allow for real-time data acquisition
+        without blocking other operations. Serial errors (e.g. the Pico was unplugged)
+        close and reopen the port.
         """
 
-        while self.continuous_measure:        
-            self.aiming_data = self.getAiming()
+        consume = self._consumeBinary if self.protocol == "binary" else self._consumeAscii
+        pending = bytearray()
+        while self.continuous_measure:
+            try:
+                chunk = self.serial.read(self.serial.in_waiting or 1)
+            except (SerialException, OSError):
+                pending.clear()
+                if not self._reconnect():
+                    break
+                continue
+            if not chunk:
+                continue
+            pending += chunk
+            start = perf_counter_ns()
+            readings = consume(pending)
+            if readings:
+                if self.instruments is not None:
+                    self.instruments.record('aiming_read', perf_counter_ns() - start, len(readings))
+                now = monotonic()
+                if self.protocol == "binary":
+                    times = self._frameTimes(now, len(readings)).tolist()
+                else:
+                    times = [now]*len(readings)
+                self.aiming_records.extend((time, *aiming) for time, aiming in zip(times, readings))
+                self.aiming_data = readings[-1]
     
     def startAimingThread(self):
         """
@@ -126,6 +466,6 @@ class RAiming:
         """
 
         self.continuous_measure = False
-        self.aiming_thread.join()
+        if self.aiming_thread is not None:
+            self.aiming_thread.join(timeout = 2*self.timeout)
         self.serial.close()
-    
\ No newline at end of file
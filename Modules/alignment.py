@@ -0,0 +1,219 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Timestamp-aligned join of the sensor streams of the
+                acquisition engine. Each record is referred to a reference
+                time (the USRP frame clock) and the samples of the other
+                sensors are taken by nearest neighbour or linear
+                interpolation of their timestamped histories, within a
+                tolerance; the alignment error of every sensor is reported
+                per record.
+'''
+
+from bisect import bisect_right
+from collections import deque
+from angles import angular_difference, wrap_360
+
+
+def interpolate(before:tuple, after:tuple, t:float, numeric_fields:tuple = (), angular_fields:tuple = ()) -> list:
+    '''
+    Linear interpolation at time t between two timestamped samples (time, values).
+
+    The fields in 'numeric_fields' are interpolated linearly, the ones in
+    'angular_fields' along the shortest arc (result in [0, 360)), the rest are
+    taken from the nearest sample.
+
+    Returns:
+        list: The interpolated values.
+    '''
+    (t0, v0), (t1, v1) = before, after
+    w = (t - t0)/(t1 - t0) if t1 != t0 else 0.0
+    values = list(v0 if w < 0.5 else v1)
+    for i in numeric_fields:
+        if v0[i] is not None and v1[i] is not None:
+            values[i] = v0[i] + w*(v1[i] - v0[i])
+    for i in angular_fields:
+        if v0[i] is not None and v1[i] is not None:
+            values[i] = float(wrap_360(v0[i] + w*angular_difference(v1[i], v0[i])))
+    return values
+
+
+class TimestampJoin:
+    '''
+    Aligns the samples of the producers of an AcquisitionEngine to reference times.
+
+    Reference times (e.g. the center of each USRP frame) are queued with
+    push(); pop() aligns the queued times once every producer has a sample
+    after them, or 'max_delay' seconds later using the samples available.
+    For each producer the sample nearest to the reference time is taken
+    ('nearest'), or the two samples around it are interpolated ('linear').
+    Linear interpolation is only done between samples with the same
+    non-numeric fields as the nearest one (e.g. the same PosType), so with
+    interleaved message types (GPS type="all") the samples around the
+    reference time are searched among the ones of the type of the nearest
+    sample, within the tolerance. The alignment error of a producer is the time of its nearest
+    sample minus the reference time; records with an error beyond the
+    tolerance of any producer are discarded and counted. Producers with
+    'aligned' False (e.g. a position label) are taken as they are.
+
+    Args:
+        tolerance (float | dict): Maximum absolute alignment error [s], for all the producers or by name. Default is 0.1.
+        method (str): 'nearest' or 'linear'. Default is 'nearest'.
+        max_delay (float): Maximum time [s] a reference time waits for later samples. Default is 0.5.
+        report (bool): Add the alignment errors [ms] of the aligned producers to the samples of
+                       each record as an 'alignment' entry. Default is True.
+        max_pending (int): Maximum reference times waiting; the oldest are discarded. Default is 10000.
+
+    Attributes:
+        aligned (int): Records aligned.
+        misaligned (int): Records discarded for an alignment error beyond the tolerance.
+        incomplete (int): Records discarded because a producer had no sample.
+
+    Methods
+    -------
+        push(time: float, name: str, values: list) -> None:
+            Queues a reference time, with the values of the reference producer if any.
+        pop(producers: dict, now: float) -> list:
+            Returns the (time, samples) records that can be aligned.
+        due(now: float) -> bool:
+            True if the oldest reference time waiting has reached 'max_delay'.
+        getStats() -> dict:
+            Counts and mean/maximum absolute alignment error of each producer.
+    '''
+
+    def __init__(self, tolerance = 0.1, method:str = 'nearest', max_delay:float = 0.5, report:bool = True,
+                 max_pending:int = 10000) -> None:
+        if method not in ('nearest', 'linear'):
+            raise ValueError("Unrecognized method, only 'nearest', 'linear' are valid.")
+        self.tolerance = tolerance
+        self.method = method
+        self.max_delay = max_delay
+        self.report = report
+        self.pending = deque(maxlen=max_pending)
+
+        self.aligned = 0
+        self.misaligned = 0
+        self.incomplete = 0
+        self._error_sum = {}
+        self._error_max = {}
+
+    def _tolerance(self, name:str) -> float:
+        if isinstance(self.tolerance, dict):
+            return self.tolerance.get(name, float('inf'))
+        return self.tolerance
+
+    def push(self, time:float, name:str = None, values:list = None) -> None:
+        self.pending.append((time, name, values))
+
+    @staticmethod
+    def _kind(values:list, numeric:set) -> tuple:
+        # Non-numeric fields of a sample (e.g. its PosType)
+        return tuple(value for j, value in enumerate(values) if j not in numeric)
+
+    def _bracket(self, samples, i:int, t:float, kind:tuple, numeric:set, tolerance:float):
+        # Samples of the given kind just before (index < i) and after (index >= i) time t
+        before = after = None
+        for j in range(i - 1, -1, -1):
+            if t - samples[j][0] > tolerance:
+                break
+            if self._kind(samples[j][1], numeric) == kind:
+                before = samples[j]
+                break
+        for j in range(i, len(samples)):
+            if samples[j][0] - t > tolerance:
+                break
+            if self._kind(samples[j][1], numeric) == kind:
+                after = samples[j]
+                break
+        return before, after
+
+    def _align(self, name:str, producer, timeline:tuple, t:float):
+        # (values, error) of a producer at time t, None if it has no sample
+        times, samples = timeline
+        i = bisect_right(times, t)
+        before = samples[i - 1] if i > 0 else None
+        after = samples[i] if i < len(samples) else None
+        if before is None and after is None:
+            return None
+        if before is None or after is None:
+            nearest = before or after
+            return nearest[1], nearest[0] - t
+        nearest = before if t - before[0] <= after[0] - t else after
+        values = nearest[1]
+        if self.method == 'linear':
+            numeric = set(producer.numeric_fields) | set(producer.angular_fields)
+            kind = self._kind(values, numeric)
+            if self._kind(before[1], numeric) != kind or self._kind(after[1], numeric) != kind:
+                before, after = self._bracket(samples, i, t, kind, numeric, self._tolerance(name))
+            if before is not None and after is not None:
+                values = interpolate(before, after, t, producer.numeric_fields, producer.angular_fields)
+        return values, nearest[0] - t
+
+    def pop(self, producers:dict, now:float) -> list:
+        records = []
+        if not self.pending:
+            return records
+        # Updated in place by the producers with their new samples, not copied
+        timelines = {name: producer.timeline() for name, producer in producers.items() if producer.aligned}
+
+        while self.pending:
+            t, reference, reference_values = self.pending[0]
+            waiting = now - t < self.max_delay
+            if waiting and any(not times or times[-1] <= t for name, (times, _) in timelines.items()
+                               if name != reference):
+                break           # Wait for the samples after t
+            self.pending.popleft()
+
+            samples, errors = {}, {}
+            for name, producer in producers.items():
+                if name == reference:
+                    samples[name] = reference_values
+                    continue
+                if not producer.aligned:
+                    sample = producer.latest()
+                    aligned = None if sample is None else (sample[1], None)
+                else:
+                    aligned = self._align(name, producer, timelines[name], t)
+                if aligned is None:
+                    break
+                samples[name] = aligned[0]
+                if aligned[1] is not None:
+                    errors[name] = aligned[1]
+            else:
+                if any(abs(error) > self._tolerance(name) for name, error in errors.items()):
+                    self.misaligned += 1
+                    continue
+                for name, error in errors.items():
+                    self._error_sum[name] = self._error_sum.get(name, 0.0) + abs(error)
+                    self._error_max[name] = max(self._error_max.get(name, 0.0), abs(error))
+                if self.report:
+                    samples['alignment'] = [round(error*1e3, 3) for error in errors.values()]
+                self.aligned += 1
+                records.append((t, samples))
+                continue
+            self.incomplete += 1
+        return records
+
+    def due(self, now:float) -> bool:
+        return bool(self.pending) and now - self.pending[0][0] >= self.max_delay
+
+    def getStats(self) -> dict:
+        return {
+            'aligned': self.aligned,
+            'misaligned': self.misaligned,
+            'incomplete': self.incomplete,
+            'pending': len(self.pending),
+            'mean_error_ms': {name: 1e3*total/self.aligned for name, total in self._error_sum.items()},
+            'max_error_ms': {name: 1e3*error for name, error in self._error_max.items()},
+        }
@@ -0,0 +1,168 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Angular statistics and unwrap utilities for bearing streams.
+                All functions are vectorized: they accept scalars, lists, numpy
+                arrays or pandas Series (returning a Series with the same index
+                for element-wise functions), so a whole DataFrame column is
+                processed in a single NumPy pass. Angles are in degrees unless
+                the function name says otherwise.
+'''
+
+import numpy as np
+
+
+def wrap_pi(angles):
+    '''Wraps angles in radians to [-pi, pi).'''
+    return np.mod(np.add(angles, np.pi), 2*np.pi) - np.pi
+
+
+def wrap_360(angles):
+    '''Wraps angles to [0, 360).'''
+    wrapped = np.mod(angles, 360.0)
+    # np.mod rounds tiny negative angles up to exactly 360
+    return wrapped - 360.0*(wrapped >= 360.0)
+
+
+def wrap_180(angles):
+    '''Wraps angles to [-180, 180).'''
+    return wrap_360(np.add(angles, 180.0)) - 180.0
+
+
+def angular_difference(angles, reference):
+    '''
+    Signed difference angles - reference, wrapped to [-180, 180).
+
+    Replaces the 'adjust_MAG' of the analysis scripts: the bearing of every
+    sample relative to the bearing of the maximum received power.
+    '''
+    return wrap_180(np.subtract(angles, reference))
+
+
+def circular_difference(angles, reference):
+    '''Absolute (unsigned) angular distance between angles and reference, in [0, 180].'''
+    return np.abs(angular_difference(angles, reference))
+
+
+def unwrap(angles, axis = -1):
+    '''
+    Removes the 360° jumps of a bearing stream (e.g. 359° -> 1° becomes 359° -> 361°),
+    so it can be differentiated, filtered or interpolated.
+    '''
+    return np.unwrap(np.asarray(angles, dtype=float), period=360.0, axis=axis)
+
+
+def _resultant(angles, weights, axis):
+    radians = np.radians(np.asarray(angles, dtype=float))
+    if weights is None:
+        return np.mean(np.cos(radians), axis=axis), np.mean(np.sin(radians), axis=axis)
+    weights = np.asarray(weights, dtype=float)
+    total = np.sum(weights, axis=axis)
+    return (np.sum(weights*np.cos(radians), axis=axis) / total,
+            np.sum(weights*np.sin(radians), axis=axis) / total)
+
+
+def circular_mean(angles, weights = None, axis = None):
+    '''
+    Circular mean direction, in [0, 360). NaN if the resultant vector is null.
+
+    Args:
+        angles (array_like): Angles in degrees.
+        weights (array_like): Optional weights, same shape as angles.
+        axis (int): Axis along which the mean is computed. Defaults to all the elements.
+    '''
+    C, S = _resultant(angles, weights, axis)
+    mean = wrap_360(np.degrees(np.arctan2(S, C)))
+    return np.where(np.hypot(C, S) > 1e-12, mean, np.nan)[()]
+
+
+def resultant_length(angles, weights = None, axis = None):
+    '''Mean resultant length R in [0, 1]: 1 for identical angles, 0 for uniform.'''
+    C, S = _resultant(angles, weights, axis)
+    return np.hypot(C, S)
+
+
+def circular_variance(angles, weights = None, axis = None):
+    '''Circular variance 1 - R, in [0, 1].'''
+    return 1.0 - resultant_length(angles, weights, axis)
+
+
+def circular_std(angles, weights = None, axis = None):
+    '''Circular standard deviation sqrt(-2 ln R), in degrees.'''
+    R = np.clip(resultant_length(angles, weights, axis), 1e-300, 1.0)
+    return np.degrees(np.sqrt(-2.0*np.log(R)))
+
+
+def _circular_median_1d(angles):
+    # Sample angle with the least sum of arc distances to the others: with the sorted angles
+    # doubled on a second turn, the angles within 180° ahead of each candidate are a window
+    # of the doubled array, and the prefix sums give the distances of both sides at once
+    angles = np.sort(wrap_360(angles))
+    n = angles.size
+    if n == 0 or np.isnan(angles[-1]):
+        return np.nan
+    doubled = np.concatenate((angles, angles + 360.0))
+    prefix = np.concatenate(([0.0], np.cumsum(doubled)))
+    j = np.arange(n)
+    k = np.minimum(np.searchsorted(doubled, angles + 180.0, side='left'), j + n)
+    ahead = prefix[k] - prefix[j] - (k - j)*angles
+    behind = (j + n - k)*(angles + 360.0) - (prefix[j + n] - prefix[k])
+    return angles[np.argmin(ahead + behind)]
+
+
+def circular_median(angles, axis = None):
+    '''
+    Circular median, in [0, 360): the sample angle that minimizes the sum of the
+    arc distances to all the angles. NaN if there are no angles or any is NaN.
+
+    O(n log n): sorting, and prefix sums over the angles on two turns of the circle.
+
+    Args:
+        angles (array_like): Angles in degrees.
+        axis (int): Axis along which the median is computed. Defaults to all the elements.
+    '''
+    angles = np.asarray(angles, dtype=float)
+    if axis is None:
+        return _circular_median_1d(angles.ravel())
+    return np.apply_along_axis(_circular_median_1d, axis, angles)[()]
+
+
+def mean_centered_median(angles, axis = None):
+    '''
+    Approximation of the circular median, in [0, 360): the linear median of
+    the deviations of the angles from their circular mean.
+
+    O(n), but it is not the true circular median (circular_median(), the angle
+    minimizing the mean arc distance to the angles): both agree for symmetric
+    distributions and are close for concentrated ones, such as the bearings of
+    a measurement session; they may differ for skewed or widely spread angles.
+    '''
+    angles = np.asarray(angles, dtype=float)
+    mean = circular_mean(angles, axis=axis)
+    if axis is not None:
+        mean = np.expand_dims(mean, axis)
+    deviation = np.median(wrap_180(angles - mean), axis=axis)
+    return wrap_360(np.squeeze(mean, axis=axis) + deviation if axis is not None else mean + deviation)
+
+
+def angular_bin(angles, width = 1.0, reference = 0.0):
+    '''
+    Center of the angular bin of each angle, relative to a reference, in [-180, 180).
+
+    Bins are 'width' degrees wide and centered on the reference, so bin 0
+    holds the angles within ±width/2 of it; e.g. beam pattern bins around the
+    bearing of maximum power: df.groupby(angular_bin(df['Bearing'], 2, ref)).
+    '''
+    deviation = angular_difference(angles, reference)
+    return wrap_180(np.floor(np.add(deviation, width/2.0) / width) * width)
@@ -0,0 +1,421 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Catalog of the measurement sessions. Scans the Data/ directory
+                incrementally (only new or modified files are read) and keeps
+                a summary of every session file in a local SQLite index:
+                schema, rows, time range, frequency, PosType mix, bounding box
+                and received power range, so sessions can be found by query
+                instead of hardcoding paths in the analysis scripts. The
+                frequency of a MEAS file comes from the METADATA file of its
+                session, or from a 'catalog.json' sidecar ({"frequency": Hz})
+                in a directory above it for the sessions recorded before the
+                METADATA files had the frequency.
+'''
+
+import os
+import re
+import csv
+import json
+import sqlite3
+import argparse
+from datetime import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from compression import open_session
+from journal import is_journal, journal_stat, list_segments
+
+
+CATALOG_VERSION = 3
+SESSION_EXTENSIONS = ('.csv', '.csv.gz', '.csv.zst')
+FILE_DATETIME = re.compile(r'(\d{2}-\d{2}-\d{4}-\d{2}-\d{2}-\d{2})')
+FILE_FREQUENCY = re.compile(r'(\d+(?:\.\d+)?)MHz')
+POSITION_HEADERS = ('R_N/Lon', 'relPosN/lon')
+POS_TYPE_HEADERS = ('PosType', 'pos_type')
+SIDECAR = 'catalog.json'
+SESSION_TOLERANCE = 2          # Maximum difference [s] between the session times of a MEAS and its METADATA file
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,   -- relative to the catalog root, '/' separated; the directory of a journal
+    mtime_ns    INTEGER,
+    size        INTEGER,
+    version     INTEGER,
+    kind        TEXT,               -- MEAS, METADATA, TRX_CAL, GPS, BEAMWIDTH
+    session     TEXT,               -- file date and time, 'YYYY-MM-DD HH:MM:SS'
+    frequency   REAL,               -- [Hz], from the filename, the METADATA file of the session or a sidecar
+    schema      TEXT,               -- header, comma separated
+    rows        INTEGER,
+    time_start  TEXT,
+    time_end    TEXT,
+    pos_types   TEXT,               -- JSON {PosType: rows}
+    lon_min REAL, lon_max REAL, lat_min REAL, lat_max REAL,
+    power_min REAL, power_max REAL, power_mean REAL
+);
+CREATE INDEX IF NOT EXISTS files_session ON files (session);
+CREATE INDEX IF NOT EXISTS files_kind ON files (kind, frequency);
+'''
+COLUMNS = ('path', 'mtime_ns', 'size', 'version', 'kind', 'session', 'frequency', 'schema', 'rows',
+           'time_start', 'time_end', 'pos_types', 'lon_min', 'lon_max', 'lat_min', 'lat_max',
+           'power_min', 'power_max', 'power_mean')
+
+
+def _file_kind(filename:str) -> str:
+    if '_METADATA_' in filename:
+        return 'METADATA'
+    if FILE_FREQUENCY.search(filename):
+        return 'TRX_CAL'
+    if filename.startswith('GPS_'):
+        return 'GPS'
+    if '_BW_' in filename:
+        return 'BEAMWIDTH'
+    return 'MEAS'
+
+
+def list_sessions(root:str, exclude:str = None, visit = None) -> dict:
+    '''
+    Lists the session files under a directory, with their modification stamp.
+
+    A journal directory (FileJournal) is listed as one session, not as its
+    segments, and the '<journal>.csv' joined from it is left out, so every
+    session appears once.
+
+    Args:
+        root (str): Data directory.
+        exclude (str): Directory not to walk, e.g. the output of the converter. Default is None.
+        visit (callable): visit(directory, filenames), called for every directory walked. Default is None.
+
+    Returns:
+        dict: Path relative to the root ('/' separated) -> (mtime_ns, size).
+    '''
+    files, journals = {}, set()
+    for directory, dirnames, filenames in os.walk(root):
+        if exclude is not None and os.path.abspath(directory).startswith(exclude):
+            dirnames[:] = []
+            continue
+        relative = os.path.relpath(directory, root).replace(os.sep, '/')
+        if is_journal(directory):
+            dirnames[:] = []
+            files[relative] = journal_stat(directory)
+            journals.add(relative)
+            continue
+        if visit is not None:
+            visit(directory, filenames)
+        for filename in filenames:
+            if filename.endswith(SESSION_EXTENSIONS):
+                stat = os.stat(os.path.join(directory, filename))
+                files[filename if relative == '.' else f"{relative}/{filename}"] = (stat.st_mtime_ns, stat.st_size)
+    joined = [path for path in files if any(path.endswith(extension) and path[:-len(extension)] in journals
+                                            for extension in SESSION_EXTENSIONS)]
+    for path in joined:
+        del files[path]
+    return files
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _session_rows(path:str):
+    # Header and rows of a session file, or of the segments of a journal directory in write order
+    header = None
+    for part in (list_segments(path) if os.path.isdir(path) else [path]):
+        with open_session(part) as file:
+            reader = csv.reader(file)
+            part_header = next(reader, None)
+            if header is None and part_header is not None:
+                header = part_header
+                yield header
+            yield from reader
+
+
+def summarize_file(path:str) -> dict:
+    '''
+    Reads a session file (plain or compressed CSV), or a journal directory, and summarizes it.
+
+    Args:
+        path (str): Path of the file or of the journal directory (its segments are read in order).
+
+    Returns:
+        dict: Catalog columns of the file, except 'path', 'mtime_ns', 'size' and 'version'.
+    '''
+    filename = os.path.basename(path.rstrip('/\\'))
+    date_time = FILE_DATETIME.findall(filename)
+    frequency = FILE_FREQUENCY.search(filename)
+    summary = {
+        'kind': _file_kind(filename),
+        'session': dt.strptime(date_time[-1], '%d-%m-%Y-%H-%M-%S').strftime('%Y-%m-%d %H:%M:%S') if date_time else None,
+        'frequency': float(frequency.group(1)) * 1e6 if frequency else None,
+        'schema': None, 'rows': 0, 'time_start': None, 'time_end': None, 'pos_types': None,
+        'lon_min': None, 'lon_max': None, 'lat_min': None, 'lat_max': None,
+        'power_min': None, 'power_max': None, 'power_mean': None,
+    }
+    reader = _session_rows(path)
+    header = next(reader, None)
+    if header is None:
+        return summary
+    summary['schema'] = ','.join(header)
+    time_column = header.index('Timestamp') if 'Timestamp' in header else None
+    frequency_column = header.index('frequency') if 'frequency' in header else None
+    power_column = header.index('PowerRx') if 'PowerRx' in header else None
+    pos_column = next((header.index(h) for h in POS_TYPE_HEADERS if h in header), None)
+    has_position = header[0] in POSITION_HEADERS
+
+    rows, pos_types = 0, {}
+    lon, lat, power = [None, None], [None, None], [None, None]
+    power_sum, power_count = 0.0, 0
+    for row in reader:
+        if not row:
+            continue
+        rows += 1
+        if frequency_column is not None and summary['frequency'] is None and len(row) > frequency_column:
+            summary['frequency'] = _float(row[frequency_column])
+        if time_column is not None and len(row) > time_column and row[time_column]:
+            summary['time_start'] = summary['time_start'] or row[time_column]
+            summary['time_end'] = row[time_column]
+        pos_type = row[pos_column] if pos_column is not None and len(row) > pos_column else None
+        if pos_type is not None:
+            pos_types[pos_type] = pos_types.get(pos_type, 0) + 1
+        if has_position and pos_type == 'absPos' and len(row) > 1:
+            x, y = _float(row[0]), _float(row[1])
+            if x is not None and y is not None and (x, y) != (0.0, 0.0):
+                lon = [x if lon[0] is None else min(lon[0], x), x if lon[1] is None else max(lon[1], x)]
+                lat = [y if lat[0] is None else min(lat[0], y), y if lat[1] is None else max(lat[1], y)]
+        if power_column is not None and len(row) > power_column:
+            p = _float(row[power_column])
+            if p is not None and p == p:
+                power = [p if power[0] is None else min(power[0], p), p if power[1] is None else max(power[1], p)]
+                power_sum += p
+                power_count += 1
+
+    summary['rows'] = rows
+    summary['pos_types'] = json.dumps(pos_types) if pos_types else None
+    summary['lon_min'], summary['lon_max'] = lon
+    summary['lat_min'], summary['lat_max'] = lat
+    summary['power_min'], summary['power_max'] = power
+    summary['power_mean'] = power_sum / power_count if power_count else None
+    return summary
+
+
+class Catalog:
+    '''
+    SQLite index of the session files under a data directory.
+
+    A journaled session (FileJournal) is one entry, the path of its directory,
+    whose manifest.json lists its segments (journal.select_segments); the CSV
+    joined from it is not indexed a second time.
+
+    The MEAS files take the frequency of the METADATA file of their session
+    (same campaign directory, session times within SESSION_TOLERANCE seconds)
+    or, if it has none, of the nearest 'catalog.json' sidecar above them,
+    e.g. Data/5G_loss/5G_loss_MEAS_2024/catalog.json: {"frequency": 500e6}.
+
+    Args:
+        root (str): Data directory. Default is 'Data'.
+        db_path (str): Path of the SQLite index. Defaults to '<root>/catalog.sqlite'.
+
+    Methods
+    -------
+        scan(workers: int) -> dict:
+            Indexes the new and modified files and forgets the removed ones.
+        query(kind, frequency, start, end, bbox, pos_type, schema) -> list:
+            Returns the files matching all the given conditions.
+        close() -> None:
+            Closes the index.
+    '''
+
+    def __init__(self, root:str = 'Data', db_path:str = None) -> None:
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(self.root, 'catalog.sqlite')
+        self.db = sqlite3.connect(self.db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self._sidecars = {}
+
+    def _readSidecar(self, directory:str, filenames:list) -> None:
+        if SIDECAR in filenames:
+            with open(os.path.join(directory, SIDECAR)) as file:
+                directory_path = os.path.relpath(directory, self.root).replace(os.sep, '/')
+                self._sidecars['' if directory_path == '.' else directory_path] = json.load(file)
+
+    def _listFiles(self) -> dict:
+        # A journal is one entry (its directory), its segments and joined CSV are not indexed
+        self._sidecars = {}
+        return list_sessions(self.root, visit=self._readSidecar)
+
+    def scan(self, workers:int = None) -> dict:
+        '''
+        Scans the data directory and updates the index.
+
+        Files whose mtime and size have not changed since the last scan are
+        skipped; the new and modified files are read in parallel.
+
+        Args:
+            workers (int): Number of worker processes. Defaults to os.cpu_count().
+
+        Returns:
+            dict: Number of 'added', 'updated', 'unchanged' and 'removed' files.
+        '''
+        files = self._listFiles()
+        known = {row['path']: (row['mtime_ns'], row['size'], row['version'])
+                 for row in self.db.execute('SELECT path, mtime_ns, size, version FROM files')}
+        changed = [path for path, stat in files.items()
+                   if known.get(path) != (*stat, CATALOG_VERSION)]
+        removed = [path for path in known if path not in files]
+
+        paths = [os.path.join(self.root, path) for path in changed]
+        if len(paths) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                summaries = list(pool.map(summarize_file, paths, chunksize=4))
+        else:
+            summaries = [summarize_file(path) for path in paths]
+
+        with self.db:
+            self.db.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed])
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO files ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [(path, *files[path], CATALOG_VERSION, *(summary[column] for column in COLUMNS[4:]))
+                 for path, summary in zip(changed, summaries)])
+            self._joinSessions()
+        return {
+            'added': sum(1 for path in changed if path not in known),
+            'updated': sum(1 for path in changed if path in known),
+            'unchanged': len(files) - len(changed),
+            'removed': len(removed),
+        }
+
+    def _sidecarFrequency(self, path:str):
+        # Frequency of the nearest sidecar in the directories of a file, None if there is none
+        directory = path
+        while directory:
+            directory = directory.rpartition('/')[0]
+            sidecar = self._sidecars.get(directory)
+            if sidecar is not None and sidecar.get('frequency') is not None:
+                return float(sidecar['frequency'])
+        return None
+
+    def _joinSessions(self) -> None:
+        # Frequency of the other files without one from a sidecar, then of every MEAS file from the
+        # METADATA file of its session, or from a sidecar
+        updates = [(self._sidecarFrequency(row['path']), row['path']) for row in
+                   self.db.execute("SELECT path FROM files WHERE kind != 'MEAS' AND frequency IS NULL")]
+        self.db.executemany('UPDATE files SET frequency = ? WHERE path = ?',
+                            [update for update in updates if update[0] is not None])
+        metadata = {}
+        for row in self.db.execute("SELECT path, session, frequency FROM files "
+                                   "WHERE kind = 'METADATA' AND frequency IS NOT NULL AND session IS NOT NULL"):
+            campaign = row['path'].split('/')[0]
+            metadata.setdefault(campaign, []).append((dt.fromisoformat(row['session']), row['frequency']))
+        updates = []
+        for row in self.db.execute("SELECT path, session, frequency FROM files WHERE kind = 'MEAS'"):
+            frequency = None
+            if row['session'] is not None:
+                session = dt.fromisoformat(row['session'])
+                candidates = [(abs((session - time).total_seconds()), value)
+                              for time, value in metadata.get(row['path'].split('/')[0], [])]
+                candidates = [candidate for candidate in candidates if candidate[0] <= SESSION_TOLERANCE]
+                if candidates:
+                    frequency = min(candidates)[1]
+            if frequency is None:
+                frequency = self._sidecarFrequency(row['path'])
+            if frequency != row['frequency']:
+                updates.append((frequency, row['path']))
+        self.db.executemany('UPDATE files SET frequency = ? WHERE path = ?', updates)
+
+    def query(self, kind:str = None, frequency:float = None, start = None, end = None,
+              bbox:tuple = None, pos_type:str = None, schema:str = None) -> list:
+        '''
+        Returns the indexed files matching all the given conditions.
+
+        Args:
+            kind (str): 'MEAS', 'METADATA', 'TRX_CAL', 'GPS' or 'BEAMWIDTH'.
+            frequency (float): Frequency [Hz], matched within 1 kHz.
+            start (datetime or str): Files with data (or created) at or after this time.
+            end (datetime or str): Files with data (or created) at or before this time.
+            bbox (tuple): (lon_min, lat_min, lon_max, lat_max); files whose absPos fixes overlap it.
+            pos_type (str): Files with at least one row of this PosType, e.g. 'relPos'.
+            schema (str): Files whose header contains this column, e.g. 'Bearing'.
+
+        Returns:
+            list: One dict per file, with the catalog columns and 'abspath'.
+        '''
+        conditions, parameters = [], []
+        if kind is not None:
+            conditions.append('kind = ?')
+            parameters.append(kind)
+        if frequency is not None:
+            conditions.append('ABS(frequency - ?) < 1e3')
+            parameters.append(frequency)
+        if start is not None:
+            conditions.append('COALESCE(time_end, session) >= ?')
+            parameters.append(str(start))
+        if end is not None:
+            conditions.append('COALESCE(time_start, session) <= ?')
+            parameters.append(str(end))
+        if bbox is not None:
+            conditions.append('lon_max >= ? AND lat_max >= ? AND lon_min <= ? AND lat_min <= ?')
+            parameters.extend(bbox)
+        if pos_type is not None:
+            conditions.append('pos_types LIKE ?')
+            parameters.append(f'%"{pos_type}":%')
+        if schema is not None:
+            conditions.append("(',' || schema || ',') LIKE ?")
+            parameters.append(f'%,{schema},%')
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        rows = self.db.execute(f'SELECT * FROM files{where} ORDER BY session, path', parameters)
+        return [{**dict(row), 'abspath': os.path.join(self.root, *row['path'].split('/'))} for row in rows]
+
+    def close(self) -> None:
+        '''
+        Closes the index.
+
+        Returns:
+            None
+        '''
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index and query the measurement sessions.")
+    parser.add_argument("--root", default="Data")
+    parser.add_argument("--db", default=None)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    scan_parser = subparsers.add_parser("scan", help="Index the new and modified session files.")
+    scan_parser.add_argument("--workers", type=int, default=None)
+    query_parser = subparsers.add_parser("query", help="List the session files matching the conditions.")
+    query_parser.add_argument("--kind", default=None)
+    query_parser.add_argument("--frequency", type=float, default=None)
+    query_parser.add_argument("--start", default=None)
+    query_parser.add_argument("--end", default=None)
+    query_parser.add_argument("--bbox", type=float, nargs=4, default=None,
+                              metavar=("LON_MIN", "LAT_MIN", "LON_MAX", "LAT_MAX"))
+    query_parser.add_argument("--pos-type", default=None)
+    query_parser.add_argument("--schema", default=None)
+    args = parser.parse_args()
+
+    with Catalog(args.root, args.db) as catalog:
+        if args.command == "scan":
+            print(catalog.scan(workers=args.workers))
+        else:
+            for entry in catalog.query(args.kind, args.frequency, args.start, args.end,
+                                       args.bbox, args.pos_type, args.schema):
+                print(f"{entry['path']}\t{entry['rows']} rows\t{entry['time_start']} - {entry['time_end']}")
@@ -0,0 +1,284 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Columnar (Parquet) output for the measurement sessions. Same
+                interface as FileCSV, but the rows are stored as typed row
+                groups: int64 epoch-ns timestamps (UTC), float32/float64
+                measurements and categorical position type. Requires pyarrow.
+'''
+
+from datetime import datetime as dt
+import numpy as np
+from filewriter import session_filename
+
+
+# Storage type of the known session columns; any other column is inferred from its first values
+COLUMN_TYPES = {
+    'Timestamp': 'timestamp',
+    'R_N/Lon': 'float64',
+    'R_E/Lat': 'float64',
+    'R_D/Hgt': 'float64',
+    'accN/hMSL': 'float32',
+    'accE/hAcc': 'float32',
+    'accD/vAcc': 'float32',
+    'PosType': 'category',
+    'PowerRx': 'float32',
+    'Bearing': 'float32',
+    'Roll_XZ': 'float32',
+    'Pitch_YZ': 'float32',
+    'cal_stat_aim': 'int16',
+    'Temp': 'float32',
+    'GPS_dt': 'float32',
+    'Aiming_dt': 'float32',
+    'PowerRx_mean': 'float32',
+    'PowerRx_min': 'float32',
+    'PowerRx_max': 'float32',
+    'Samples': 'int32',
+    'Pose_N': 'float64',
+    'Pose_E': 'float64',
+    'Pose_vN': 'float32',
+    'Pose_vE': 'float32',
+    'Pose_Heading': 'float32',
+    'Pose_sN': 'float32',
+    'Pose_sE': 'float32',
+    'Pose_cNE': 'float32',
+    'Pose_sHeading': 'float32',
+    'XZ': 'float32',
+    'YZ': 'float32',
+    'MAG': 'float32',
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the columnar session files: pip install pyarrow") from e
+    return pyarrow
+
+
+def _infer_type(values) -> str:
+    pa = _pyarrow()
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return 'string'
+    if pa.types.is_integer(array.type):
+        return 'int64'
+    if pa.types.is_floating(array.type) or pa.types.is_null(array.type):
+        return 'float64'
+    if pa.types.is_boolean(array.type):
+        return 'bool'
+    if pa.types.is_timestamp(array.type):
+        return 'timestamp'
+    return 'string'
+
+
+def _datetime_ns(value:dt) -> int:
+    # Epoch ns of a datetime, naive ones in local time (as written by format_row), exact to the microsecond
+    return int(value.replace(microsecond=0).timestamp())*1_000_000_000 + value.microsecond*1_000
+
+
+def _to_epoch_ns(values) -> list:
+    '''
+    Epoch times [ns, UTC] of the values of a 'timestamp' column, None for the missing ones.
+
+    The values may be epoch seconds (e.g. time.time()), datetime or ISO strings
+    ('%Y-%m-%d %H:%M:%S.%f', as written by format_row); naive datetime and
+    strings are local times, as in the CSV session files, so the same session
+    gets the same epoch times whatever its formatter. The types may be mixed.
+    The times are kept to the microsecond.
+    '''
+    epoch = []
+    for value in values:
+        if value is None or (isinstance(value, float) and value != value):
+            epoch.append(None)
+        elif isinstance(value, (int, float, np.integer, np.floating)):
+            epoch.append(round(float(value)*1e6)*1_000)     # time() floats resolve ~0.2 us
+        elif isinstance(value, dt):
+            epoch.append(_datetime_ns(value))
+        elif isinstance(value, np.datetime64):
+            epoch.append(None if np.isnat(value) else int(value.astype('datetime64[ns]').astype('int64')))
+        else:
+            epoch.append(_datetime_ns(dt.fromisoformat(str(value))))
+    return epoch
+
+
+def _column(values, kind):
+    pa = _pyarrow()
+    match kind:
+        case 'timestamp':
+            return pa.array(_to_epoch_ns(values), type=pa.timestamp('ns', tz='UTC'))
+        case 'category':
+            strings = [None if v is None else str(v) for v in values]
+            return pa.array(strings, type=pa.string()).dictionary_encode()
+        case 'string':
+            return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+        case _:
+            return pa.array(values, type=getattr(pa, kind)(), from_pandas=True)
+
+
+class FileParquet():
+    '''
+    Columnar counterpart of FileCSV: same naming convention and save methods,
+    so it can replace it (or be wrapped by AsyncFileWriter) in the measurement scripts.
+
+    The rows are buffered in memory and written as a typed Parquet row group
+    every 'row_group_size' rows, and on flush() and close(). The column types
+    are taken from COLUMN_TYPES, or inferred from the first row group for the
+    columns not listed there. The 'Timestamp' column is stored as UTC epoch
+    ns (timestamp[ns, tz=UTC]): epoch seconds as they are, datetime and strings
+    without timezone as local times (_to_epoch_ns). The Parquet footer is
+    written by close(): a file that is not closed cannot be read.
+
+    Args:
+        name (str): The base name for the Parquet file.
+        frequency: The frequency value used in the filename for certain types.
+        header: The column names.
+        type (str): The type of file being created, which determines the filename format.
+        row_group_size (int): Rows per row group. Default is 10000.
+        compression (str): Parquet compression codec. Default is 'zstd'.
+        column_types (dict): Storage type overrides, e.g. {'PowerRx': 'float64'}.
+
+    Raises:
+        ValueError: If an invalid file type is provided.
+        ImportError: If pyarrow is not installed.
+
+    Methods
+    -------
+        saveData(data: list) -> None:
+            Saves one row to the Parquet file.
+        saveRows(rows: list) -> None:
+            Saves several rows to the Parquet file at once.
+        flush() -> None:
+            Writes the buffered rows as a row group.
+        close() -> None:
+            Writes the buffered rows and the file footer.
+    '''
+    def __init__(self, name:str, frequency, header, type:str, row_group_size:int = 10000,
+                 compression:str = 'zstd', column_types:dict = None) -> None:
+        _pyarrow()
+        self.DATETIME = dt.now().strftime('%d-%m-%Y-%H-%M-%S')
+        if type == "TRX_CAL":
+            self.frequency = frequency
+        self.filename = session_filename(name, frequency, type, self.DATETIME, extension=".parquet")
+        self.header = list(header)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.column_types = {**COLUMN_TYPES, **(column_types or {})}
+
+        self.rows = []
+        self.rows_written = 0
+        self.schema = None
+        self.kinds = None
+        self.writer = None
+        self.closed = False
+
+    def _writeRowGroup(self) -> None:
+        pa = _pyarrow()
+        columns = list(zip(*self.rows))
+        if self.kinds is None:
+            self.kinds = [self.column_types.get(column) or _infer_type(list(values))
+                          for column, values in zip(self.header, columns)]
+        arrays = [_column(list(values), kind) for values, kind in zip(columns, self.kinds)]
+        table = pa.Table.from_arrays(arrays, names=self.header)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pa.parquet.ParquetWriter(self.filename, self.schema, compression=self.compression)
+        self.writer.write_table(table.cast(self.schema))
+        self.rows_written += len(self.rows)
+        self.rows = []
+
+    def saveData(self, data) -> None:
+        '''
+        Saves data to the Parquet file, creating the file with the first row group.
+
+        Args:
+            data (list): The data to be saved as a new row, in the order of the header.
+
+        Returns:
+            None
+        '''
+        if self.closed:
+            raise ValueError(f"Parquet file already closed: {self.filename}")
+        if len(data) != len(self.header):
+            raise ValueError(f"Row with {len(data)} values, the header has {len(self.header)} columns.")
+        self.rows.append(data)
+        if len(self.rows) >= self.row_group_size:
+            self._writeRowGroup()
+
+    def saveRows(self, rows) -> None:
+        '''
+        Saves several rows to the Parquet file at once.
+
+        Args:
+            rows (list): List of rows, each one a list as in saveData().
+
+        Returns:
+            None
+        '''
+        for row in rows:
+            self.saveData(row)
+
+    def flush(self) -> None:
+        '''
+        Writes the buffered rows as a (possibly short) row group.
+
+        Returns:
+            None
+        '''
+        if self.rows:
+            self._writeRowGroup()
+
+    def close(self) -> None:
+        '''
+        Writes the buffered rows and the file footer, and closes the file.
+
+        Returns:
+            None
+        '''
+        if self.closed:
+            return
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_session(filename:str, columns:list = None, filters = None):
+    '''
+    Loads a Parquet session file into a pandas DataFrame, memory mapping the file.
+
+    Only the requested columns are read and decoded, e.g.
+    read_session(path, columns=['Timestamp', 'PowerRx', 'Bearing']).
+
+    Args:
+        filename (str): Path of the Parquet file.
+        columns (list): Columns to load. Defaults to all.
+        filters: Row group filters, as in pyarrow.parquet.read_table,
+                 e.g. [('PosType', '==', 'relPos')].
+
+    Returns:
+        pandas.DataFrame: The session, with 'Timestamp' as datetime64[ns] and 'PosType' as category.
+    '''
+    pa = _pyarrow()
+    table = pa.parquet.read_table(filename, columns=columns, filters=filters, memory_map=True)
+    return table.to_pandas()
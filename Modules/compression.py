@@ -0,0 +1,219 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Streaming gzip/zstd compression of the session files. The data
+                is compressed in independent frames (gzip members or zstd
+                frames) cut at row boundaries, listed in a sidecar '.frames'
+                index, so the file can be decompressed in parallel. Standard
+                tools and pandas read the files as a single stream. zstd
+                requires the 'zstandard' package.
+'''
+
+import io
+import os
+import gzip
+import zlib
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+FRAMES_MAGIC = b'CSVFRM1\x00'
+FRAMES_HEADER = struct.Struct('<8s')
+FRAMES_ENTRY = struct.Struct('<QQQ')     # compressed offset, compressed size, uncompressed size
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstandard is required for zstd compression: pip install zstandard") from e
+    return zstandard
+
+
+def _check(compression:str) -> None:
+    if compression not in EXTENSIONS:
+        raise ValueError("Unrecognized compression, only 'gzip', 'zstd' are valid.")
+
+
+def compression_of(filename:str):
+    '''
+    Returns the compression of a file from its extension: 'gzip', 'zstd' or None.
+    '''
+    for compression, extension in EXTENSIONS.items():
+        if filename.endswith(extension):
+            return compression
+    return None
+
+
+class CompressedWriter(io.RawIOBase):
+    '''
+    Binary stream that compresses the written data in independent frames.
+
+    The data is buffered uncompressed; a frame is cut when the buffer reaches
+    'frame_size' bytes (only between write() calls, so a writer that writes
+    whole rows gets frames aligned to rows) and on every flush(). Each frame
+    is a complete gzip member or zstd frame, so the concatenation is a valid
+    .gz/.zst file, and it is listed in '<filename>.frames'. Opening an
+    existing file appends new frames to it.
+
+    Args:
+        filename (str): Path of the compressed file.
+        compression (str): 'gzip' or 'zstd'. Default is 'zstd'.
+        level (int): Compression level. Defaults to 6 for gzip and 3 for zstd.
+        frame_size (int): Uncompressed bytes per frame. Default is 1 MiB.
+
+    Methods
+    -------
+        write(data: bytes) -> int:
+            Buffers data, compressing a frame if the buffer is full.
+        flush() -> None:
+            Compresses the buffered data as a frame and writes it to disk.
+        close() -> None:
+            Flushes and closes the file and its index.
+    '''
+
+    def __init__(self, filename:str, compression:str = 'zstd', level:int = None, frame_size:int = 1 << 20) -> None:
+        super().__init__()
+        _check(compression)
+        self.filename = filename
+        self.compression = compression
+        self.level = DEFAULT_LEVELS[compression] if level is None else level
+        self.frame_size = frame_size
+        if compression == 'zstd':
+            self._compressor = _zstandard().ZstdCompressor(level=self.level)
+
+        self._buffer = bytearray()
+        self._file = open(filename, 'ab')
+        self._offset = self._file.seek(0, os.SEEK_END)
+        index_exists = os.path.isfile(filename + '.frames')
+        self._index = open(filename + '.frames', 'ab')
+        if not index_exists or self._index.tell() == 0:
+            self._index.write(FRAMES_HEADER.pack(FRAMES_MAGIC))
+
+    def writable(self) -> bool:
+        return True
+
+    def _compress(self, data) -> bytes:
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.level)
+        return self._compressor.compress(data)
+
+    def _writeFrame(self) -> None:
+        if not self._buffer:
+            return
+        frame = self._compress(bytes(self._buffer))
+        self._file.write(frame)
+        self._index.write(FRAMES_ENTRY.pack(self._offset, len(frame), len(self._buffer)))
+        self._offset += len(frame)
+        self._buffer.clear()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self.frame_size:
+            self._writeFrame()
+        return len(data)
+
+    def flush(self) -> None:
+        if self.closed:
+            return
+        self._writeFrame()
+        self._file.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()         # Flushes the last frame
+        self._file.close()
+        self._index.close()
+
+
+def read_frames(filename:str) -> list:
+    '''
+    Reads the frame index of a compressed file.
+
+    Args:
+        filename (str): Path of the compressed file (not the '.frames' file).
+
+    Returns:
+        list: (compressed offset, compressed size, uncompressed size) of each frame.
+              Empty if the file has no index.
+    '''
+    if not os.path.isfile(filename + '.frames'):
+        return []
+    with open(filename + '.frames', 'rb') as file:
+        buffer = file.read()
+    if buffer[:FRAMES_HEADER.size] != FRAMES_MAGIC:
+        raise ValueError(f"Invalid frame index: {filename}.frames")
+    # Ignore a trailing partial entry and the frames not completely written
+    end = FRAMES_HEADER.size + (len(buffer) - FRAMES_HEADER.size) // FRAMES_ENTRY.size * FRAMES_ENTRY.size
+    size = os.path.getsize(filename)
+    return [entry for entry in FRAMES_ENTRY.iter_unpack(buffer[FRAMES_HEADER.size:end])
+            if entry[0] + entry[1] <= size]
+
+
+def open_session(filename:str, mode:str = 'rt'):
+    '''
+    Opens a session file for reading, decompressing it transparently by its extension.
+
+    Args:
+        filename (str): Path of the file: plain, '.gz' or '.zst'.
+        mode (str): 'rt' for text or 'rb' for binary. Default is 'rt'.
+
+    Returns:
+        file object: Readable stream with the uncompressed data.
+    '''
+    compression = compression_of(filename)
+    if compression == 'gzip':
+        return gzip.open(filename, mode, **({'newline': ''} if 't' in mode else {}))
+    if compression == 'zstd':
+        stream = _zstandard().ZstdDecompressor().stream_reader(open(filename, 'rb'), read_across_frames=True,
+                                                              closefd=True)
+        return io.TextIOWrapper(stream, newline='') if 't' in mode else stream
+    return open(filename, mode, **({'newline': ''} if 't' in mode else {}))
+
+
+def _decompress_frame(filename:str, compression:str, offset:int, size:int) -> bytes:
+    with open(filename, 'rb') as file:
+        file.seek(offset)
+        frame = file.read(size)
+    if compression == 'gzip':
+        return zlib.decompress(frame, wbits=31)
+    return _zstandard().ZstdDecompressor().decompress(frame)
+
+
+def decompress_parallel(filename:str, workers:int = None) -> bytes:
+    '''
+    Decompresses a compressed session file, decoding its frames in parallel.
+
+    zlib and zstd release the GIL, so the frames are decoded by a thread pool.
+    Files without a frame index are decompressed sequentially.
+
+    Args:
+        filename (str): Path of the '.gz' or '.zst' file.
+        workers (int): Number of threads. Defaults to os.cpu_count().
+
+    Returns:
+        bytes: The uncompressed data.
+    '''
+    compression = compression_of(filename)
+    frames = read_frames(filename) if compression else []
+    if not frames:
+        with open_session(filename, 'rb') as file:
+            return file.read()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        chunks = pool.map(lambda frame: _decompress_frame(filename, compression, frame[0], frame[1]), frames)
+        return b''.join(chunks)
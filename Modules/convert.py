@@ -0,0 +1,343 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Converter of the CSV measurement corpus in Data/ into a single
+                Parquet dataset, partitioned by campaign and date, with one
+                normalized schema for all the header variants (old 'MAG'
+                sessions, new 'Bearing/Roll_XZ/Pitch_YZ' sessions, BeamWidth
+                and GPS files): typed columns, epoch time and the relative and
+                absolute positions in separate columns, in SI units.
+                Re-running it only converts the new or modified files.
+'''
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from catalog import FILE_DATETIME, list_sessions
+from compression import open_session
+from journal import list_segments
+
+
+NORMALIZATION_VERSION = 4
+STATE_FILE = '_convert_state.json'
+POS_TYPES = ['relPos', 'absPos']
+EARTH_RADIUS = 6371000.0        # Mean Earth radius [m], as in the analysis scripts
+
+# Header variants: source column -> normalized column, and scale of the relative position to [m]
+# (the 2024 sessions stored relPos in m, the current GPS module in cm)
+VARIANTS = {
+    ('Timestamp', 'R_N/Lon', 'R_E/Lat', 'R_D/Hgt', 'accN/hMSL', 'accE/hAcc', 'accD/vAcc', 'PosType',
+     'PowerRx', 'Bearing', 'Roll_XZ', 'Pitch_YZ', 'cal_stat_aim', 'Temp'):
+        ({'Timestamp': 'time', 'R_N/Lon': 'pos0', 'R_E/Lat': 'pos1', 'R_D/Hgt': 'pos2',
+          'accN/hMSL': 'acc0', 'accE/hAcc': 'acc1', 'accD/vAcc': 'acc2', 'PosType': 'pos_type',
+          'PowerRx': 'power_rx', 'Bearing': 'bearing', 'Roll_XZ': 'roll', 'Pitch_YZ': 'pitch',
+          'cal_stat_aim': 'cal_stat', 'Temp': 'temp'}, 1e-2),
+    ('Timestamp', 'R_N/Lon', 'R_E/Lat', 'R_D/Hgt', 'accN/hMSL', 'accE/hAcc', 'accD/vAcc', 'PosType',
+     'PowerRx', 'Bearing', 'Roll_XZ', 'Pitch_YZ', 'cal_stat_aim', 'Temp', 'GPS_dt', 'Aiming_dt'):
+        ({'Timestamp': 'time', 'R_N/Lon': 'pos0', 'R_E/Lat': 'pos1', 'R_D/Hgt': 'pos2',
+          'accN/hMSL': 'acc0', 'accE/hAcc': 'acc1', 'accD/vAcc': 'acc2', 'PosType': 'pos_type',
+          'PowerRx': 'power_rx', 'Bearing': 'bearing', 'Roll_XZ': 'roll', 'Pitch_YZ': 'pitch',
+          'cal_stat_aim': 'cal_stat', 'Temp': 'temp', 'GPS_dt': 'gps_dt', 'Aiming_dt': 'aiming_dt'}, 1e-2),
+    ('Timestamp', 'R_N/Lon', 'R_E/Lat', 'R_D/Hgt', 'accN/hMSL', 'accE/hAcc', 'accD/vAcc', 'PosType',
+     'PowerRx', 'Bearing', 'Roll_XZ', 'Pitch_YZ', 'cal_stat_aim', 'Temp', 'GPS_dt', 'Aiming_dt',
+     'PowerRx_mean', 'PowerRx_min', 'PowerRx_max', 'Samples'):
+        ({'Timestamp': 'time', 'R_N/Lon': 'pos0', 'R_E/Lat': 'pos1', 'R_D/Hgt': 'pos2',
+          'accN/hMSL': 'acc0', 'accE/hAcc': 'acc1', 'accD/vAcc': 'acc2', 'PosType': 'pos_type',
+          'PowerRx': 'power_rx', 'Bearing': 'bearing', 'Roll_XZ': 'roll', 'Pitch_YZ': 'pitch',
+          'cal_stat_aim': 'cal_stat', 'Temp': 'temp', 'GPS_dt': 'gps_dt', 'Aiming_dt': 'aiming_dt',
+          'PowerRx_mean': 'power_mean', 'PowerRx_min': 'power_min', 'PowerRx_max': 'power_max',
+          'Samples': 'samples'}, 1e-2),
+    ('R_N/Lon', 'R_E/Lat', 'R_D/Hgt', 'PosType', 'PowerRx', 'XZ', 'YZ', 'MAG'):
+        ({'R_N/Lon': 'pos0', 'R_E/Lat': 'pos1', 'R_D/Hgt': 'pos2', 'PosType': 'pos_type',
+          'PowerRx': 'power_rx', 'XZ': 'roll', 'YZ': 'pitch', 'MAG': 'bearing'}, 1.0),
+    ('Dist_N', 'Dist_E', 'Dist_D', 'PowerRx', 'XZ', 'YZ', 'MAG'):
+        ({'Dist_N': 'pos0', 'Dist_E': 'pos1', 'Dist_D': 'pos2',
+          'PowerRx': 'power_rx', 'XZ': 'roll', 'YZ': 'pitch', 'MAG': 'bearing'}, 1.0),
+    ('XZ', 'YZ', 'MAG', 'PowerRx'):
+        ({'XZ': 'roll', 'YZ': 'pitch', 'MAG': 'bearing', 'PowerRx': 'power_rx'}, 1.0),
+    ('relPosN/lon', 'relPosE/lat', 'relPosD/height', 'accN/hMSL', 'accE/hAcc', 'accD/vAcc', 'pos_type'):
+        ({'relPosN/lon': 'pos0', 'relPosE/lat': 'pos1', 'relPosD/height': 'pos2',
+          'accN/hMSL': 'acc0', 'accE/hAcc': 'acc1', 'accD/vAcc': 'acc2', 'pos_type': 'pos_type'}, 1e-2),
+    ('pos1', 'pos2', 'pos3', 'pos_type'):
+        ({'pos1': 'pos0', 'pos2': 'pos1', 'pos3': 'pos2', 'pos_type': 'pos_type'}, 1.0),
+    ('disN', 'disE', 'disD'):
+        ({'disN': 'pos0', 'disE': 'pos1', 'disD': 'pos2'}, 1.0),
+    ('lon', 'lat', 'height'):
+        ({'lon': 'pos0', 'lat': 'pos1', 'height': 'pos2'}, 1.0),
+}
+# Fused pose columns (fusion.POSE_HEADER), after the alignment errors of the engine sessions
+POSE_COLUMNS = {'Pose_N': 'pose_n', 'Pose_E': 'pose_e', 'Pose_vN': 'pose_vn', 'Pose_vE': 'pose_ve',
+                'Pose_Heading': 'pose_heading', 'Pose_sN': 'pose_sn', 'Pose_sE': 'pose_se',
+                'Pose_cNE': 'pose_cne', 'Pose_sHeading': 'pose_sheading'}
+for _header, (_mapping, _scale) in list(VARIANTS.items()):
+    if _header[14:16] == ('GPS_dt', 'Aiming_dt'):
+        VARIANTS[(*_header[:16], *POSE_COLUMNS, *_header[16:])] = ({**_mapping, **POSE_COLUMNS}, _scale)
+# Variants without PosType column
+IMPLICIT_POS_TYPE = {
+    ('Dist_N', 'Dist_E', 'Dist_D', 'PowerRx', 'XZ', 'YZ', 'MAG'): 'relPos',
+    ('disN', 'disE', 'disD'): 'relPos',
+    ('lon', 'lat', 'height'): 'absPos',
+}
+
+# Normalized schema, in SI units: relative position (NED from the base) and absolute position (WGS84)
+COLUMNS = {
+    'time': 'datetime64[ns]',
+    'pos_type': pd.CategoricalDtype(POS_TYPES),
+    'rel_n': 'float64', 'rel_e': 'float64', 'rel_d': 'float64',         # [m]
+    'acc_n': 'float32', 'acc_e': 'float32', 'acc_d': 'float32',         # [m]
+    'lon': 'float64', 'lat': 'float64', 'height': 'float64',            # [deg], [deg], [m]
+    'h_msl': 'float64', 'h_acc': 'float32', 'v_acc': 'float32',         # [m]
+    'power_rx': 'float32',                                              # [dBm]
+    'bearing': 'float32', 'roll': 'float32', 'pitch': 'float32',        # [deg]
+    'cal_stat': 'Int16',
+    'temp': 'float32',                                                  # [°C]
+    'gps_dt': 'float32', 'aiming_dt': 'float32',                        # Alignment error [ms]
+    'power_mean': 'float32', 'power_min': 'float32', 'power_max': 'float32',  # Adaptive emission [dBm]
+    'samples': 'Int32',                                                 # Samples aggregated in the row
+    'pose_n': 'float64', 'pose_e': 'float64',                           # Fused pose [m]
+    'pose_vn': 'float32', 'pose_ve': 'float32',                         # [m/s]
+    'pose_heading': 'float32',                                          # [deg]
+    'pose_sn': 'float32', 'pose_se': 'float32', 'pose_cne': 'float32',  # [m], [m], [m²]
+    'pose_sheading': 'float32',                                         # [deg]
+}
+
+
+def normalize(df:pd.DataFrame) -> pd.DataFrame:
+    '''
+    Normalizes a session DataFrame (any header variant) to the COLUMNS schema.
+
+    Args:
+        df (pandas.DataFrame): Session as read by pandas.read_csv.
+
+    Returns:
+        pandas.DataFrame: Normalized session; the columns not present in the source are null.
+
+    Raises:
+        ValueError: If the header is not a known measurement variant.
+    '''
+    header = tuple(df.columns)
+    if header not in VARIANTS:
+        raise ValueError(f"Unrecognized header variant: {','.join(header)}")
+    mapping, rel_scale = VARIANTS[header]
+    src = df.rename(columns=mapping)
+    n = len(src)
+    out = pd.DataFrame(index=pd.RangeIndex(n))
+
+    out['time'] = (pd.to_datetime(src['time'], format='%Y-%m-%d %H:%M:%S.%f', errors='coerce')
+                   if 'time' in src else pd.Series(pd.NaT, index=out.index, dtype='datetime64[ns]'))
+    pos_type = src['pos_type'] if 'pos_type' in src else pd.Series(IMPLICIT_POS_TYPE.get(header), index=out.index)
+    out['pos_type'] = pd.Categorical(pos_type, categories=POS_TYPES)
+
+    nan = np.full(n, np.nan)
+    pos = [src[f'pos{i}'].to_numpy(float) if f'pos{i}' in src else nan for i in range(3)]
+    acc = [src[f'acc{i}'].to_numpy(float) if f'acc{i}' in src else nan for i in range(3)]
+    rel = (pos_type == 'relPos').to_numpy()
+    absolute = (pos_type == 'absPos').to_numpy()
+
+    for column, values in zip(('rel_n', 'rel_e', 'rel_d'), pos):
+        out[column] = np.where(rel, values * rel_scale, np.nan)
+    for column, values in zip(('acc_n', 'acc_e', 'acc_d'), acc):
+        out[column] = np.where(rel, values * 1e-3, np.nan)
+    out['lon'] = np.where(absolute, pos[0], np.nan)
+    out['lat'] = np.where(absolute, pos[1], np.nan)
+    out['height'] = np.where(absolute, pos[2] * 1e-3, np.nan)
+    out['h_msl'] = np.where(absolute, acc[0] * 1e-3, np.nan)
+    out['h_acc'] = np.where(absolute, acc[1] * 1e-3, np.nan)
+    out['v_acc'] = np.where(absolute, acc[2] * 1e-3, np.nan)
+    for column in ('power_rx', 'bearing', 'roll', 'pitch', 'cal_stat', 'temp', 'gps_dt', 'aiming_dt',
+                   'power_mean', 'power_min', 'power_max', 'samples', *POSE_COLUMNS.values()):
+        out[column] = pd.to_numeric(src[column], errors='coerce') if column in src else np.nan
+    return out.astype(COLUMNS)
+
+
+def distance(normalized:pd.DataFrame, reference:tuple = None, vertical_scale:float = 1.0) -> np.ndarray:
+    '''
+    3D distance [m] of each row of a normalized session: from the base station
+    for relPos rows, and from the reference point for absPos rows (NaN without reference).
+
+    Args:
+        normalized (pandas.DataFrame): Session normalized by normalize().
+        reference (tuple): (lat [deg], lon [deg], height [m]) of the reference point.
+        vertical_scale (float): Factor of the down component of the relPos rows. Default is 1.0;
+                                1e-3 gives the distance of the analysis scripts that read R_D/Hgt in mm.
+
+    Returns:
+        numpy.ndarray: Distance of each row.
+    '''
+    result = np.sqrt(normalized['rel_n'].to_numpy(float)**2 + normalized['rel_e'].to_numpy(float)**2
+                     + (vertical_scale*normalized['rel_d'].to_numpy(float))**2)
+    if reference is not None:
+        ref_lat, ref_lon, ref_height = np.radians(reference[0]), np.radians(reference[1]), reference[2]
+        lat = np.radians(normalized['lat'].to_numpy(float))
+        lon = np.radians(normalized['lon'].to_numpy(float))
+        # Haversine horizontal distance and height difference
+        a = np.sin((lat - ref_lat)/2)**2 + np.cos(ref_lat)*np.cos(lat)*np.sin((lon - ref_lon)/2)**2
+        horizontal = 2*EARTH_RADIUS*np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        absolute = np.sqrt(horizontal**2 + (normalized['height'].to_numpy(float) - ref_height)**2)
+        result = np.where(np.isnan(result), absolute, result)
+    return result
+
+
+def _partition(path:str, root:str) -> tuple:
+    # (campaign, date) of a source file or journal directory: top directory under Data/ and session date
+    campaign = os.path.relpath(path, root).replace(os.sep, '/').split('/')[0]
+    date_time = FILE_DATETIME.findall(os.path.basename(path))
+    date = dt.strptime(date_time[-1], '%d-%m-%Y-%H-%M-%S').strftime('%Y-%m-%d') if date_time else 'unknown'
+    return campaign, date
+
+
+def _read_header(path:str) -> tuple:
+    if os.path.isdir(path):
+        segments = list_segments(path)
+        if not segments:
+            return ()
+        path = segments[0]
+    with open_session(path) as file:
+        return tuple(file.readline().strip().split(','))
+
+
+def _read_session(path:str) -> pd.DataFrame:
+    # A journal directory is read as the concatenation of its segments
+    if os.path.isdir(path):
+        return pd.concat([pd.read_csv(segment) for segment in list_segments(path)], ignore_index=True)
+    return pd.read_csv(path)
+
+
+def convert_file(path:str, root:str, output:str) -> tuple:
+    '''
+    Converts one source CSV file, or journal directory (FileJournal), into a Parquet file of the dataset.
+
+    Args:
+        path (str): Source CSV file (plain or compressed) or journal directory, named after the session.
+        root (str): Root of the source tree (Data/).
+        output (str): Root of the dataset.
+
+    Returns:
+        tuple: (relative path of the Parquet file, rows), or (None, 0) if the
+               file is not a measurement (metadata, calibration).
+    '''
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if _read_header(path) not in VARIANTS:
+        return None, 0
+    df = normalize(_read_session(path))
+    source = os.path.relpath(path, root).replace(os.sep, '/')
+    df['source'] = pd.Categorical([source] * len(df))
+    df['row'] = np.arange(len(df), dtype='int32')
+    campaign, date = _partition(path, root)
+    stem = os.path.basename(path).split('.')[0]
+    relative = f"campaign={campaign}/date={date}/{stem}.parquet"
+    target = os.path.join(output, *relative.split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, target + '.tmp', compression='zstd')
+    os.replace(target + '.tmp', target)
+    return relative, len(df)
+
+
+def convert_tree(root:str = 'Data', output:str = None, workers:int = None) -> dict:
+    '''
+    Converts the measurement CSV files under 'root' into a partitioned Parquet dataset.
+
+    The conversion is incremental: '<output>/_convert_state.json' records the
+    mtime and size of every converted source, so only new or modified files
+    are converted (in parallel across a process pool), and the outputs of
+    removed sources are deleted. A journal directory is converted as one
+    session, and the CSV joined from it is not converted again (list_sessions).
+
+    Args:
+        root (str): Source directory. Default is 'Data'.
+        output (str): Dataset directory. Defaults to '<root>/dataset'.
+        workers (int): Number of worker processes. Defaults to os.cpu_count().
+
+    Returns:
+        dict: Number of 'converted', 'skipped' (not measurements), 'unchanged' and 'removed' files, and 'rows' converted.
+    '''
+    root = os.path.abspath(root)
+    output = os.path.abspath(output or os.path.join(root, 'dataset'))
+    os.makedirs(output, exist_ok=True)
+    state_path = os.path.join(output, STATE_FILE)
+    state = {}
+    if os.path.isfile(state_path):
+        with open(state_path) as file:
+            state = json.load(file)
+
+    sources = {source: list(stat) for source, stat in list_sessions(root, exclude=output).items()}
+
+    changed = [source for source, stat in sources.items()
+               if state.get(source, {}).get('stat') != stat
+               or state[source].get('version') != NORMALIZATION_VERSION]
+    removed = [source for source in state if source not in sources]
+    # Outputs of the sources kept as they are, never deleted on behalf of another source
+    kept = {entry.get('output') for source, entry in state.items() if source in sources and source not in changed}
+    for source in removed + changed:
+        previous = state.get(source, {}).get('output')
+        if previous and previous not in kept and os.path.isfile(os.path.join(output, previous)):
+            os.remove(os.path.join(output, previous))
+    for source in removed:
+        del state[source]
+
+    paths = [os.path.join(root, source) for source in changed]
+    if len(paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(convert_file, paths, [root] * len(paths), [output] * len(paths)))
+    else:
+        results = [convert_file(path, root, output) for path in paths]
+
+    rows = 0
+    for source, (relative, n_rows) in zip(changed, results):
+        state[source] = {'stat': sources[source], 'version': NORMALIZATION_VERSION, 'output': relative, 'rows': n_rows}
+        rows += n_rows
+    with open(state_path + '.tmp', 'w') as file:
+        json.dump(state, file, indent=1)
+    os.replace(state_path + '.tmp', state_path)
+    return {
+        'converted': sum(1 for relative, _ in results if relative),
+        'skipped': sum(1 for relative, _ in results if not relative),
+        'unchanged': len(sources) - len(changed),
+        'removed': len(removed),
+        'rows': rows,
+    }
+
+
+def read_dataset(path:str = 'Data/dataset', columns:list = None, filters = None) -> pd.DataFrame:
+    '''
+    Loads the converted dataset (or a part of it) into a DataFrame.
+
+    Args:
+        path (str): Dataset directory. Default is 'Data/dataset'.
+        columns (list): Columns to load, including the partition columns 'campaign' and 'date'. Defaults to all.
+        filters: pyarrow filters, e.g. [('campaign', '=', '5G_loss'), ('date', '>=', '2025-01-01')];
+                 only the matching partitions are read.
+
+    Returns:
+        pandas.DataFrame: The normalized sessions.
+    '''
+    import pyarrow.parquet as pq
+    table = pq.read_table(path, columns=columns, filters=filters, partitioning='hive', memory_map=True)
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the CSV measurement corpus into a partitioned Parquet dataset.")
+    parser.add_argument("--root", default="Data")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    print(convert_tree(args.root, args.output, args.workers))
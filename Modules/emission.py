@@ -0,0 +1,182 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Adaptive emission of the records of the acquisition engine.
+                Instead of one row per USRP frame, a record is written when
+                the position moves beyond a distance, when the power changes
+                beyond a tolerance, or on a heartbeat interval; the samples
+                suppressed in between are aggregated (mean/min/max and count)
+                into the next record written, so walking slowly or standing
+                still does not fill the files with identical rows.
+'''
+
+from math import sqrt
+
+
+class AdaptiveEmission:
+    '''
+    Emission policy of the AcquisitionEngine with spatial deduplication.
+
+    A record (time, samples) is emitted if, compared with the last record
+    emitted:
+        - its position moved more than 'distance' (per position type, e.g.
+          relPos in cm; the types without distance are not compared),
+        - its power changed more than 'power_tolerance',
+        - 'heartbeat' seconds elapsed.
+    Otherwise it is suppressed. Every emitted record has an 'aggregate' entry
+    with the mean, minimum and maximum of each aggregated value over the
+    samples it stands for (the suppressed ones since the previous record and
+    itself), followed by the number of those samples. At the end of the
+    session flush() emits the last suppressed sample, so no sample is lost.
+
+    Args:
+        distance (float | dict): Minimum displacement to emit, in the units of the position values,
+                                 for all the position types or by type. Default is {'relPos': 5.0} (cm).
+        power_tolerance (float): Minimum power change to emit [dB]. Default is 1.0.
+        heartbeat (float): Maximum seconds between records. Default is 1.0.
+        position (tuple): (producer, indexes) of the position values. Default is ('gps', (0, 1, 2)).
+        position_type (tuple): (producer, index) of the position type. Default is ('gps', 6).
+        power (tuple): (producer, index) of the power. Default is ('usrp', 0).
+        aggregate (tuple): (producer, index) of each aggregated value. Default is (('usrp', 0),).
+
+    Attributes:
+        emitted (int): Records emitted.
+        suppressed (int): Records suppressed (aggregated into the next one emitted).
+        reasons (dict): Records emitted by position, power, heartbeat and flush.
+
+    Methods
+    -------
+        update(time: float, samples: dict) -> tuple:
+            Returns (time, samples) with the 'aggregate' entry if the record is emitted, None otherwise.
+        flush() -> tuple:
+            Returns the last suppressed record with its aggregates, None if there is none.
+        getStats() -> dict:
+            Emitted and suppressed records, reduction ratio and emission reasons.
+    '''
+
+    def __init__(self, distance = None, power_tolerance:float = 1.0, heartbeat:float = 1.0,
+                 position:tuple = ('gps', (0, 1, 2)), position_type:tuple = ('gps', 6),
+                 power:tuple = ('usrp', 0), aggregate:tuple = (('usrp', 0),)) -> None:
+        self.distance = {'relPos': 5.0} if distance is None else distance
+        self.power_tolerance = power_tolerance
+        self.heartbeat = heartbeat
+        self.position = position
+        self.position_type = position_type
+        self.power = power
+        self.aggregate = tuple(aggregate)
+
+        self.emitted = 0
+        self.suppressed = 0
+        self.reasons = {'position': 0, 'power': 0, 'heartbeat': 0, 'flush': 0}
+        self._last_time = None
+        self._last_power = None
+        self._references = {}       # Position type -> position of the last record emitted
+        self._pending = None        # Last suppressed record
+        self._reset()
+
+    def _reset(self) -> None:
+        self._count = 0
+        self._sums = [0.0]*len(self.aggregate)
+        self._counts = [0]*len(self.aggregate)
+        self._mins = [None]*len(self.aggregate)
+        self._maxs = [None]*len(self.aggregate)
+
+    @staticmethod
+    def _value(samples:dict, field:tuple):
+        values = samples.get(field[0])
+        return None if values is None else values[field[1]]
+
+    def _distance(self, kind) -> float:
+        if isinstance(self.distance, dict):
+            return self.distance.get(kind)
+        return self.distance
+
+    def _accumulate(self, samples:dict) -> None:
+        self._count += 1
+        for i, field in enumerate(self.aggregate):
+            value = self._value(samples, field)
+            if value is None:
+                continue
+            self._sums[i] += value
+            self._counts[i] += 1
+            self._mins[i] = value if self._mins[i] is None else min(self._mins[i], value)
+            self._maxs[i] = value if self._maxs[i] is None else max(self._maxs[i], value)
+
+    def _emit(self, time:float, samples:dict, reason:str) -> tuple:
+        aggregate = []
+        for i in range(len(self.aggregate)):
+            mean = self._sums[i]/self._counts[i] if self._counts[i] else None
+            aggregate.extend((mean, self._mins[i], self._maxs[i]))
+        aggregate.append(self._count)
+        samples = {**samples, 'aggregate': aggregate}
+        self._reset()
+        self._pending = None
+
+        kind = self._value(samples, self.position_type) if self.position_type else None
+        position = self._positionOf(samples)
+        if position is not None:
+            self._references[kind] = position
+        power = self._value(samples, self.power) if self.power else None
+        if power is not None:
+            self._last_power = power
+        self._last_time = time
+        self.emitted += 1
+        self.reasons[reason] += 1
+        return time, samples
+
+    def _positionOf(self, samples:dict):
+        if self.position is None:
+            return None
+        values = samples.get(self.position[0])
+        if values is None:
+            return None
+        position = tuple(values[i] for i in self.position[1])
+        return None if any(value is None for value in position) else position
+
+    def update(self, time:float, samples:dict):
+        self._accumulate(samples)
+        if self._last_time is None or time - self._last_time >= self.heartbeat:
+            return self._emit(time, samples, 'heartbeat')
+
+        position = self._positionOf(samples)
+        if position is not None:
+            kind = self._value(samples, self.position_type) if self.position_type else None
+            threshold = self._distance(kind)
+            reference = self._references.get(kind)
+            if threshold is not None:
+                if reference is None or sqrt(sum((a - b)**2 for a, b in zip(position, reference))) >= threshold:
+                    return self._emit(time, samples, 'position')
+
+        power = self._value(samples, self.power) if self.power else None
+        if power is not None and self._last_power is not None and abs(power - self._last_power) > self.power_tolerance:
+            return self._emit(time, samples, 'power')
+
+        self.suppressed += 1
+        self._pending = (time, samples)
+        return None
+
+    def flush(self):
+        if self._pending is None:
+            return None
+        self.suppressed -= 1        # Emitted after all
+        return self._emit(*self._pending, 'flush')
+
+    def getStats(self) -> dict:
+        total = self.emitted + self.suppressed
+        return {
+            'emitted': self.emitted,
+            'suppressed': self.suppressed,
+            'reduction': total/self.emitted if self.emitted else float('nan'),
+            'reasons': dict(self.reasons),
+        }
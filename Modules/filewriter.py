@@ -17,8 +17,44 @@ Develop by:
 
 
 from datetime import datetime as dt
+from time import monotonic, perf_counter_ns
+import threading
+import queue
 import csv
+import io
 import os
+from compression import CompressedWriter, EXTENSIONS
+
+
+def session_filename(name:str, frequency, type:str, date_time:str, extension:str = ".csv") -> str:
+    '''
+    Builds the filename of a session file following the naming convention of FileCSV.
+
+    Args:
+        name (str): The base name for the file.
+        frequency: The frequency value used in the filename for 'TRX_CAL' files.
+        type (str): The type of file, 'TRX_CAL', 'MEAS' or 'METADATA'.
+        date_time (str): Creation date and time of the file, '%d-%m-%Y-%H-%M-%S'.
+        extension (str): Extension of the file. Default is '.csv'.
+
+    Returns:
+        str: The filename.
+
+    Raises:
+        ValueError: If an invalid file type is provided.
+    '''
+    match type:
+        case "TRX_CAL":
+            return name + str(frequency / (1e6)) + "MHz_" + date_time + extension
+        case "MEAS":
+            return f"{name}_MEAS_{date_time}{extension}"
+        case "METADATA":
+            return f"{name}_METADATA_{date_time}{extension}"
+        case _:
+            raise ValueError(
+                "Invalid type of file, types available:\n-TRX_CAL\n-BW_MEAS\n-METADATA"
+            )
+
 
 class FileCSV():
     '''
@@ -29,46 +65,97 @@ class FileCSV():
     to save data  to the CSV file, ensuring  that the header is written 
     only when the file is created.
 
+    The file is opened on the first save and kept open with a large write
+    buffer, so saving a row is a buffered append. The buffer is flushed to
+    disk every 'flush_rows' rows or 'flush_interval' seconds, whichever comes
+    first, and on close(). Use it as a context manager or call close() when
+    the measurement stops, otherwise the last rows may stay in the buffer.
+
+    With 'compression' the file is written as a stream of independent gzip
+    or zstd frames, one per flush (see compression.CompressedWriter), and
+    the '.gz'/'.zst' extension is added to the filename.
+
     Args:
         name (str): The base name for the CSV file.
         frequency: The frequency value used in the filename for certain types.
         header: The header row to be written to the CSV file.
         type (str): The type of file being created, which determines the filename format.
+        buffer_size (int): Size of the write buffer in bytes. Default is 1 MiB.
+        flush_rows (int): Rows written between flushes, 0 disables it. Default is 1000.
+        flush_interval (float): Seconds between flushes, 0 disables it. Default is 1.0.
+        compression (str): None, 'gzip' or 'zstd'. Default is None.
+        compression_level (int): Compression level. Defaults to the codec default.
 
     Raises:
-        ValueError: If an invalid file type is provided.
+        ValueError: If an invalid file type or compression is provided.
+
+    Methods
+    -------
+        saveData(data: list) -> None:
+            Saves one row to the CSV file.
+        saveRows(rows: list) -> None:
+            Saves several rows to the CSV file at once.
+        flush() -> None:
+            Writes the buffered rows to disk.
+        close() -> None:
+            Flushes and closes the CSV file.
     '''
-    def __init__(self, name:str, frequency, header, type:str) -> None:
+    def __init__(self, name:str, frequency, header, type:str,
+                 buffer_size:int = 1 << 20, flush_rows:int = 1000, flush_interval:float = 1.0,
+                 compression:str = None, compression_level:int = None) -> None:
         self.DATETIME = dt.now().strftime('%d-%m-%Y-%H-%M-%S')
-        match type:
-            case "TRX_CAL":
-                self.frequency = frequency
-                self.filename = (
-                    name
-                    + str(self.frequency / (1e6))
-                    + "MHz_"
-                    + self.DATETIME
-                    + ".csv"
-                )
-            case "MEAS":
-                self.filename = f"{name}_MEAS_{self.DATETIME}.csv"
-            case "METADATA":
-                self.filename = f"{name}_METADATA_{self.DATETIME}.csv"
-            case _:
-                raise ValueError(
-                    "Invalid type of file, types available:\n-TRX_CAL\n-BW_MEAS\n-METADATA"
-                )
+        if type == "TRX_CAL":
+            self.frequency = frequency
+        self.filename = session_filename(name, frequency, type, self.DATETIME)
+        if compression is not None:
+            if compression not in EXTENSIONS:
+                raise ValueError("Unrecognized compression, only 'gzip', 'zstd' are valid.")
+            self.filename += EXTENSIONS[compression]
 
         self.file_exist = False
         self.header = header
+        self.buffer_size = buffer_size
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compression = compression
+        self.compression_level = compression_level
+
+        self.file = None
+        self.csv_writer = None
+        self.rows_written = 0
+        self._pending_rows = 0
+        self._last_flush = monotonic()
+
+    def _open(self) -> None:
+        # Opens the file once, writing the header only if it is created
+        self.file_exist = os.path.isfile(self.filename)
+        if self.compression is not None:
+            # write_through: every row reaches the compressor whole, so frames end at row boundaries
+            self.file = io.TextIOWrapper(CompressedWriter(self.filename, self.compression, self.compression_level,
+                                                          frame_size=self.buffer_size),
+                                         newline="", write_through=True)
+        else:
+            self.file = open(self.filename, mode = "a" if self.file_exist else "w",
+                             newline="", buffering=self.buffer_size)
+        self.csv_writer = csv.writer(self.file)
+        if not self.file_exist:
+            self.csv_writer.writerow(self.header)
+        self._last_flush = monotonic()
+
+    def _afterWrite(self, n_rows:int) -> None:
+        self.rows_written += n_rows
+        self._pending_rows += n_rows
+        if ((self.flush_rows and self._pending_rows >= self.flush_rows)
+                or (self.flush_interval and monotonic() - self._last_flush >= self.flush_interval)):
+            self.flush()
 
     def saveData(self, data) -> None:
         '''
         Saves data to a CSV file, creating the file if it does not exist.
 
-        This function checks if the specified file already exists and opens
-        it in append mode if it does, or in write mode if it does not. It writes
-        the header row if the file is newly created and appends the provided data as a new row.
+        The first call opens the file in append mode if it exists, or in write
+        mode writing the header row if it does not. The row is appended to the
+        write buffer, which is flushed when the row or time threshold is reached.
 
         Args:
             data (list): The data to be saved as a new row in the CSV file.
@@ -76,13 +163,262 @@ class FileCSV():
         Returns:
             None
         '''
-        self.file_exist = os.path.isfile(self.filename)
+        if self.file is None:
+            self._open()
+        self.csv_writer.writerow(data)
+        self._afterWrite(1)
 
-        with open(self.filename, mode = "a" if self.file_exist else "w", newline="") as file:
-            csv_writer = csv.writer(file)
+    def saveRows(self, rows) -> None:
+        '''
+        Saves several rows to the CSV file at once (csv.writer.writerows).
+
+        Args:
+            rows (list): List of rows, each one a list as in saveData().
+
+        Returns:
+            None
+        '''
+        rows = list(rows)
+        if not rows:
+            return
+        if self.file is None:
+            self._open()
+        self.csv_writer.writerows(rows)
+        self._afterWrite(len(rows))
+
+    def flush(self) -> None:
+        '''
+        Writes the buffered rows to disk.
+
+        Returns:
+            None
+        '''
+        if self.file is not None and not self.file.closed:
+            self.file.flush()
+        self._pending_rows = 0
+        self._last_flush = monotonic()
+
+    def close(self) -> None:
+        '''
+        Flushes and closes the CSV file. A later save reopens it in append mode.
+
+        Returns:
+            None
+        '''
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        self.file = None
+        self.csv_writer = None
+        self._pending_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncFileWriter():
+    '''
+    Writes the rows of a FileCSV (or any writer with saveRows() and close())
+    from a dedicated thread, fed through a bounded queue.
+
+    saveData() only puts the row in the queue, so the sampling cadence of the
+    acquisition loop does not depend on the disk latency. The writer thread
+    takes all the rows waiting in the queue (up to 'batch_size') and writes
+    them with a single saveRows() call.
+
+    When the queue is full (the disk is slower than the acquisition for a
+    long time), a back-pressure event is counted and the row is either
+    waited for ('block', no data lost) or discarded ('drop', the cadence is kept).
+
+    Args:
+        writer (FileCSV): Writer of the rows.
+        max_queue (int): Maximum number of rows waiting in the queue. Default is 10000.
+        batch_size (int): Maximum number of rows per saveRows() call. Default is 500.
+        on_full (str): Policy when the queue is full, 'block' or 'drop'. Default is 'block'.
+        formatter (callable): Applied to each row in the writer thread before writing it
+                              (e.g. to format a timestamp). Default is None.
+        instruments (Instrumentation): Records the 'file_write' stage (latency per batch, rate in rows) and,
+                                       with a tracer, the rows queued. Default is None.
+
+    Attributes:
+        writer_thread (threading.Thread): Thread that writes the rows.
+        rows_written (int): Rows written by the thread.
+        batches (int): saveRows() calls made by the thread.
+        max_queue_depth (int): Maximum number of rows that have been waiting in the queue.
+        backpressure_events (int): Rows that found the queue full.
+        dropped_rows (int): Rows discarded with the 'drop' policy.
+
+    Methods
+    -------
+        startWriterThread() -> None:
+            Starts the writer thread.
+        stopWriterThread() -> None:
+            Writes the queued rows, stops the thread and closes the writer.
+        saveData(data: list) -> None:
+            Queues one row.
+        saveRows(rows: list) -> None:
+            Queues several rows.
+        queueDepth() -> int:
+            Number of rows waiting in the queue.
+        getStats() -> dict:
+            Queue and back-pressure statistics.
+    '''
+    _STOP = object()
 
-            if not self.file_exist:
-                csv_writer.writerow(self.header)
-            csv_writer.writerow(data)
+    def __init__(self, writer, max_queue:int = 10000, batch_size:int = 500, on_full:str = "block",
+                 formatter = None, instruments = None) -> None:
+        if on_full not in ("block", "drop"):
+            raise ValueError("Unrecognized on_full policy, only 'block', 'drop' are valid.")
+        self.writer = writer
+        self.batch_size = batch_size
+        self.on_full = on_full
+        self.formatter = formatter
+        self.instruments = instruments
+        self.rows_queue = queue.Queue(maxsize=max_queue)
+
+        self.writer_thread = None
+        self.rows_written = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.backpressure_events = 0
+        self.dropped_rows = 0
+        self.error = None
+
+    @property
+    def filename(self):
+        return self.writer.filename
+
+    def _put(self, item) -> None:
+        try:
+            self.rows_queue.put_nowait(item)
+        except queue.Full:
+            self.backpressure_events += 1
+            if self.on_full == "drop" and item is not self._STOP:
+                self.dropped_rows += 1
+                return
+            self.rows_queue.put(item)
+        self.max_queue_depth = max(self.max_queue_depth, self.rows_queue.qsize())
+
+    # Private function, used in 'startWriterThread()'
+    def _continuousWriting(self) -> None:
+        running = True
+        while running:
+            batch = [self.rows_queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.rows_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is self._STOP:
+                batch.pop()
+                running = False
+            if batch:
+                try:
+                    start = perf_counter_ns()
+                    if self.formatter is not None:
+                        batch = [self.formatter(row) for row in batch]
+                    self.writer.saveRows(batch)
+                    if self.instruments is not None:
+                        self.instruments.record('file_write', perf_counter_ns() - start, len(batch))
+                        if self.instruments.tracer is not None:
+                            self.instruments.tracer.counter('writer_queue', rows=self.rows_queue.qsize())
+                    self.rows_written += len(batch)
+                    self.batches += 1
+                except Exception as e:
+                    # Keep draining the queue so the acquisition never blocks on a dead writer
+                    self.error = e
+                    print(f"Writer thread error: {e}")
+
+    def startWriterThread(self) -> None:
+        '''
+        Starts the writer thread.
+
+        Returns:
+            None
+        '''
+        if self.writer_thread is not None and self.writer_thread.is_alive():
+            return
+        self.writer_thread = threading.Thread(target=self._continuousWriting, name="FILE_WRITER_THREAD", daemon=True)
+        self.writer_thread.start()
+
+    def stopWriterThread(self) -> None:
+        '''
+        Writes the rows still in the queue, stops the writer thread and closes the writer.
+
+        Returns:
+            None
+        '''
+        if self.writer_thread is not None and self.writer_thread.is_alive():
+            self._put(self._STOP)
+            self.writer_thread.join()
+        self.writer_thread = None
+        self.writer.close()
+
+    def saveData(self, data) -> None:
+        '''
+        Queues one row to be written by the writer thread.
+
+        Args:
+            data (list): The data to be saved as a new row in the CSV file.
+
+        Returns:
+            None
+        '''
+        self._put(data)
+
+    def saveRows(self, rows) -> None:
+        '''
+        Queues several rows to be written by the writer thread.
+
+        Args:
+            rows (list): List of rows, each one a list as in saveData().
+
+        Returns:
+            None
+        '''
+        for row in rows:
+            self._put(row)
+
+    def queueDepth(self) -> int:
+        '''
+        Returns the number of rows waiting in the queue.
+
+        Returns:
+            int: Queue depth.
+        '''
+        return self.rows_queue.qsize()
+
+    def getStats(self) -> dict:
+        '''
+        Returns the queue and back-pressure statistics of the writer.
+
+        Returns:
+            dict: 'queue_depth', 'max_queue_depth', 'rows_written', 'batches',
+                  'backpressure_events' and 'dropped_rows'.
+        '''
+        return {
+            'queue_depth': self.queueDepth(),
+            'max_queue_depth': self.max_queue_depth,
+            'rows_written': self.rows_written,
+            'batches': self.batches,
+            'backpressure_events': self.backpressure_events,
+            'dropped_rows': self.dropped_rows,
+        }
+
+    def close(self) -> None:
+        '''
+        Same as stopWriterThread(), so it can replace a FileCSV.
+
+        Returns:
+            None
+        '''
+        self.stopWriterThread()
 
+    def __enter__(self):
+        self.startWriterThread()
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stopWriterThread()
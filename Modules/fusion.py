@@ -0,0 +1,308 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  GPS/IMU fusion. Extended Kalman filter over the GPS-RTK fixes
+                and the aiming (compass) stream, that estimates position,
+                velocity and heading with covariance at any requested time,
+                e.g. at every USRP frame, and the record stage that adds the
+                fused pose to every record of the acquisition engine.
+'''
+
+import numpy as np
+from bisect import bisect_right
+from time import monotonic
+from angles import wrap_pi
+
+
+EARTH_RADIUS = 6378137.0    # WGS84 semi-major axis [m]
+RELPOS_SCALE = 1e-2         # NAV-RELPOSNED position [cm] -> [m]
+ACC_SCALE = 1e-3            # NAV-RELPOSNED/HPPOSLLH accuracy [mm] -> [m]
+
+# Columns of the pose added by PoseFusion to each record
+POSE_HEADER = ["Pose_N", "Pose_E", "Pose_vN", "Pose_vE", "Pose_Heading",
+               "Pose_sN", "Pose_sE", "Pose_cNE", "Pose_sHeading"]
+
+
+class PoseEKF:
+    '''
+    Extended Kalman filter that fuses the GPS-RTK position and the aiming bearing.
+
+    State vector (local frame, SI units):
+        x = [north, east, v_north, v_east, heading, heading_rate]
+    with a constant velocity model for the position and a constant turn rate
+    model for the heading. Position is measured by the GPS (relative NED from
+    the base station, or absolute lat/lon projected around an origin) and the
+    heading by the compass bearing, whose innovation is wrapped to ±180°.
+
+    Measurements and queries are timestamped with time.monotonic() seconds,
+    so the pose can be requested at the USRP frame rate instead of repeating
+    the last (stale) GPS fix in every record.
+
+    Args:
+        frame (str): GPS position used, 'relPos' or 'absPos'. Default is 'relPos'.
+        accel_noise (float): Process noise, acceleration std [m/s²]. Default is 0.5.
+        turn_noise (float): Process noise, angular acceleration std [deg/s²]. Default is 20.
+        heading_std (float): Compass bearing measurement std [deg]. Default is 3.
+        min_position_std (float): Lower bound of the GPS position std [m]. Default is 0.01.
+        origin (tuple): (lat, lon) origin of the local frame for 'absPos'. Defaults to the first fix.
+
+    Attributes:
+        x (numpy.ndarray): State vector.
+        P (numpy.ndarray): State covariance.
+        t (float): Time of the state [s], None until the first measurement.
+
+    Methods
+    -------
+        updateGPS(coordinates: list, t: float) -> bool:
+            Updates the filter with a fix formatted by GPS.format_GPSData().
+        updateAiming(aiming: list, t: float) -> bool:
+            Updates the filter with a reading returned by RAiming.getAiming().
+        getPose(t: float) -> dict:
+            Returns the pose predicted at time t, without modifying the filter.
+    '''
+
+    def __init__(self, frame = 'relPos', accel_noise = 0.5, turn_noise = 20.0,
+                 heading_std = 3.0, min_position_std = 0.01, origin = None) -> None:
+        if frame not in ('relPos', 'absPos'):
+            raise ValueError("Unrecognized frame, only 'relPos', 'absPos' are valid.")
+        self.frame = frame
+        self.accel_noise = accel_noise
+        self.turn_noise = np.radians(turn_noise)
+        self.heading_std = np.radians(heading_std)
+        self.min_position_std = min_position_std
+        self.origin = origin
+
+        self.x = np.zeros(6)
+        self.P = np.diag([1e6, 1e6, 1e2, 1e2, 4*np.pi**2, 1.0])
+        self.t = None
+        self._has_position = False
+        self._has_heading = False
+
+    def _transition(self, dt):
+        # State transition matrix (F) and process noise (Q) for a time step dt
+        F = np.eye(6)
+        F[0, 2] = F[1, 3] = F[4, 5] = dt
+        dt = abs(dt)
+        q_pos = self.accel_noise**2 * np.array([[dt**3/3, dt**2/2], [dt**2/2, dt]])
+        q_rot = self.turn_noise**2 * np.array([[dt**3/3, dt**2/2], [dt**2/2, dt]])
+        Q = np.zeros((6, 6))
+        Q[np.ix_([0, 2], [0, 2])] = q_pos
+        Q[np.ix_([1, 3], [1, 3])] = q_pos
+        Q[np.ix_([4, 5], [4, 5])] = q_rot
+        return F, Q
+
+    def _propagate(self, x, P, t):
+        if self.t is None or t == self.t:
+            return x, P
+        F, Q = self._transition(t - self.t)
+        x = F @ x
+        x[4] = wrap_pi(x[4])
+        return x, F @ P @ F.T + Q
+
+    def _predict(self, t):
+        # Late (out of order) measurements are applied at the current state time
+        if self.t is None or t > self.t:
+            self.x, self.P = self._propagate(self.x, self.P, t)
+            self.t = t
+
+    def _update(self, z, H, R, angular = None):
+        # Kalman update; 'angular' marks the measurement rows that are angles
+        innovation = z - H @ self.x
+        if angular is not None:
+            innovation[angular] = wrap_pi(innovation[angular])
+        S = H @ self.P @ H.T + R
+        K = np.linalg.solve(S.T, (self.P @ H.T).T).T
+        self.x = self.x + K @ innovation
+        self.x[4] = wrap_pi(self.x[4])
+        # Joseph form keeps P symmetric positive definite
+        I_KH = np.eye(6) - K @ H
+        self.P = I_KH @ self.P @ I_KH.T + K @ R @ K.T
+
+    def _local_position(self, coordinates):
+        # Position [m] and its std [m] in the local frame, None if not usable
+        if len(coordinates) < 7 or coordinates[6] != self.frame:
+            return None
+        if self.frame == 'relPos':
+            north = coordinates[0] * RELPOS_SCALE
+            east = coordinates[1] * RELPOS_SCALE
+            std = np.array([coordinates[3], coordinates[4]]) * ACC_SCALE
+        else:
+            lon, lat = coordinates[0], coordinates[1]
+            if self.origin is None:
+                self.origin = (lat, lon)
+            lat0, lon0 = self.origin
+            north = np.radians(lat - lat0) * EARTH_RADIUS
+            east = np.radians(lon - lon0) * EARTH_RADIUS * np.cos(np.radians(lat0))
+            std = np.array([coordinates[4], coordinates[4]]) * ACC_SCALE
+        return np.array([north, east]), np.maximum(std, self.min_position_std)
+
+    def updateGPS(self, coordinates, t = None) -> bool:
+        '''
+        Updates the filter with a GPS fix.
+
+        Args:
+            coordinates (list): Fix as returned by GPS.format_GPSData().
+            t (float): Time of the fix [s, time.monotonic()]. Defaults to now.
+
+        Returns:
+            bool: True if the fix was used, False if it is from another frame or invalid.
+        '''
+        if coordinates is None:
+            return False
+        position = self._local_position(coordinates)
+        if position is None:
+            return False
+        z, std = position
+        self._predict(monotonic() if t is None else t)
+        if not self._has_position:
+            # First fix: initialize the position instead of pulling it from zero
+            self.x[0:2] = z
+            self.P[0:2, :] = self.P[:, 0:2] = 0
+            self.P[0, 0], self.P[1, 1] = std**2
+            self._has_position = True
+            return True
+        H = np.zeros((2, 6))
+        H[0, 0] = H[1, 1] = 1
+        self._update(z, H, np.diag(std**2))
+        return True
+
+    def updateAiming(self, aiming, t = None) -> bool:
+        '''
+        Updates the filter with a compass bearing.
+
+        Args:
+            aiming (list): Reading as returned by RAiming.getAiming(), bearing first [deg].
+            t (float): Time of the reading [s, time.monotonic()]. Defaults to now.
+
+        Returns:
+            bool: True if the reading was used, False if it is invalid.
+        '''
+        if not aiming or aiming[0] is None:
+            return False
+        z = np.array([wrap_pi(np.radians(aiming[0]))])
+        self._predict(monotonic() if t is None else t)
+        if not self._has_heading:
+            self.x[4] = z[0]
+            self.P[4, :] = self.P[:, 4] = 0
+            self.P[4, 4] = self.heading_std**2
+            self._has_heading = True
+            return True
+        H = np.zeros((1, 6))
+        H[0, 4] = 1
+        self._update(z, H, np.array([[self.heading_std**2]]), angular=[0])
+        return True
+
+    def getPose(self, t = None) -> dict:
+        '''
+        Returns the pose predicted at time t, without modifying the filter.
+
+        Args:
+            t (float): Time of the pose [s, time.monotonic()], e.g. USRP.rx_time. Defaults to now.
+
+        Returns:
+            dict: 't', 'north', 'east' [m], 'v_north', 'v_east' [m/s], 'heading' [deg, 0-360),
+                  'heading_rate' [deg/s] and 'covariance' (6x6, SI units and radians),
+                  or None before the first GPS fix.
+        '''
+        if not self._has_position:
+            return None
+        t = monotonic() if t is None else t
+        x, P = self._propagate(self.x.copy(), self.P, t)
+        return {
+            't': t,
+            'north': x[0],
+            'east': x[1],
+            'v_north': x[2],
+            'v_east': x[3],
+            'heading': np.degrees(x[4]) % 360,
+            'heading_rate': np.degrees(x[5]),
+            'covariance': P,
+        }
+
+
+class PoseFusion:
+    '''
+    Record stage of the AcquisitionEngine that adds the fused pose to every record.
+
+    For each record time t, the GPS and aiming samples up to t that the filter
+    has not seen yet are taken, in time order, from the timelines of their
+    producers (the same samples the TimestampJoin aligns) and applied to the
+    PoseEKF, and the pose predicted at t is added to the record as a 'pose'
+    entry (columns POSE_HEADER):
+        [north, east [m], v_north, v_east [m/s], heading [deg],
+         std_north, std_east [m], cov_north_east [m²], std_heading [deg]]
+    so every USRP frame is tagged with the pose at its own time instead of
+    the last (stale) fix. The values are None before the first GPS fix.
+
+    Usage:
+        engine = AcquisitionEngine(producers={"gps": GPSProducer(gps), "usrp": USRPProducer(usrp),
+                                              "aiming": AimingProducer(aiming)},
+                                   clock="usrp", join=TimestampJoin(), pose=PoseFusion())
+
+    Args:
+        ekf (PoseEKF): The filter. Default is PoseEKF() ('relPos' frame).
+        gps (str): Name of the GPS producer. Default is 'gps'.
+        aiming (str): Name of the aiming producer, None to fuse only the GPS. Default is 'aiming'.
+
+    Attributes:
+        fixes (int): GPS samples applied to the filter.
+        headings (int): Aiming samples applied to the filter.
+
+    Methods
+    -------
+        poseAt(t: float, producers: dict) -> list:
+            Updates the filter with the samples up to t and returns the pose values at t.
+        getStats() -> dict:
+            Samples applied to the filter.
+    '''
+
+    def __init__(self, ekf:PoseEKF = None, gps:str = 'gps', aiming:str = 'aiming') -> None:
+        self.ekf = PoseEKF() if ekf is None else ekf
+        self.gps = gps
+        self.aiming = aiming
+        self.fixes = 0
+        self.headings = 0
+        self._fed = {}          # Producer name -> time of the last sample applied
+
+    def _newSamples(self, name:str, producer, t:float) -> list:
+        # Samples of a producer after the last one applied and up to t
+        times, samples = producer.timeline()
+        last = self._fed.get(name)
+        start = 0 if last is None else bisect_right(times, last)
+        end = bisect_right(times, t)
+        if end <= start:
+            return []
+        self._fed[name] = times[end - 1]
+        return [(samples[i][0], name, samples[i][1]) for i in range(start, end)]
+
+    def poseAt(self, t:float, producers:dict) -> list:
+        measurements = []
+        for name in (self.gps, self.aiming):
+            if name is not None and name in producers:
+                measurements.extend(self._newSamples(name, producers[name], t))
+        for sample_time, name, values in sorted(measurements, key=lambda measurement: measurement[0]):
+            if name == self.gps:
+                self.fixes += self.ekf.updateGPS(values, sample_time)
+            else:
+                self.headings += self.ekf.updateAiming(values, sample_time)
+
+        pose = self.ekf.getPose(t)
+        if pose is None:
+            return [None]*len(POSE_HEADER)
+        P = pose['covariance']
+        return [pose['north'], pose['east'], pose['v_north'], pose['v_east'], pose['heading'],
+                float(np.sqrt(P[0, 0])), float(np.sqrt(P[1, 1])), float(P[0, 1]), float(np.degrees(np.sqrt(P[4, 4])))]
+
+    def getStats(self) -> dict:
+        return {'fixes': self.fixes, 'headings': self.headings}
@@ -19,12 +19,13 @@ Develop by:
 
 import threading
 import contextlib
+from collections import deque
 import numpy as np
-from time import sleep
+from time import sleep, monotonic, perf_counter_ns
 from serial import Serial
 from datums import DATUMS
-from pytictoc import TicToc
 from io import BufferedReader
+from ubxlog import UBXLogWriter
 from pyubx2 import (
     UBXMessage,
     UBXReader,
@@ -48,9 +49,16 @@ class GPS:
         baudrate (int): The baud rate for the serial communication. Default is 19200.
         timeout (float): The timeout for serial communication in seconds. Default is 0.1.
         type (str): The type of GPS messages to read ('abs', 'rel', or 'all'). Default is 'all'.
+        raw_log (str): Optional path of a binary log where the raw UBX messages are teed. Default is None.
+        index_every (int): Number of messages between entries of the raw log index. Default is 10.
+        buffer_size (int): Number of timestamped messages kept in gps_records. Default is 256.
 
     Attributes:
         gps_data: Stores the most recent GPS data received.
+        gps_time (float): Reception time of gps_data [s, time.monotonic()].
+        gps_records (collections.deque): Ring of (time, message) records, oldest first.
+        raw_log (UBXLogWriter): Raw UBX session log, None if disabled.
+        instruments (Instrumentation): Records the 'gps_parse' latency of each message, None if disabled.
         gps_thread: Thread for continuous GPS reading.
         continuous_reading (bool): Flag indicating if continuous reading is active.
 
@@ -68,13 +76,16 @@ class GPS:
             Formats and returns relative GPS data as a list.
         format_abs_GPSData() -> List: 
             Formats and returns absolute GPS data as a list.
+        getRecords(since: float) -> list:
+            Returns the timestamped messages newer than a given time.
         startGPSThread() -> None:
             Starts a thread for continuous GPS reading.
         stopGPSThread() -> None:
             Stops the continuous GPS reading thread and closes the serial connection.
     '''
     
-    def __init__(self, port = 'COM7', baudrate = 19200, timeout = 0.1, type="all"):
+    def __init__(self, port = 'COM7', baudrate = 19200, timeout = 0.1, type="all", raw_log = None, index_every = 10,
+                 buffer_size = 256):
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
@@ -100,6 +111,14 @@ class GPS:
 
         #Attribute who stores the most recent data
         self.gps_data = None
+        self.gps_time = None
+        self.gps_records = deque(maxlen=buffer_size)
+
+        # Raw UBX session log, allows reprocessing the RTK data after the session
+        self.raw_log = UBXLogWriter(raw_log, index_every) if raw_log else None
+
+        # Instrumentation, records 'gps_parse'
+        self.instruments = None
 
         # Attributes needed for threading
         self.gps_thread = None              # Continuous GPS reading thread
@@ -118,8 +137,13 @@ class GPS:
         # global parsed_data
         parsed_data = None
         if self.serial.in_waiting:
+            start = perf_counter_ns()
             with contextlib.suppress(Exception):
                 (raw_data, parsed_data) = self.ubxr.read()
+                if raw_data and self.raw_log is not None:
+                    self.raw_log.write(raw_data)
+            if parsed_data is not None and self.instruments is not None:
+                self.instruments.record('gps_parse', perf_counter_ns() - start)
         return parsed_data
     
     def sendGPSMessage(self):
@@ -154,7 +178,9 @@ class GPS:
             self.sendGPSMessage()
             gps_data = self.readGPSMessages()
             sleep(0.005)
+        self.gps_time = monotonic()
         self.gps_data = gps_data
+        self.gps_records.append((self.gps_time, gps_data))
         return self.gps_data
     
     def continuousGPSReading(self):
@@ -187,28 +213,23 @@ class GPS:
                     Here, the coordinates are in the order [lon, lat, height, hAcc, vAcc, 'absPos'] in millimeters (mm/1000).
         '''
         
-        #if self.gps_data is not None:
-        # print('\n', self.gps_data, '\n')
-        if hasattr(self.gps_data, 'relPosN'):
-            # print(self.gps_data) # Caution: Print generates an error.
-            coordinates = [self.gps_data.relPosN,   # cm
-                           self.gps_data.relPosE,   # cm
-                           self.gps_data.relPosD,   # cm
-                           self.gps_data.accN,  # mm
-                           self.gps_data.accE,  # mm
-                           self.gps_data.accD,  # mm
-                           'relPos']
-        elif hasattr(self.gps_data, 'lon'):
-            # print(self.gps_data) # Caution: Print generates an error.
-            coordinates = [self.gps_data.lon,
-                           self.gps_data.lat,
-                           self.gps_data.height,
-                           self.gps_data.hMSL, # mm
-                           self.gps_data.hAcc, # mm
-                           self.gps_data.vAcc, # mm
-                           'absPos']
-        return coordinates
+        return format_ubx(self.gps_data)
     
+    def getRecords(self, since = None):
+        '''
+        Returns the timestamped messages kept in the ring, optionally only the newer ones.
+
+        Args:
+            since (float): Only records with time greater than this [s, time.monotonic()].
+
+        Returns:
+            list: (time, UBXMessage) records, oldest first.
+        '''
+        records = list(self.gps_records)
+        if since is None:
+            return records
+        return [record for record in records if record[0] > since]
+
     def haversine_dist(self, lat1, lon1, lat2, lon2):
         """
         Calculate the distance between two geographic points using the Haversine formula.
@@ -264,6 +285,67 @@ class GPS:
             None
         '''
         self.continuous_reading = False
-        self.gps_thread.join()
+        if self.gps_thread is not None:
+            self.gps_thread.join()
         self.serial.close()
+        if self.raw_log is not None:
+            self.raw_log.close()
+
+
+# RTK carrier phase solutions of NAV-RELPOSNED (flag carrSoln), from worst to best
+CARRIER_SOLUTIONS = ('none', 'float', 'fixed')
+
+
+def carrier_solution(parsed_data):
+    '''
+    RTK carrier phase solution of a parsed NAV-RELPOSNED message.
+
+    Args:
+        parsed_data (UBXMessage): The parsed UBX message.
+
+    Returns:
+        str:    'none', 'float' or 'fixed' for a valid relative position (gnssFixOK and relPosValid),
+                None for an invalid one or any other message.
+    '''
+    if not hasattr(parsed_data, 'relPosN'):
+        return None
+    if not getattr(parsed_data, 'gnssFixOK', 1) or not getattr(parsed_data, 'relPosValid', 1):
+        return None
+    return CARRIER_SOLUTIONS[min(getattr(parsed_data, 'carrSoln', 0), 2)]
+
+
+def format_ubx(parsed_data):
+    '''
+    Formats a parsed NAV-RELPOSNED or NAV-HPPOSLLH message as a list.
+
+    Module level function so it can be used by GPS.format_GPSData and, being
+    picklable, by the offline decoding of raw UBX logs in worker processes.
+
+    Args:
+        parsed_data (UBXMessage): The parsed UBX message.
+
+    Returns:
+        list:   [North, East, Down, accN, accE, accD, 'relPos'] for relative position,
+                [lon, lat, height, hMSL, hAcc, vAcc, 'absPos'] for absolute position,
+                None for any other message.
+    '''
+    if hasattr(parsed_data, 'relPosN'):
+        # print(parsed_data) # Caution: Print generates an error.
+        return [parsed_data.relPosN,   # cm
+                parsed_data.relPosE,   # cm
+                parsed_data.relPosD,   # cm
+                parsed_data.accN,  # mm
+                parsed_data.accE,  # mm
+                parsed_data.accD,  # mm
+                'relPos']
+    if hasattr(parsed_data, 'lon'):
+        # print(parsed_data) # Caution: Print generates an error.
+        return [parsed_data.lon,
+                parsed_data.lat,
+                parsed_data.height,
+                parsed_data.hMSL, # mm
+                parsed_data.hAcc, # mm
+                parsed_data.vAcc, # mm
+                'absPos']
+    return None
     
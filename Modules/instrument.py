@@ -31,6 +31,7 @@ class Instrument:
         self._instrument = None
         self._connected = False
         self._stream = True
+        self.instruments = None     # Instrumentation, records the stream thread stages
         if settings is None:
             self._instrument_ip = instrument_ip
             self._instrument_name = None 
@@ -226,10 +227,16 @@ class RSGenerator(Instrument):
         while self._stream:
             
 
+            start = time.perf_counter_ns()
+            updated = False
             if self.new_power != self._power:
                 self.power = self.new_power
+                updated = True
             if self.new_frequency != self._frequency:
                 self.frequency = self.new_frequency*1e-6
+                updated = True
+            if updated and self.instruments is not None:
+                self.instruments.record('generator_update', time.perf_counter_ns() - start)
 
             with contextlib.suppress(Full):
                 self._q.put_nowait([self._power, self._frequency])
@@ -448,8 +455,12 @@ class RSSpectrumAnalyzer(Instrument):
     def stream_thread(self):
         while self._stream:
             
+            start = time.perf_counter_ns()
+            trace = self.get_trace()
+            if self.instruments is not None:
+                self.instruments.record('analyzer_trace', time.perf_counter_ns() - start)
             with contextlib.suppress(Full):
-                self._q.put_nowait(self.get_trace())
+                self._q.put_nowait(trace)
     
     
     """
@@ -0,0 +1,301 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Low-overhead instrumentation of the acquisition stages (USRP
+                reception, power computation, GPS parsing, aiming reading,
+                record assembly and file writing): a latency histogram with
+                logarithmic buckets of constant relative precision (as HDR
+                histograms) and a rate counter per stage, with live values
+                and a summary for the METADATA file. With a Tracer attached,
+                every recorded latency is also a span of the session trace.
+'''
+
+import threading
+from time import monotonic, perf_counter_ns
+
+
+# Stages instrumented by the acquisition engine, in the order of the METADATA columns
+STAGES = ('usrp_recv', 'power_compute', 'gps_parse', 'aiming_read', 'record_assembly', 'file_write')
+SUMMARY_FIELDS = ('count', 'rate', 'mean_us', 'p50_us', 'p99_us', 'max_us')
+
+
+class LatencyHistogram:
+    '''
+    Histogram of latencies in ns with logarithmic buckets of constant relative precision.
+
+    Values below 2**sub_bits ns have exact buckets; above, every power of two
+    is divided in 2**(sub_bits - 1) buckets, so the relative error of the
+    quantiles is below 2**(1 - sub_bits) (< 1.6 % with the default 7 bits).
+    Recording a value is a few integer operations.
+
+    Args:
+        sub_bits (int): Precision bits. Default is 7.
+        max_value (int): Largest latency recorded [ns], larger ones are clamped. Default is 100 s.
+
+    Attributes:
+        count (int): Values recorded.
+        total (int): Sum of the values [ns].
+        max (int): Maximum value [ns].
+
+    Methods
+    -------
+        record(value: int) -> None:
+            Adds a latency [ns].
+        quantile(q: float) -> float:
+            Returns the latency [ns] of quantile q in [0, 1].
+        mean() -> float:
+            Returns the mean latency [ns].
+        merge(other: LatencyHistogram) -> None:
+            Adds the values of another histogram with the same parameters.
+        reset() -> None:
+            Removes all the values.
+    '''
+
+    def __init__(self, sub_bits:int = 7, max_value:int = 100_000_000_000) -> None:
+        self.sub_bits = sub_bits
+        self.max_value = max_value
+        self.counts = [0]*(self._index(max_value) + 1)
+        self.reset()
+
+    def _index(self, value:int) -> int:
+        shift = value.bit_length() - self.sub_bits
+        if shift <= 0:
+            return value
+        return (shift << (self.sub_bits - 1)) + (value >> shift)
+
+    def _lowest(self, index:int) -> int:
+        # Smallest value of a bucket
+        half = 1 << (self.sub_bits - 1)
+        if index < 2*half:
+            return index
+        shift = (index >> (self.sub_bits - 1)) - 1
+        return (index - (shift << (self.sub_bits - 1))) << shift
+
+    def reset(self) -> None:
+        self.counts = [0]*len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value:int) -> None:
+        value = min(max(int(value), 0), self.max_value)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q:float) -> float:
+        if not self.count:
+            return float('nan')
+        target = max(1, round(q*self.count))
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                # Middle of the bucket, not beyond the maximum
+                return min((self._lowest(index) + self._lowest(index + 1) - 1)/2, self.max)
+        return float(self.max)
+
+    def mean(self) -> float:
+        return self.total/self.count if self.count else float('nan')
+
+    def merge(self, other:'LatencyHistogram') -> None:
+        if other.sub_bits != self.sub_bits or len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge histograms with different parameters.")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+
+class RateCounter:
+    '''
+    Events counter with the average rate and the rate of the last 'window' seconds.
+
+    Args:
+        window (float): Seconds of the live rate. Default is 1.0.
+
+    Attributes:
+        count (int): Events counted.
+
+    Methods
+    -------
+        add(n: int) -> None:
+            Counts n events.
+        rate() -> float:
+            Average events per second since the first event.
+        liveRate() -> float:
+            Events per second in the last window.
+    '''
+
+    def __init__(self, window:float = 1.0) -> None:
+        self.window = window
+        self.count = 0
+        self._first = None
+        self._last = None
+        self._mark = (monotonic(), 0)       # Start of the current window
+        self._live = 0.0
+
+    def add(self, n:int = 1) -> None:
+        now = monotonic()
+        if self._first is None:
+            self._first = now
+            self._mark = (now, self.count)
+        self._last = now
+        self.count += n
+        if now - self._mark[0] >= self.window:
+            self._live = (self.count - self._mark[1])/(now - self._mark[0])
+            self._mark = (now, self.count)
+
+    def rate(self) -> float:
+        if self._first is None or self._last == self._first:
+            return 0.0
+        return self.count/(self._last - self._first)
+
+    def liveRate(self) -> float:
+        if self._last is None or monotonic() - self._last > 2*self.window:
+            return 0.0
+        return self._live
+
+
+class Stage:
+    '''
+    Latency histogram and rate counter of one stage.
+
+    time() returns a context manager that records the duration of its block:
+        with instruments.stage('gps_parse').time():
+            ...
+    With a tracer, each latency is also traced as a span that ends at
+    'end_ns' (perf_counter_ns(), the time of the call by default) and lasts
+    'span_ns' (the latency by default, e.g. the duration of a whole batch when
+    the latency recorded is the one of each of its n events).
+    '''
+
+    def __init__(self, name:str, sub_bits:int = 7, tracer = None) -> None:
+        self.name = name
+        self.histogram = LatencyHistogram(sub_bits)
+        self.counter = RateCounter()
+        self.tracer = tracer
+
+    def record(self, duration_ns:int, n:int = 1, end_ns:int = None, span_ns:int = None) -> None:
+        self.histogram.record(duration_ns)
+        self.counter.add(n)
+        if self.tracer is not None:
+            end_ns = end_ns or perf_counter_ns()
+            span_ns = duration_ns if span_ns is None else span_ns
+            self.tracer.complete(self.name, end_ns - span_ns, span_ns, args={'n': n} if n != 1 else None)
+
+    def time(self, n:int = 1):
+        return _Timer(self, n)
+
+    def summary(self) -> dict:
+        histogram = self.histogram
+        return {
+            'count': self.counter.count,
+            'rate': self.counter.rate(),
+            'mean_us': histogram.mean()/1e3,
+            'p50_us': histogram.quantile(0.5)/1e3,
+            'p99_us': histogram.quantile(0.99)/1e3,
+            'max_us': histogram.max/1e3,
+        }
+
+
+class _Timer:
+    __slots__ = ('stage', 'n', 'start')
+
+    def __init__(self, stage:Stage, n:int) -> None:
+        self.stage = stage
+        self.n = n
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = perf_counter_ns()
+        self.stage.record(end - self.start, self.n, end)
+
+
+class Instrumentation:
+    '''
+    Set of named stages with latency histograms and rate counters.
+
+    The devices and the acquisition engine record their stages when an
+    Instrumentation is attached to them (attribute 'instruments'); each stage
+    is recorded from a single thread, so no locks are taken in the
+    acquisition path. Stages used without being created up front are added
+    on their first record, but only the ones created up front are columns
+    of the METADATA file.
+
+    Args:
+        stages (tuple): Names of the stages created up front. Default is STAGES.
+        tracer (Tracer): Also traces every recorded latency as a span. Default is None (no trace).
+
+    Attributes:
+        stages (dict): Name -> Stage.
+        tracer (Tracer): The session trace, None if disabled.
+
+    Methods
+    -------
+        stage(name: str) -> Stage:
+            Returns (creating it if needed) a stage.
+        record(name: str, duration_ns: int, n: int, span_ns: int) -> None:
+            Records a latency [ns] and n events of a stage, traced as a span of span_ns [ns].
+        time(name: str) -> context manager:
+            Records the duration of a block as a latency of a stage.
+        summary() -> dict:
+            Count, average rate and latency mean/p50/p99/max [us] of each stage.
+        live() -> dict:
+            Live rate [1/s] and p99 latency [us] of each stage.
+        metadataHeader() -> list:
+            Column names of the summary for the METADATA file.
+        metadataRow() -> list:
+            Summary values in the order of metadataHeader().
+    '''
+
+    def __init__(self, stages:tuple = STAGES, tracer = None) -> None:
+        self.stages = {}
+        self.tracer = tracer
+        self.columns = tuple(stages)
+        self._lock = threading.Lock()
+        for name in stages:
+            self.stage(name)
+
+    def stage(self, name:str) -> Stage:
+        stage = self.stages.get(name)
+        if stage is None:
+            with self._lock:
+                stage = self.stages.setdefault(name, Stage(name, tracer=self.tracer))
+        return stage
+
+    def record(self, name:str, duration_ns:int, n:int = 1, span_ns:int = None) -> None:
+        self.stage(name).record(duration_ns, n, span_ns=span_ns)
+
+    def time(self, name:str, n:int = 1):
+        return self.stage(name).time(n)
+
+    def summary(self) -> dict:
+        return {name: stage.summary() for name, stage in list(self.stages.items())}
+
+    def live(self) -> dict:
+        return {name: {'rate': stage.counter.liveRate(), 'p99_us': stage.histogram.quantile(0.99)/1e3}
+                for name, stage in list(self.stages.items())}
+
+    def metadataHeader(self) -> list:
+        return [f"{name}_{field}" for name in self.columns for field in SUMMARY_FIELDS]
+
+    def metadataRow(self) -> list:
+        summary = self.summary()
+        return [summary[name][field] for name in self.columns for field in SUMMARY_FIELDS]
@@ -0,0 +1,442 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Crash-safe journaled writing of the measurement sessions. The
+                rows are appended to CSV segments with large buffered writes,
+                and synced to disk (fsync) every few seconds, so a power loss
+                or a killed process costs at most that interval of data. A new
+                segment is started at a given size or duration, and a manifest
+                lists the time range and row count of every segment, so only
+                the segments of a time window need to be read.
+                A recovery tool repairs the last segment if it was truncated.
+'''
+
+import io
+import os
+import csv
+import glob
+import json
+import argparse
+from datetime import datetime as dt
+from time import monotonic
+from filewriter import session_filename
+
+
+SEGMENT_PATTERN = "segment_{:05d}.csv"
+MANIFEST = "manifest.json"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _fsync_directory(path:str) -> None:
+    # Makes the creation of a segment durable; not supported on Windows
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def list_segments(path:str) -> list:
+    '''
+    Lists the segments of a journal, in write order.
+
+    Args:
+        path (str): Journal directory.
+
+    Returns:
+        list: Paths of the segments.
+    '''
+    return sorted(glob.glob(os.path.join(path, "segment_*.csv")))
+
+
+def is_journal(path:str) -> bool:
+    '''
+    Tells whether a directory is a journal (it has a manifest or segments).
+
+    Args:
+        path (str): Directory.
+
+    Returns:
+        bool: True for a journal directory.
+    '''
+    return os.path.isfile(os.path.join(path, MANIFEST)) or bool(list_segments(path))
+
+
+def journal_stat(path:str) -> tuple:
+    '''
+    Modification stamp of a journal, to detect the changed ones.
+
+    Args:
+        path (str): Journal directory.
+
+    Returns:
+        tuple: (mtime_ns, size), the latest mtime and the total size of the segments.
+    '''
+    stats = [os.stat(segment) for segment in list_segments(path)]
+    return max((stat.st_mtime_ns for stat in stats), default=0), sum(stat.st_size for stat in stats)
+
+
+class FileJournal():
+    '''
+    Journaled counterpart of FileCSV, with the same naming convention and save methods.
+
+    The session is a directory of CSV segments ('segment_00000.csv', ...), each
+    one with the header, so every segment can be read on its own. A new segment
+    is started when the current one reaches 'segment_size' bytes or has been
+    open for 'segment_duration' seconds. The rows are written through a large
+    buffer and the segment is flushed and synced to disk every 'fsync_interval'
+    seconds, which bounds the data lost on a crash.
+
+    'manifest.json' lists the segments with their row count, size and the time
+    of their first and last rows, taken from the 'Timestamp' column (or the
+    write time if there is none). It is updated on every sync.
+
+    Args:
+        name (str): The base name for the journal directory.
+        frequency: The frequency value used in the directory name for certain types.
+        header: The header row written at the start of each segment.
+        type (str): The type of file being created, which determines the directory name.
+        segment_size (int): Size of each segment in bytes. Default is 16 MiB.
+        segment_duration (float): Maximum duration of each segment in seconds, None for no limit. Default is None.
+        fsync_interval (float): Seconds between syncs to disk. Default is 2.0.
+        buffer_size (int): Size of the write buffer in bytes. Default is 1 MiB.
+
+    Attributes:
+        filename (str): Journal directory.
+        segment (int): Number of the current segment.
+        rows_written (int): Rows written in the session.
+        manifest (list): Entries of the manifest, one per segment.
+
+    Raises:
+        ValueError: If an invalid file type is provided.
+
+    Methods
+    -------
+        saveData(data: list) -> None:
+            Saves one row to the journal.
+        saveRows(rows: list) -> None:
+            Saves several rows to the journal at once.
+        sync() -> None:
+            Flushes the buffer, syncs the current segment to disk and updates the manifest.
+        close() -> None:
+            Syncs and closes the current segment.
+    '''
+    def __init__(self, name:str, frequency, header, type:str, segment_size:int = 16 << 20,
+                 segment_duration:float = None, fsync_interval:float = 2.0, buffer_size:int = 1 << 20) -> None:
+        self.DATETIME = dt.now().strftime('%d-%m-%Y-%H-%M-%S')
+        if type == "TRX_CAL":
+            self.frequency = frequency
+        self.filename = session_filename(name, frequency, type, self.DATETIME, extension="")
+        self.header = header
+        self.segment_size = segment_size
+        self.segment_duration = segment_duration
+        self.fsync_interval = fsync_interval
+        self.buffer_size = buffer_size
+
+        self.segment = -1
+        self.segment_bytes = 0
+        self.rows_written = 0
+        self.manifest = []
+        self.file = None
+        self._segment_start = monotonic()
+        self._time_column = list(header).index("Timestamp") if "Timestamp" in header else None
+        self._last_sync = monotonic()
+        self._line = io.StringIO()
+        self._csv_writer = csv.writer(self._line)
+
+    def _encode(self, rows) -> bytes:
+        self._line.seek(0)
+        self._line.truncate()
+        self._csv_writer.writerows(rows)
+        return self._line.getvalue().encode()
+
+    def _openSegment(self) -> None:
+        if self.file is not None:
+            self.close()
+        os.makedirs(self.filename, exist_ok=True)
+        self.segment += 1
+        path = os.path.join(self.filename, SEGMENT_PATTERN.format(self.segment))
+        self.file = open(path, "wb", buffering=self.buffer_size)
+        _fsync_directory(self.filename)
+        self.segment_bytes = self.file.write(self._encode([self.header]))
+        self._segment_start = monotonic()
+        self.manifest.append({'file': os.path.basename(path), 'rows': 0, 'bytes': 0,
+                              'start': None, 'end': None})
+
+    def _rowTime(self, row) -> str:
+        if self._time_column is not None and len(row) > self._time_column:
+            value = row[self._time_column]
+            return value.strftime(TIME_FORMAT) if isinstance(value, dt) else str(value)
+        return dt.now().strftime(TIME_FORMAT)
+
+    def _mustRoll(self) -> bool:
+        return (self.file is None
+                or self.segment_bytes >= self.segment_size
+                or (self.segment_duration is not None
+                    and monotonic() - self._segment_start >= self.segment_duration))
+
+    def _write(self, rows) -> None:
+        if self._mustRoll():
+            self._openSegment()
+        self.segment_bytes += self.file.write(self._encode(rows))
+        self.rows_written += len(rows)
+        entry = self.manifest[-1]
+        if entry['start'] is None:
+            entry['start'] = self._rowTime(rows[0])
+        entry['end'] = self._rowTime(rows[-1])
+        entry['rows'] += len(rows)
+        if monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def saveData(self, data) -> None:
+        '''
+        Saves one row to the current segment, starting a new segment if it is full.
+
+        Args:
+            data (list): The data to be saved as a new row.
+
+        Returns:
+            None
+        '''
+        self._write([data])
+
+    def saveRows(self, rows) -> None:
+        '''
+        Saves several rows to the current segment at once.
+
+        Args:
+            rows (list): List of rows, each one a list as in saveData().
+
+        Returns:
+            None
+        '''
+        rows = list(rows)
+        if rows:
+            self._write(rows)
+
+    def sync(self) -> None:
+        '''
+        Flushes the write buffer, syncs the current segment to disk (fsync) and updates the manifest.
+
+        Returns:
+            None
+        '''
+        if self.file is not None and not self.file.closed:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.manifest[-1]['bytes'] = self.segment_bytes
+            write_manifest(self.filename, self.header, self.manifest)
+        self._last_sync = monotonic()
+
+    def close(self) -> None:
+        '''
+        Syncs and closes the current segment. A later save starts a new segment.
+
+        Returns:
+            None
+        '''
+        if self.file is not None and not self.file.closed:
+            self.sync()
+            self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_manifest(path:str, header, segments:list) -> None:
+    '''
+    Writes the manifest of a journal, atomically (a crash leaves the old or the new one).
+
+    Args:
+        path (str): Journal directory.
+        header (list): Header of the segments.
+        segments (list): One dict per segment: 'file', 'rows', 'bytes', 'start' and 'end'.
+
+    Returns:
+        None
+    '''
+    temporary = os.path.join(path, MANIFEST + ".tmp")
+    with open(temporary, "w") as file:
+        json.dump({'header': list(header), 'time_format': TIME_FORMAT, 'segments': segments}, file, indent=1)
+    os.replace(temporary, os.path.join(path, MANIFEST))
+
+
+def read_manifest(path:str) -> dict:
+    '''
+    Reads the manifest of a journal.
+
+    Args:
+        path (str): Journal directory.
+
+    Returns:
+        dict: 'header', 'time_format' and 'segments' (list of dicts with
+              'file', 'rows', 'bytes', 'start' and 'end').
+    '''
+    with open(os.path.join(path, MANIFEST)) as file:
+        return json.load(file)
+
+
+def rebuild_manifest(path:str) -> dict:
+    '''
+    Rebuilds the manifest of a journal by reading all its segments,
+    e.g. after a crash or for journals written before the manifest existed.
+
+    Args:
+        path (str): Journal directory.
+
+    Returns:
+        dict: The new manifest, as returned by read_manifest().
+    '''
+    header = []
+    segments = []
+    for segment in list_segments(path):
+        with open(segment, newline="") as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            time_column = header.index("Timestamp") if "Timestamp" in header else None
+            rows, start, end = 0, None, None
+            for row in reader:
+                rows += 1
+                if time_column is not None and len(row) > time_column:
+                    start = row[time_column] if start is None else start
+                    end = row[time_column]
+        segments.append({'file': os.path.basename(segment), 'rows': rows,
+                         'bytes': os.path.getsize(segment), 'start': start, 'end': end})
+    write_manifest(path, header, segments)
+    return read_manifest(path)
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, dt):
+        return value
+    return dt.fromisoformat(value)
+
+
+def select_segments(path:str, start = None, end = None) -> list:
+    '''
+    Returns the segments of a journal that overlap a time window.
+
+    Segments without time range (no rows, or no 'Timestamp' column) are
+    always returned. Each segment can be loaded on its own, e.g. in parallel:
+    pandas.concat(pool.map(pandas.read_csv, select_segments(path, start, end))).
+
+    Args:
+        path (str): Journal directory.
+        start (datetime or str): Start of the window, e.g. '2024-10-29 10:15:00'. Defaults to the beginning.
+        end (datetime or str): End of the window. Defaults to the end.
+
+    Returns:
+        list: Paths of the segments, in write order.
+    '''
+    if not os.path.isfile(os.path.join(path, MANIFEST)):
+        rebuild_manifest(path)
+    start, end = _as_datetime(start), _as_datetime(end)
+    selected = []
+    for segment in read_manifest(path)['segments']:
+        first, last = _as_datetime(segment['start']), _as_datetime(segment['end'])
+        if first is not None and last is not None:
+            if (start is not None and last < start) or (end is not None and first > end):
+                continue
+        selected.append(os.path.join(path, segment['file']))
+    return selected
+
+
+def recover_journal(path:str) -> dict:
+    '''
+    Repairs a journal after a crash.
+
+    Only the last segment can be damaged: its trailing partial row (the bytes
+    after the last newline) is truncated, and the segment is removed if not
+    even its header was completely written. The manifest is then rebuilt.
+
+    Args:
+        path (str): Journal directory.
+
+    Returns:
+        dict: 'segments' (number of segments left), 'rows' (data rows in the
+              journal) and 'truncated_bytes' (bytes removed).
+    '''
+    segments = list_segments(path)
+    truncated = 0
+    if segments:
+        last = segments[-1]
+        with open(last, "rb+") as file:
+            data = file.read()
+            end = data.rfind(b"\n") + 1
+            truncated = len(data) - end
+            if truncated:
+                file.truncate(end)
+                file.flush()
+                os.fsync(file.fileno())
+        if end == 0:
+            os.remove(last)
+            segments.pop()
+    manifest = rebuild_manifest(path)
+    rows = sum(segment['rows'] for segment in manifest['segments'])
+    return {'segments': len(segments), 'rows': rows, 'truncated_bytes': truncated}
+
+
+def join_journal(path:str, output:str = None) -> str:
+    '''
+    Joins the segments of a journal into a single CSV file, with a single header.
+
+    Args:
+        path (str): Journal directory.
+        output (str): Path of the CSV file. Defaults to '<path>.csv'.
+
+    Returns:
+        str: Path of the CSV file.
+    '''
+    output = output or path.rstrip("/\\") + ".csv"
+    with open(output, "wb") as out:
+        for i, segment in enumerate(list_segments(path)):
+            with open(segment, "rb") as file:
+                header = file.readline()
+                if i == 0:
+                    out.write(header)
+                while chunk := file.read(1 << 20):
+                    out.write(chunk)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recover, join or select segments of measurement journals.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    recover_parser = subparsers.add_parser("recover", help="Repair the last segment of a journal.")
+    recover_parser.add_argument("journal")
+    join_parser = subparsers.add_parser("join", help="Join the segments of a journal in one CSV file.")
+    join_parser.add_argument("journal")
+    join_parser.add_argument("--output", default=None)
+    select_parser = subparsers.add_parser("select", help="List the segments of a journal that overlap a time window.")
+    select_parser.add_argument("journal")
+    select_parser.add_argument("--start", default=None)
+    select_parser.add_argument("--end", default=None)
+    args = parser.parse_args()
+
+    if args.command == "recover":
+        print(recover_journal(args.journal))
+    elif args.command == "join":
+        print(join_journal(args.journal, args.output))
+    else:
+        for segment in select_segments(args.journal, args.start, args.end):
+            print(segment)
@@ -0,0 +1,204 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Compact numeric representation of the measurement records.
+                A record is a row of a NumPy structured array (fixed-size
+                fields, int64 epoch timestamp in ns) appended into
+                preallocated chunks, instead of nested objects and strings;
+                records are formatted as text (the 'Timestamp' string and
+                the CSV columns) only when a text sink asks for them, one
+                record in a writer thread or whole arrays at once.
+'''
+
+import numpy as np
+from time import localtime
+from datetime import datetime as dt
+
+
+# Codes of the PosType column, -1 for unknown
+POS_TYPES = ('relPos', 'absPos')
+
+# Measurement record, in the order of the columns of the session files (5G_loss_with_pause.py).
+# The values are kept in float64 so the CSV text is the same as the one of the sensor values.
+MEASUREMENT_DTYPE = np.dtype([
+    ('time_ns', 'i8'),                                              # Epoch time [ns]
+    ('r_n_lon', 'f8'), ('r_e_lat', 'f8'), ('r_d_hgt', 'f8'),        # relPos [cm] or lon, lat [deg], height [mm]
+    ('acc_n_hmsl', 'f8'), ('acc_e_hacc', 'f8'), ('acc_d_vacc', 'f8'),   # [mm]
+    ('pos_type', 'i1'),
+    ('power_rx', 'f8'),                                             # [dBm]
+    ('bearing', 'f8'), ('roll', 'f8'), ('pitch', 'f8'),             # [deg]
+    ('cal_stat', 'i2'),
+    ('temp', 'f8'),                                                 # [°C]
+])
+MEASUREMENT_HEADER = ["Timestamp", "R_N/Lon", "R_E/Lat", "R_D/Hgt", "accN/hMSL", "accE/hAcc", "accD/vAcc",
+                      "PosType", "PowerRx", "Bearing", "Roll_XZ", "Pitch_YZ", "cal_stat_aim", "Temp"]
+
+
+def pos_type_code(pos_type) -> int:
+    '''
+    Code of a position type ('relPos', 'absPos') for the pos_type field, -1 if unknown.
+    '''
+    try:
+        return POS_TYPES.index(pos_type)
+    except ValueError:
+        return -1
+
+
+def pos_type_name(code:int) -> str:
+    '''
+    Position type of a pos_type code, empty if unknown.
+    '''
+    return POS_TYPES[code] if 0 <= code < len(POS_TYPES) else ""
+
+
+def measurement_values(time_ns:int, gps_data, power_rx:float, aiming_data) -> tuple:
+    '''
+    Values of a measurement record (MEASUREMENT_DTYPE) from the readings of the sensors.
+
+    Args:
+        time_ns (int): Epoch time [ns], e.g. time.time_ns().
+        gps_data (list): GPS.format_GPSData(), None if there is no position (NaN values).
+        power_rx (float): Received power [dBm].
+        aiming_data (list): RAiming.latest(), [bearing, pitch, roll, cal_stat, temp].
+
+    Returns:
+        tuple: The values in the order of the fields of MEASUREMENT_DTYPE.
+    '''
+    if gps_data is None:
+        position, pos_type = (np.nan,)*6, -1
+    else:
+        position = tuple(np.nan if value is None else value for value in gps_data[:6])
+        pos_type = pos_type_code(gps_data[6]) if len(gps_data) > 6 else -1
+    bearing, pitch, roll, cal_stat, temp = (np.nan if value is None else value for value in aiming_data[:5])
+    return (time_ns, *position, pos_type, power_rx, bearing, roll, pitch,
+            0 if cal_stat != cal_stat else cal_stat, temp)
+
+
+def format_time_ns(time_ns:int) -> str:
+    '''
+    Formats an epoch time [ns] in local time as the 'Timestamp' column of the session files (ms resolution).
+    '''
+    # Integer seconds and microseconds, truncated as in format_records()
+    time = dt.fromtimestamp(time_ns//1_000_000_000).replace(microsecond=time_ns//1_000 % 1_000_000)
+    return time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def format_record(record) -> list:
+    '''
+    Formats one record (row of a structured array) as a CSV row, with the 'Timestamp'
+    string and the PosType name. Used as the 'formatter' of an AsyncFileWriter, so the
+    formatting runs in the writer thread.
+    '''
+    names = record.dtype.names
+    row = record.tolist()
+    row = [format_time_ns(row[0]), *row[1:]]
+    if 'pos_type' in names:
+        index = names.index('pos_type')
+        row[index] = pos_type_name(row[index])
+    return row
+
+
+def format_records(array:np.ndarray) -> list:
+    '''
+    Formats a structured array of records as CSV rows, vectorized: the timestamps
+    of the whole array are converted to local time strings at once.
+
+    Returns:
+        list: One list per record, as format_record().
+    '''
+    if not len(array):
+        return []
+    # Local time offset of the first record (the sessions do not cross a DST change)
+    offset_ns = localtime(int(array['time_ns'][0]//1_000_000_000)).tm_gmtoff*1_000_000_000
+    stamps = np.datetime_as_string((array['time_ns'] + offset_ns).astype('datetime64[ns]'), unit='ms')
+    stamps = np.char.replace(stamps, 'T', ' ')
+    columns = [stamps.tolist()]
+    for name in array.dtype.names[1:]:
+        values = array[name]
+        if name == 'pos_type':
+            names = np.array([*POS_TYPES, ""], dtype=object)
+            values = names[np.where((values >= 0) & (values < len(POS_TYPES)), values, len(POS_TYPES))]
+        columns.append(values.tolist())
+    return [list(row) for row in zip(*columns)]
+
+
+class RecordBuffer:
+    '''
+    Append-only store of records in preallocated chunks of a structured array.
+
+    Appending writes the fields in place (no objects per record); when a chunk
+    is full a new one is allocated, so the records already stored are never
+    moved and the rows returned by append() stay valid until clear().
+
+    Args:
+        dtype (numpy.dtype): Structured type of the records. Default is MEASUREMENT_DTYPE.
+        chunk_size (int): Records per chunk. Default is 4096.
+
+    Methods
+    -------
+        append(values: tuple) -> numpy.void:
+            Stores a record (values in the order of the dtype fields) and returns its row.
+        last() -> numpy.void:
+            The last record, None if empty.
+        chunks() -> list:
+            The filled part of each chunk (views, no copy).
+        array() -> numpy.ndarray:
+            All the records in one array (copy).
+        toRows() -> list:
+            All the records formatted as CSV rows.
+        clear() -> None:
+            Removes all the records.
+    '''
+
+    def __init__(self, dtype:np.dtype = MEASUREMENT_DTYPE, chunk_size:int = 4096) -> None:
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self.clear()
+
+    def clear(self) -> None:
+        # New chunks, the rows returned before keep referring to the old ones
+        self._chunks = [np.empty(self.chunk_size, dtype=self.dtype)]
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, values:tuple):
+        if self._index == self.chunk_size:
+            self._chunks.append(np.empty(self.chunk_size, dtype=self.dtype))
+            self._index = 0
+        chunk = self._chunks[-1]
+        chunk[self._index] = values
+        record = chunk[self._index]
+        self._index += 1
+        self._count += 1
+        return record
+
+    def last(self):
+        if not self._count:
+            return None
+        return self._chunks[-1][self._index - 1]
+
+    def chunks(self) -> list:
+        return [*self._chunks[:-1], self._chunks[-1][:self._index]]
+
+    def array(self) -> np.ndarray:
+        return np.concatenate(self.chunks())
+
+    def toRows(self) -> list:
+        rows = []
+        for chunk in self.chunks():
+            rows.extend(format_records(chunk))
+        return rows
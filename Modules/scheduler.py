@@ -0,0 +1,284 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Fixed-cadence scheduling of the acquisition. The ticks are
+                absolute deadlines on the monotonic clock (start + k*period),
+                so a slow iteration does not shift the following ones; the
+                deadlines that can no longer be met are skipped and counted,
+                and the lateness of every tick (jitter) is accumulated. The
+                session clock measures the acquisition time excluding the
+                paused intervals.
+'''
+
+import threading
+from math import floor, sqrt
+from time import monotonic, sleep
+
+
+class DeadlineScheduler:
+    '''
+    Waits for the ticks of a fixed rate on absolute monotonic deadlines.
+
+    wait() sleeps until the next deadline, and busy-waits the last 'spin'
+    seconds because sleep() overshoots (by up to ~15 ms on Windows). If the
+    caller arrives later than one full period after a deadline, the missed
+    deadlines are skipped (counted in 'missed') and the next deadline of the
+    grid is waited for, so the cadence is kept instead of firing a burst of
+    late ticks.
+
+    Args:
+        rate (float): Ticks per second.
+        spin (float): Seconds busy-waited before each deadline. Default is 1 ms.
+
+    Attributes:
+        ticks (int): Ticks fired.
+        missed (int): Deadlines skipped because the caller was late.
+
+    Methods
+    -------
+        start() -> None:
+            Sets the first deadline one period from now.
+        wait(idle: callable, idle_interval: float) -> float:
+            Waits for the next deadline and returns it, optionally calling idle() while waiting.
+        getStats() -> dict:
+            Ticks, missed deadlines and jitter (lateness of the ticks) in ms.
+    '''
+
+    def __init__(self, rate:float, spin:float = 0.001) -> None:
+        if rate <= 0:
+            raise ValueError("The rate must be positive.")
+        self.rate = rate
+        self.period = 1/rate
+        self.spin = spin
+        self.start()
+
+    def start(self) -> None:
+        self._origin = monotonic()
+        self._index = 0
+        self.ticks = 0
+        self.missed = 0
+        self._jitter_mean = 0.0
+        self._jitter_m2 = 0.0
+        self._jitter_max = 0.0
+
+    def wait(self, idle = None, idle_interval:float = 0.0005) -> float:
+        self._index += 1
+        deadline = self._origin + self._index*self.period
+        now = monotonic()
+        if now - deadline >= self.period:
+            skipped = floor((now - deadline)/self.period)
+            self.missed += skipped
+            self._index += skipped
+            deadline = self._origin + self._index*self.period
+        if idle is not None:
+            # Poll until the spin interval, e.g. to sample a device between ticks
+            while deadline - monotonic() > self.spin + idle_interval:
+                idle()
+                sleep(idle_interval)
+            now = monotonic()
+        remaining = deadline - now - self.spin
+        if remaining > 0:
+            sleep(remaining)
+        while monotonic() < deadline:
+            pass
+        lateness = monotonic() - deadline
+
+        # Running mean and variance of the lateness (Welford)
+        self.ticks += 1
+        delta = lateness - self._jitter_mean
+        self._jitter_mean += delta/self.ticks
+        self._jitter_m2 += delta*(lateness - self._jitter_mean)
+        self._jitter_max = max(self._jitter_max, lateness)
+        return deadline
+
+    def getStats(self) -> dict:
+        return {
+            'rate': self.rate,
+            'ticks': self.ticks,
+            'missed': self.missed,
+            'jitter_mean_ms': 1e3*self._jitter_mean,
+            'jitter_std_ms': 1e3*sqrt(self._jitter_m2/self.ticks) if self.ticks else 0.0,
+            'jitter_max_ms': 1e3*self._jitter_max,
+        }
+
+
+class PeriodicThread:
+    '''
+    Calls a function at a fixed rate from a daemon thread driven by a DeadlineScheduler.
+
+    Args:
+        callback (callable): Function called at every tick, without arguments.
+        rate (float): Calls per second.
+        name (str): Name of the thread. Default is 'PERIODIC_THREAD'.
+        spin (float): See DeadlineScheduler. Default is 1 ms.
+
+    Attributes:
+        scheduler (DeadlineScheduler): The scheduler of the thread.
+        overruns (int): Calls that lasted more than one period.
+        periodic_thread (threading.Thread): Thread that calls the function.
+
+    Methods
+    -------
+        startPeriodicThread() -> None:
+            Starts calling the function.
+        stopPeriodicThread() -> None:
+            Stops calling the function and waits for the thread.
+        isActive() -> bool:
+            True while the thread is running.
+        getStats() -> dict:
+            Scheduler statistics and overruns.
+    '''
+
+    def __init__(self, callback, rate:float, name:str = "PERIODIC_THREAD", spin:float = 0.001) -> None:
+        self.callback = callback
+        self.name = name
+        self.scheduler = DeadlineScheduler(rate, spin)
+        self.overruns = 0
+        self.periodic_thread = None
+        self._running = False
+
+    # Private function, used in 'startPeriodicThread()'
+    def _continuousCalling(self) -> None:
+        self.scheduler.start()
+        while self._running:
+            deadline = self.scheduler.wait()
+            if not self._running:
+                break
+            self.callback()
+            if monotonic() - deadline > self.scheduler.period:
+                self.overruns += 1
+
+    def startPeriodicThread(self) -> None:
+        if self.periodic_thread is not None and self.periodic_thread.is_alive():
+            return
+        self._running = True
+        self.periodic_thread = threading.Thread(target=self._continuousCalling, name=self.name, daemon=True)
+        self.periodic_thread.start()
+
+    def stopPeriodicThread(self) -> None:
+        self._running = False
+        if self.periodic_thread is not None:
+            self.periodic_thread.join()
+            self.periodic_thread = None
+
+    def isActive(self) -> bool:
+        return self.periodic_thread is not None and self.periodic_thread.is_alive()
+
+    def getStats(self) -> dict:
+        return {**self.scheduler.getStats(), 'overruns': self.overruns}
+
+
+class SessionClock:
+    '''
+    Active time of a session on the monotonic clock, excluding the paused intervals.
+
+    The paused intervals are kept, so it can also tell whether a given time
+    (e.g. the time of a sample that is processed later) was inside a pause.
+    pause() and resume() can be called from any thread (e.g. a keyboard
+    listener).
+
+    Attributes:
+        pauses (int): Number of pauses.
+        intervals (list): (start, end) of each paused interval [s, time.monotonic()], end None while paused.
+
+    Methods
+    -------
+        start() -> None:
+            Starts the session now.
+        stop() -> None:
+            Stops the session now, closing the current pause if any.
+        pause() -> bool:
+            Starts a paused interval, False if already paused.
+        resume() -> bool:
+            Ends the paused interval, False if not paused.
+        isPaused() -> bool:
+            True while paused.
+        isActiveAt(t: float) -> bool:
+            True if the session was running (started, not stopped, not paused) at time t.
+        elapsed() -> float:
+            Seconds of the session excluding the paused intervals.
+        pausedTime() -> float:
+            Seconds paused.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._start = None
+        self._stop = None
+        self.pauses = 0
+        self.intervals = []
+        self._paused_total = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self._start = monotonic()
+            self._stop = None
+            self.pauses = 0
+            self.intervals = []
+            self._paused_total = 0.0
+
+    def stop(self) -> None:
+        now = monotonic()
+        with self._lock:
+            if self._start is None or self._stop is not None:
+                return
+            self._resume(now)
+            self._stop = now
+
+    def pause(self) -> bool:
+        with self._lock:
+            if self._start is None or self._stop is not None or self.isPaused():
+                return False
+            self.intervals.append((monotonic(), None))
+            self.pauses += 1
+            return True
+
+    def _resume(self, now:float) -> bool:
+        if not self.isPaused():
+            return False
+        start = self.intervals[-1][0]
+        self.intervals[-1] = (start, now)
+        self._paused_total += now - start
+        return True
+
+    def resume(self) -> bool:
+        with self._lock:
+            return self._resume(monotonic())
+
+    def isPaused(self) -> bool:
+        return bool(self.intervals) and self.intervals[-1][1] is None
+
+    def isActiveAt(self, t:float) -> bool:
+        if self._start is None or t < self._start or (self._stop is not None and t > self._stop):
+            return False
+        # The latest intervals are the ones checked in the acquisition path
+        for start, end in reversed(self.intervals):
+            if end is not None and end <= t:
+                return True
+            if t >= start:
+                return False
+        return True
+
+    def pausedTime(self) -> float:
+        with self._lock:
+            paused = self._paused_total
+            if self.isPaused():
+                paused += (self._stop or monotonic()) - self.intervals[-1][0]
+            return paused
+
+    def elapsed(self) -> float:
+        if self._start is None:
+            return 0.0
+        end = self._stop or monotonic()
+        return end - self._start - self.pausedTime()
@@ -0,0 +1,212 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  On-disk cache of the parsed sessions for the analysis scripts.
+                A session CSV is parsed, typed and enriched (time, separated
+                relative/absolute position in m and distance) once, and stored
+                as Parquet keyed by the file content hash and the processing
+                version; later runs load it directly. The cache has a size
+                budget with least recently used eviction.
+'''
+
+import os
+import json
+import hashlib
+import pandas as pd
+from time import time
+from convert import normalize, distance, VARIANTS, NORMALIZATION_VERSION
+
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', '5G_characterization')
+DEFAULT_MAX_BYTES = 2 << 30     # 2 GiB
+
+
+def file_hash(path:str) -> str:
+    '''
+    Returns the BLAKE2b hash (hex) of the content of a file.
+    '''
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def enrich(df:pd.DataFrame, reference:tuple = None, vertical_scale:float = 1.0) -> pd.DataFrame:
+    '''
+    Adds the derived columns of a session, keeping the original columns.
+
+    Added columns: 'Time' (datetime64), 'Rel_N', 'Rel_E', 'Rel_D' [m] for the
+    relPos rows, 'Lon', 'Lat' [deg] and 'Height' [m] for the absPos rows, and
+    'Distance' [m]: from the base station for relPos rows, and from the
+    reference point for absPos rows (NaN without reference). Files with an
+    unknown header variant are returned unchanged.
+
+    Args:
+        df (pandas.DataFrame): Session as read by pandas.read_csv.
+        reference (tuple): (lat [deg], lon [deg], height [m]) of the reference point for absPos rows.
+        vertical_scale (float): Factor of the down component in the relPos 'Distance', see convert.distance().
+
+    Returns:
+        pandas.DataFrame: The session with the derived columns.
+    '''
+    if tuple(df.columns) not in VARIANTS:
+        return df
+    normalized = normalize(df)
+    df = df.copy()
+    df['Time'] = normalized['time'].to_numpy()
+    for column, source in (('Rel_N', 'rel_n'), ('Rel_E', 'rel_e'), ('Rel_D', 'rel_d'),
+                           ('Lon', 'lon'), ('Lat', 'lat'), ('Height', 'height')):
+        df[column] = normalized[source].to_numpy()
+
+    df['Distance'] = distance(normalized, reference, vertical_scale)
+    return df
+
+
+class SessionCache:
+    '''
+    Least recently used on-disk cache of enriched sessions.
+
+    Entries are Parquet files named by a key made of the content hash of the
+    CSV, the cache and normalization versions and the reference point, so a
+    modified file or a change in the processing never returns stale data. The
+    hash of each path is memoized by mtime and size, so a hit does not read
+    the CSV. When the cache exceeds 'max_bytes', the least recently used
+    entries are removed.
+
+    Args:
+        cache_dir (str): Cache directory. Defaults to '~/.cache/5G_characterization'.
+        max_bytes (int): Size budget in bytes. Default is 2 GiB.
+
+    Methods
+    -------
+        load(path: str, reference: tuple) -> pandas.DataFrame:
+            Returns the enriched session, from the cache when possible.
+        clear() -> None:
+            Removes all the entries.
+    '''
+
+    def __init__(self, cache_dir:str = None, max_bytes:int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = {'entries': {}, 'hashes': {}}
+        if os.path.isfile(self.index_path):
+            try:
+                with open(self.index_path) as file:
+                    self.index = json.load(file)
+            except (OSError, ValueError):
+                pass
+
+    def _saveIndex(self) -> None:
+        with open(self.index_path + '.tmp', 'w') as file:
+            json.dump(self.index, file)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def _hash(self, path:str) -> str:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        memo = self.index['hashes'].get(path)
+        if memo and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return memo[2]
+        digest = file_hash(path)
+        self.index['hashes'][path] = [stat.st_mtime_ns, stat.st_size, digest]
+        return digest
+
+    def _key(self, path:str, reference, vertical_scale:float) -> str:
+        parts = f"{self._hash(path)}|{CACHE_VERSION}|{NORMALIZATION_VERSION}|{reference}|{vertical_scale}"
+        return hashlib.blake2b(parts.encode(), digest_size=16).hexdigest()
+
+    def _evict(self) -> None:
+        entries = self.index['entries']
+        total = sum(entry['bytes'] for entry in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]['bytes']
+            try:
+                os.remove(os.path.join(self.cache_dir, key + '.parquet'))
+            except FileNotFoundError:
+                pass
+            del entries[key]
+
+    def load(self, path:str, reference:tuple = None, vertical_scale:float = 1.0) -> pd.DataFrame:
+        '''
+        Returns the enriched session of a CSV file, parsing it only on a cache miss.
+
+        Args:
+            path (str): Session CSV file.
+            reference (tuple): (lat [deg], lon [deg], height [m]) of the reference point, see enrich().
+            vertical_scale (float): Factor of the down component in the relPos 'Distance', see enrich().
+
+        Returns:
+            pandas.DataFrame: The session with the derived columns.
+        '''
+        reference = None if reference is None else tuple(float(value) for value in reference)
+        vertical_scale = float(vertical_scale)
+        key = self._key(path, reference, vertical_scale)
+        entry_path = os.path.join(self.cache_dir, key + '.parquet')
+        entry = self.index['entries'].get(key)
+        df = None
+        if entry is not None and os.path.isfile(entry_path):
+            try:
+                df = pd.read_parquet(entry_path)
+            except (OSError, ValueError):
+                df = None
+        if df is None:
+            df = enrich(pd.read_csv(path), reference, vertical_scale)
+            df.to_parquet(entry_path + '.tmp', index=False)
+            os.replace(entry_path + '.tmp', entry_path)
+            entry = {'source': os.path.abspath(path), 'bytes': os.path.getsize(entry_path)}
+            self.index['entries'][key] = entry
+        entry['last_used'] = time()
+        self._evict()
+        self._saveIndex()
+        return df
+
+    def clear(self) -> None:
+        '''
+        Removes all the entries of the cache.
+
+        Returns:
+            None
+        '''
+        for key in list(self.index['entries']):
+            try:
+                os.remove(os.path.join(self.cache_dir, key + '.parquet'))
+            except FileNotFoundError:
+                pass
+        self.index = {'entries': {}, 'hashes': {}}
+        self._saveIndex()
+
+
+def load_session(path:str, reference:tuple = None, cache_dir:str = None,
+                 max_bytes:int = DEFAULT_MAX_BYTES, vertical_scale:float = 1.0) -> pd.DataFrame:
+    '''
+    Loads a session CSV through the default SessionCache: drop-in replacement
+    of pandas.read_csv in the analysis scripts, with the derived columns of enrich().
+
+    Args:
+        path (str): Session CSV file.
+        reference (tuple): (lat [deg], lon [deg], height [m]) of the reference point for absPos rows.
+        cache_dir (str): Cache directory. Defaults to '~/.cache/5G_characterization'.
+        max_bytes (int): Size budget of the cache in bytes. Default is 2 GiB.
+        vertical_scale (float): Factor of the down component in the relPos 'Distance', see enrich().
+
+    Returns:
+        pandas.DataFrame: The session with the derived columns.
+    '''
+    return SessionCache(cache_dir, max_bytes).load(path, reference, vertical_scale)
@@ -0,0 +1,243 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Readiness-based startup of the session devices. The USRP,
+                the GPS and the aiming module are opened and started
+                concurrently, each one in its own thread, and the session
+                proceeds as soon as every device reports it is ready (frames
+                flowing, an RTK solution of the required type, a valid aiming
+                reading) instead of after fixed waits, with a timeout.
+'''
+
+import threading
+from time import monotonic, sleep
+from gps import CARRIER_SOLUTIONS, carrier_solution
+
+
+def usrp_streaming(usrp) -> bool:
+    '''
+    Readiness of a USRP: the reception thread has completed a frame.
+    '''
+    return usrp.rx_time is not None
+
+
+def aiming_reading(aiming) -> bool:
+    '''
+    Readiness of an RAiming: a valid reading has been received.
+    '''
+    return aiming.latestRecord() is not None
+
+
+def gps_message(gps) -> bool:
+    '''
+    Readiness of a GPS without a fix requirement: a message has been received (e.g. indoors).
+    '''
+    return gps.gps_time is not None
+
+
+def gps_fix(solution:str = 'fixed'):
+    '''
+    Readiness of a GPS: a position message with at least the required RTK solution.
+
+    Args:
+        solution (str): 'fixed' or 'float' (NAV-RELPOSNED carrier solution), or 'none' for any valid
+                        position (including NAV-HPPOSLLH). Default is 'fixed'.
+
+    Returns:
+        callable: ready(gps) -> bool.
+    '''
+    if solution not in CARRIER_SOLUTIONS:
+        raise ValueError("Unrecognized solution, only 'none', 'float', 'fixed' are valid.")
+    required = CARRIER_SOLUTIONS.index(solution)
+
+    def ready(gps) -> bool:
+        for _, parsed_data in gps.getRecords():
+            found = carrier_solution(parsed_data)
+            if found is not None and CARRIER_SOLUTIONS.index(found) >= required:
+                return True
+            if required == 0 and hasattr(parsed_data, 'lon') and not getattr(parsed_data, 'invalidLlh', 0):
+                return True
+        return False
+    return ready
+
+
+class DeviceStartup:
+    '''
+    Opens, starts and waits for the readiness of several devices concurrently.
+
+    Each device is described by the functions that open it (e.g. the class
+    constructor), start its sampling thread, tell whether it is ready and
+    stop it. run() calls them for all the devices at once, one thread per
+    device, and returns when all of them are ready or at the timeout, so the
+    startup lasts as long as the slowest device instead of the sum of all of
+    them (plus fixed waits).
+
+    Usage:
+        startup = DeviceStartup(timeout=60)
+        startup.add("usrp", lambda: USRP(rx_center_freq=frequency, rx_gain=gain_rx),
+                    start=USRP.startRxThread, ready=usrp_streaming, stop=USRP.stopRxThread)
+        startup.add("gps", lambda: GPS(port=gps_port), start=GPS.startGPSThread,
+                    ready=gps_fix('fixed'), stop=GPS.stopGPSThread)
+        devices = startup.run()
+
+    Args:
+        timeout (float): Maximum seconds for all the devices to be ready. Default is 60.
+        poll_interval (float): Seconds between readiness checks. Default is 50 ms.
+        log (callable): Receives the progress messages (from the startup threads), None for no
+                        messages. Default is print.
+
+    Attributes:
+        devices (dict): Name -> device, for the devices opened.
+        status (dict): Name -> 'pending', 'opening', 'starting', 'waiting', 'ready', 'failed' or 'timeout'.
+        errors (dict): Name -> error message of the devices that failed.
+        times (dict): Name -> seconds from the start of run() until the device was ready.
+
+    Methods
+    -------
+        add(name: str, open: callable, start: callable, ready: callable, stop: callable) -> None:
+            Adds a device: open() -> device, start(device), ready(device) -> bool, stop(device).
+            If start() fails, stop() is still called to release the device opened.
+        run(strict: bool) -> dict:
+            Starts all the devices and waits for them; returns the devices ready.
+        allReady() -> bool:
+            True if every device is ready.
+        stopAll() -> None:
+            Stops the devices started.
+        getStats() -> dict:
+            Status and time to ready of each device, and the total startup time.
+    '''
+
+    def __init__(self, timeout:float = 60.0, poll_interval:float = 0.05, log = print) -> None:
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.log = log
+        self.devices = {}
+        self.status = {}
+        self.errors = {}
+        self.times = {}
+        self.elapsed = None
+        self._specs = {}
+        self._started = set()
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+
+    def add(self, name:str, open, start = None, ready = None, stop = None) -> None:
+        if name in self._specs:
+            raise ValueError(f"Device '{name}' already added.")
+        self._specs[name] = (open, start, ready, stop)
+        self.status[name] = 'pending'
+
+    def _log(self, message:str) -> None:
+        if self.log is not None:
+            self.log(message)
+
+    # Private function, thread of each device in 'run()'
+    def _startDevice(self, name:str, origin:float) -> None:
+        open, start, ready, stop = self._specs[name]
+        try:
+            self.status[name] = 'opening'
+            device = open()
+            self.devices[name] = device
+            if start is not None:
+                self.status[name] = 'starting'
+                with self._lock:
+                    # Registered before start(), so a partially started device is released on failure
+                    self._started.add(name)
+                start(device)
+            self.status[name] = 'waiting'
+            while ready is not None and not ready(device):
+                if self._abort.is_set():
+                    break
+                sleep(self.poll_interval)
+            if self._abort.is_set():
+                # Not ready in time, the device is not handed over
+                self.status[name] = 'timeout'
+                self._stopDevice(name)
+                return
+            self.times[name] = monotonic() - origin
+            self.status[name] = 'ready'
+            self._log(f"{name} ready in {self.times[name]:.2f} s")
+        except Exception as e:
+            self.errors[name] = str(e)
+            self.status[name] = 'failed'
+            self._log(f"{name} failed: {e}")
+            self._stopDevice(name)
+
+    def run(self, strict:bool = True) -> dict:
+        '''
+        Opens and starts all the devices concurrently and waits until they are ready.
+
+        Args:
+            strict (bool): If any device is not ready at the timeout or failed, stop all the devices
+                           and raise an error. Otherwise return the devices ready (the ones not
+                           ready are stopped). Default is True.
+
+        Returns:
+            dict: Name -> device, for the devices ready.
+
+        Raises:
+            TimeoutError: strict and some device was not ready in time.
+            RuntimeError: strict and some device failed to open or start.
+        '''
+        origin = monotonic()
+        self._abort.clear()
+        threads = [threading.Thread(target=self._startDevice, args=(name, origin),
+                                    name=f"{name.upper()}_STARTUP_THREAD", daemon=True)
+                   for name in self._specs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(max(0.0, origin + self.timeout - monotonic()))
+        self._abort.set()
+        self.elapsed = monotonic() - origin
+
+        for name, status in self.status.items():
+            if status not in ('ready', 'failed'):
+                self.status[name] = 'timeout'
+                self._log(f"{name} not ready after {self.timeout} s")
+                self._stopDevice(name)
+        if strict and not self.allReady():
+            self.stopAll()
+            pending = ", ".join(f"{name} ({status})" for name, status in self.status.items() if status != 'ready')
+            if self.errors:
+                raise RuntimeError(f"Devices not ready: {pending}. Errors: {self.errors}")
+            raise TimeoutError(f"Devices not ready in {self.timeout} s: {pending}.")
+        return {name: self.devices[name] for name, status in self.status.items() if status == 'ready'}
+
+    def allReady(self) -> bool:
+        return all(status == 'ready' for status in self.status.values())
+
+    def _stopDevice(self, name:str) -> None:
+        with self._lock:
+            if name not in self._started:
+                return
+            self._started.discard(name)
+        stop = self._specs[name][3]
+        if stop is not None:
+            try:
+                stop(self.devices[name])
+            except Exception as e:
+                print(f"Error stopping {name}: {e}")
+
+    def stopAll(self) -> None:
+        for name in list(self._started):
+            self._stopDevice(name)
+
+    def getStats(self) -> dict:
+        return {
+            'elapsed': self.elapsed,
+            'status': dict(self.status),
+            'time_to_ready': dict(self.times),
+            'errors': dict(self.errors),
+        }
@@ -0,0 +1,355 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Out-of-core processing of the sessions. A session is read as a
+                stream of normalized chunks and reduced with incremental
+                aggregations of bounded size: t-digest quantile sketches per
+                distance bin, running least squares fits and filtered
+                counters, so the memory use does not depend on the length of
+                the session.
+'''
+
+import numpy as np
+import pandas as pd
+from angles import angular_difference
+from compression import open_session
+from convert import normalize, distance, VARIANTS
+
+
+DEFAULT_CHUNKSIZE = 100000
+
+
+def iter_chunks(path:str, chunksize:int = DEFAULT_CHUNKSIZE, reference:tuple = None):
+    '''
+    Reads a session as a stream of normalized chunks.
+
+    Args:
+        path (str): Session CSV file (plain or compressed).
+        chunksize (int): Rows per chunk. Default is 100000.
+        reference (tuple): (lat [deg], lon [deg], height [m]) of the reference point for the
+                           'distance' column of the absPos rows.
+
+    Yields:
+        pandas.DataFrame: Chunk normalized by convert.normalize(), with an added 'distance' column [m].
+
+    Raises:
+        ValueError: If the header is not a known measurement variant.
+    '''
+    with open_session(path) as file:
+        for chunk in pd.read_csv(file, chunksize=chunksize):
+            if tuple(chunk.columns) not in VARIANTS:
+                raise ValueError(f"Unrecognized header variant: {','.join(chunk.columns)}")
+            normalized = normalize(chunk.reset_index(drop=True))
+            normalized['distance'] = distance(normalized, reference)
+            yield normalized
+
+
+class TDigest:
+    '''
+    Mergeable quantile sketch (merging t-digest, scale function k1).
+
+    The values are kept as about 'delta' weighted centroids (at most 2·delta),
+    small near the tails and larger near the median, so the quantiles have a
+    small relative error with a memory independent of the number of values.
+    A centroid spans at most one unit of the scale function
+    k(q) = delta/pi·asin(2q - 1), k(q_right) - k(q_left) <= 1.
+
+    Args:
+        delta (int): Compression; larger values are more accurate. Default is 100.
+        buffer_size (int): Values buffered before a compression. Default is 5000.
+
+    Attributes:
+        count (float): Total weight added.
+        min (float): Minimum value added.
+        max (float): Maximum value added.
+
+    Methods
+    -------
+        update(values: array_like, weights: array_like) -> None:
+            Adds values to the sketch.
+        merge(other: TDigest) -> None:
+            Adds the content of another sketch.
+        quantile(q: float or array_like) -> float or numpy.ndarray:
+            Estimates quantiles in [0, 1].
+        median() -> float:
+            Estimates the median.
+    '''
+
+    def __init__(self, delta:int = 100, buffer_size:int = 5000) -> None:
+        self.delta = delta
+        self.buffer_size = buffer_size
+        self.count = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer_means = []
+        self._buffer_weights = []
+        self._buffered = 0
+
+    def update(self, values, weights = None) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float).ravel()
+        valid = ~np.isnan(values)
+        values, weights = values[valid], weights[valid]
+        if values.size == 0:
+            return
+        self.count += weights.sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._buffer_means.append(values)
+        self._buffer_weights.append(weights)
+        self._buffered += values.size
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other:'TDigest') -> None:
+        other._compress()
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._buffer_means.append(other._means)
+        self._buffer_weights.append(other._weights)
+        self._buffered += other._means.size
+        self._compress()
+
+    def _compress(self) -> None:
+        if not self._buffered:
+            return
+        means = np.concatenate([self._means] + self._buffer_means)
+        weights = np.concatenate([self._weights] + self._buffer_weights)
+        self._buffer_means, self._buffer_weights, self._buffered = [], [], 0
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        # Merge the sorted points from the left while the centroid spans at most
+        # one unit of k, k(q_right) - k(q_left) <= 1; the last point of each
+        # centroid is found with a binary search, one step per centroid
+        cumulative = np.cumsum(weights)
+        q_right = cumulative / cumulative[-1]
+        ends, end, q_left = [], 0, 0.0
+        while end < means.size:
+            k_limit = self.delta/np.pi * np.arcsin(2*q_left - 1) + 1
+            q_limit = (np.sin(np.pi*k_limit/self.delta) + 1)/2 if k_limit < self.delta/2 else 1.0
+            end = max(int(np.searchsorted(q_right, q_limit, side='right')), end + 1)
+            ends.append(end)
+            q_left = q_right[end - 1]
+        groups = np.repeat(np.arange(len(ends)), np.diff(ends, prepend=0))
+        self._weights = np.bincount(groups, weights=weights)
+        self._means = np.bincount(groups, weights=means*weights) / self._weights
+
+    def quantile(self, q):
+        self._compress()
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)[()]
+        # Interpolate between the centroid centers, anchored at the min and max
+        centers = np.cumsum(self._weights) - self._weights/2
+        positions = np.concatenate(([0.0], centers, [self.count]))
+        values = np.concatenate(([self.min], self._means, [self.max]))
+        return np.interp(q * self.count, positions, values)[()]
+
+    def median(self) -> float:
+        return float(self.quantile(0.5))
+
+    def __len__(self) -> int:
+        self._compress()
+        return self._means.size
+
+
+class BinnedQuantiles:
+    '''
+    Quantiles of a value by bins of a key (e.g. PowerRx by distance bins),
+    with a TDigest per bin.
+
+    Args:
+        bin_width (float): Width of the bins of the key. Default is 1.0.
+        delta (int): Compression of the TDigest of each bin. Default is 100.
+
+    Methods
+    -------
+        update(keys: array_like, values: array_like) -> None:
+            Adds (key, value) pairs; pairs with a NaN key or value are ignored.
+        result(quantiles: tuple) -> pandas.DataFrame:
+            Returns the count and the quantiles of each bin.
+    '''
+
+    def __init__(self, bin_width:float = 1.0, delta:int = 100) -> None:
+        self.bin_width = bin_width
+        self.delta = delta
+        self.digests = {}
+
+    def update(self, keys, values) -> None:
+        keys = np.asarray(keys, dtype=float)
+        values = np.asarray(values, dtype=float)
+        valid = ~(np.isnan(keys) | np.isnan(values))
+        bins = np.floor(keys[valid] / self.bin_width).astype(np.int64)
+        values = values[valid]
+        order = np.argsort(bins, kind='stable')
+        bins, values = bins[order], values[order]
+        unique, starts = np.unique(bins, return_index=True)
+        for b, segment in zip(unique, np.split(values, starts[1:])):
+            if b not in self.digests:
+                self.digests[b] = TDigest(self.delta)
+            self.digests[b].update(segment)
+
+    def result(self, quantiles:tuple = (0.5,)) -> pd.DataFrame:
+        bins = sorted(self.digests)
+        df = pd.DataFrame({'bin': (np.array(bins, dtype=float) + 0.5) * self.bin_width,
+                           'count': [int(self.digests[b].count) for b in bins]})
+        for q in quantiles:
+            df[f'q{q:g}'] = [self.digests[b].quantile(q) for b in bins]
+        return df
+
+
+class RunningFit:
+    '''
+    Running least squares fit of y = a + b*x, from the sufficient statistics
+    of the data (no data kept).
+
+    Args:
+        log_x (bool): Fit against 10*log10(x), as the log-distance path loss model. Default is False.
+
+    Attributes:
+        n (int): Number of points.
+
+    Methods
+    -------
+        update(x: array_like, y: array_like) -> None:
+            Adds points; points with NaN (or non positive x with log_x) are ignored.
+        merge(other: RunningFit) -> None:
+            Adds the points of another fit.
+        coefficients() -> tuple:
+            Returns (a, b).
+        r2() -> float:
+            Returns the coefficient of determination.
+        rmse() -> float:
+            Returns the root mean square error of the fit.
+    '''
+
+    def __init__(self, log_x:bool = False) -> None:
+        self.log_x = log_x
+        self.n = 0
+        self._sums = np.zeros(5)     # x, y, xx, xy, yy
+
+    def update(self, x, y) -> None:
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        if self.log_x:
+            valid &= x > 0
+        x, y = x[valid], y[valid]
+        if self.log_x:
+            x = 10*np.log10(x)
+        self.n += x.size
+        self._sums += (x.sum(), y.sum(), (x*x).sum(), (x*y).sum(), (y*y).sum())
+
+    def merge(self, other:'RunningFit') -> None:
+        if other.log_x != self.log_x:
+            raise ValueError("Cannot merge fits with different 'log_x'.")
+        self.n += other.n
+        self._sums += other._sums
+
+    def coefficients(self) -> tuple:
+        sx, sy, sxx, sxy, _ = self._sums
+        den = self.n*sxx - sx*sx
+        if self.n < 2 or den == 0:
+            return (np.nan, np.nan)
+        b = (self.n*sxy - sx*sy) / den
+        return ((sy - b*sx) / self.n, b)
+
+    def _residual(self) -> float:
+        a, b = self.coefficients()
+        sx, sy, sxx, sxy, syy = self._sums
+        return max(syy - 2*a*sy - 2*b*sxy + self.n*a*a + 2*a*b*sx + b*b*sxx, 0.0)
+
+    def r2(self) -> float:
+        sy, syy = self._sums[1], self._sums[4]
+        total = syy - sy*sy/self.n if self.n else 0.0
+        return 1 - self._residual()/total if total > 0 else np.nan
+
+    def rmse(self) -> float:
+        return float(np.sqrt(self._residual()/self.n)) if self.n else np.nan
+
+
+class Counters(dict):
+    '''
+    Named row counters of a stream: add(name, mask) adds the number of True
+    values of a boolean mask (or an integer) to a counter.
+    '''
+
+    def add(self, name:str, mask) -> None:
+        self[name] = self.get(name, 0) + int(np.count_nonzero(mask) if np.ndim(mask) else mask)
+
+
+def path_loss_profile(path:str, reference:tuple = None, window:float = 10.0, bin_width:float = 1.0,
+                      beamwidth = None, quantiles:tuple = (0.5,), chunksize:int = DEFAULT_CHUNKSIZE) -> dict:
+    '''
+    Out-of-core version of the PowerRx vs distance processing of the analysis
+    scripts, for each position type: the bearing is referred to the bearing of
+    the maximum PowerRx, the rows outside +-'window' degrees are discarded, the
+    PowerRx is optionally corrected by the beam pattern and reduced to
+    quantiles by distance bins and a log-distance fit PowerRx = a + b*10*log10(d)
+    (-b is the path loss exponent). The session is read twice, chunk by chunk.
+
+    Args:
+        path (str): Session CSV file (plain or compressed).
+        reference (tuple): (lat [deg], lon [deg], height [m]) of the reference point for absPos rows.
+        window (float): Half width [deg] of the bearing window. Default is 10.
+        bin_width (float): Width [m] of the distance bins. Default is 1.
+        beamwidth (callable): Beam pattern gain [dB] as a function of the bearing offset [deg]; the
+                              PowerRx is corrected by beamwidth(0) - beamwidth(offset). Default is no correction.
+        quantiles (tuple): Quantiles of PowerRx per bin. Default is (0.5,).
+        chunksize (int): Rows per chunk. Default is 100000.
+
+    Returns:
+        dict: For each position type present, a dict with 'bins' (pandas.DataFrame), 'fit'
+              (RunningFit), 'reference_bearing' and 'counters' (Counters).
+    '''
+    # First pass: bearing at the maximum PowerRx of each position type
+    peak = {}
+    for chunk in iter_chunks(path, chunksize, reference):
+        power = chunk['power_rx'].to_numpy(float)
+        for pos_type in chunk['pos_type'].dropna().unique():
+            rows = (chunk['pos_type'] == pos_type).to_numpy() & ~np.isnan(power)
+            if rows.any():
+                index = np.flatnonzero(rows)[np.argmax(power[rows])]
+                if pos_type not in peak or power[index] > peak[pos_type][0]:
+                    peak[pos_type] = (power[index], float(chunk['bearing'].iat[index]))
+
+    results = {pos_type: {'bins': BinnedQuantiles(bin_width), 'fit': RunningFit(log_x=True),
+                          'reference_bearing': bearing, 'counters': Counters()}
+               for pos_type, (_, bearing) in peak.items()}
+    # Second pass: filter, correct and aggregate
+    for chunk in iter_chunks(path, chunksize, reference):
+        for pos_type, result in results.items():
+            rows = chunk[(chunk['pos_type'] == pos_type).to_numpy()]
+            offset = angular_difference(rows['bearing'].to_numpy(float), result['reference_bearing'])
+            inside = np.abs(offset) <= window
+            power = rows['power_rx'].to_numpy(float)[inside]
+            if beamwidth is not None:
+                power = power + beamwidth(0) - beamwidth(offset[inside])
+            dist = rows['distance'].to_numpy(float)[inside]
+            result['bins'].update(dist, power)
+            result['fit'].update(dist, power)
+            counters = result['counters']
+            counters.add('rows', len(rows))
+            counters.add('in_window', inside)
+            counters.add('valid', ~(np.isnan(dist) | np.isnan(power)))
+
+    for result in results.values():
+        result['bins'] = result['bins'].result(quantiles)
+    return results
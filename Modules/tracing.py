@@ -0,0 +1,181 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Opt-in tracing of the acquisition threads. Spans, instant
+                events and counters are appended to a buffer of the thread
+                that records them and written at the end of the session as a
+                Chrome trace (JSON), which can be opened in chrome://tracing
+                or ui.perfetto.dev to see the timeline of every thread
+                (USRP_RX_THREAD, GPS_THREAD, AIMING_THREAD, FUSION_THREAD,
+                WRITER_THREAD...), their stalls and GIL contention.
+'''
+
+import os
+import json
+import threading
+from time import perf_counter_ns
+
+
+class _Buffer:
+    __slots__ = ('events', 'tid', 'name')
+
+    def __init__(self) -> None:
+        thread = threading.current_thread()
+        self.events = []
+        self.tid = threading.get_ident()
+        self.name = thread.name
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer:'Tracer', name:str, cat:str, args:dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = perf_counter_ns()
+        self.tracer.complete(self.name, self.start, end - self.start, self.cat, self.args)
+
+
+class Tracer:
+    '''
+    Records the events of the threads of a session in the Chrome trace format.
+
+    Every thread appends its events to its own list (registered once, on its
+    first event), so recording takes no lock: an append is atomic under the
+    GIL. The events are kept as tuples with perf_counter_ns() times and only
+    converted to JSON by save(). Each thread keeps at most 'max_events'
+    events, the following ones are dropped and counted.
+
+    Usage:
+        tracer = Tracer()
+        with tracer.span('recv'):
+            ...
+        tracer.counter('writer_queue', rows=120)
+        tracer.save('session.trace.json')
+
+    Args:
+        max_events (int): Maximum events recorded by each thread. Default is 1000000.
+
+    Attributes:
+        dropped (int): Events dropped because the buffer of their thread was full.
+
+    Methods
+    -------
+        span(name: str, cat: str, args: dict) -> context manager:
+            Records the duration of a block as a complete event.
+        complete(name: str, start_ns: int, duration_ns: int, cat: str, args: dict) -> None:
+            Records a complete event from its start [perf_counter_ns] and duration [ns].
+        begin(name: str, cat: str) -> None:
+            Opens a span in the calling thread.
+        end(name: str, cat: str) -> None:
+            Closes the last span opened in the calling thread.
+        instant(name: str, cat: str, args: dict) -> None:
+            Records an instant event.
+        counter(name: str, **values) -> None:
+            Records the values of a counter track.
+        getEvents() -> list:
+            The events in Chrome trace format, with the thread names.
+        save(path: str) -> str:
+            Writes the trace JSON file and returns its path.
+        clear() -> None:
+            Removes the recorded events.
+    '''
+
+    def __init__(self, max_events:int = 1_000_000) -> None:
+        self.max_events = max_events
+        self.dropped = 0
+        self.pid = os.getpid()
+        self._origin = perf_counter_ns()
+        self._local = threading.local()
+        self._buffers = []
+        self._lock = threading.Lock()       # Only taken to register the buffer of a new thread
+
+    def _events(self) -> list:
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = _Buffer()
+            with self._lock:
+                self._buffers.append(buffer)
+        if len(buffer.events) >= self.max_events:
+            self.dropped += 1
+            return None
+        return buffer.events
+
+    def _append(self, event:tuple) -> None:
+        events = self._events()
+        if events is not None:
+            events.append(event)
+
+    def span(self, name:str, cat:str = "acq", args:dict = None):
+        return _Span(self, name, cat, args)
+
+    def complete(self, name:str, start_ns:int, duration_ns:int, cat:str = "acq", args:dict = None) -> None:
+        self._append(('X', name, cat, start_ns, duration_ns, args))
+
+    def begin(self, name:str, cat:str = "acq") -> None:
+        self._append(('B', name, cat, perf_counter_ns(), None, None))
+
+    def end(self, name:str, cat:str = "acq") -> None:
+        self._append(('E', name, cat, perf_counter_ns(), None, None))
+
+    def instant(self, name:str, cat:str = "acq", args:dict = None) -> None:
+        self._append(('i', name, cat, perf_counter_ns(), None, args))
+
+    def counter(self, name:str, **values) -> None:
+        self._append(('C', name, "counter", perf_counter_ns(), None, values))
+
+    def getEvents(self) -> list:
+        with self._lock:
+            buffers = list(self._buffers)
+        trace = [{'ph': 'M', 'name': 'process_name', 'pid': self.pid, 'tid': 0,
+                  'args': {'name': 'acquisition'}}]
+        for buffer in buffers:
+            trace.append({'ph': 'M', 'name': 'thread_name', 'pid': self.pid, 'tid': buffer.tid,
+                          'args': {'name': buffer.name}})
+            for ph, name, cat, start, duration, args in list(buffer.events):
+                # Chrome trace times are in microseconds
+                event = {'ph': ph, 'name': name, 'cat': cat, 'pid': self.pid, 'tid': buffer.tid,
+                         'ts': (start - self._origin)/1e3}
+                if duration is not None:
+                    event['dur'] = duration/1e3
+                if ph == 'i':
+                    event['s'] = 't'
+                if args:
+                    event['args'] = args
+                trace.append(event)
+        return trace
+
+    def save(self, path:str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.getEvents(), 'displayTimeUnit': 'ms',
+                       'otherData': {'dropped_events': self.dropped}}, file)
+        return path
+
+    def clear(self) -> None:
+        with self._lock:
+            for buffer in self._buffers:
+                buffer.events.clear()
+        self.dropped = 0
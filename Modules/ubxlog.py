@@ -0,0 +1,280 @@
+'''
+Develop by:
+
+- Julián Andrés Castro Pardo        (juacastropa@unal.edu.co)
+- Diana Sofía López                 (dialopez@unal.edu.co)
+- Carlos Julián Furnieles Chipagra  (cfurniles@unal.edu.co)
+
+  Wireless communications - Professor Javier L. Araque
+  Master in Electronic Engineering
+  UNAL - 2024-1
+
+  Date: 2026-10-18
+
+
+  Description:  Raw UBX session logging for the GPS-RTK (u-blox C94-M8P 2).
+                The raw bytes of every UBX message received are written to a
+                binary '.ubx' log (readable by u-center and pyubx2), together
+                with a sparse offset index. The log can be decoded offline in
+                parallel chunks or replayed through a (virtual) serial port.
+'''
+
+import os
+import struct
+import argparse
+from io import BytesIO
+from time import time_ns, monotonic, sleep
+from concurrent.futures import ProcessPoolExecutor
+from pyubx2 import UBXReader, UBX_PROTOCOL, ERR_IGNORE
+
+
+INDEX_MAGIC = b'UBXIDX1\x00'
+INDEX_HEADER = struct.Struct('<8sI')     # magic, index_every
+INDEX_ENTRY = struct.Struct('<QQq')      # message number, byte offset, epoch time [ns]
+
+
+class UBXLogWriter:
+    '''
+    Tee of the raw UBX messages received from the GPS into a binary log.
+
+    The data file '<filename>' holds the raw UBX bytes exactly as they arrived,
+    one message after the other. The index file '<filename>.idx' holds one entry
+    (message number, byte offset, epoch time in ns) every 'index_every' messages,
+    so a reader can seek to any part of the log without parsing it from the start.
+
+    Args:
+        filename (str): Path of the binary log, usually with '.ubx' extension.
+        index_every (int): Number of messages between index entries. Default is 10.
+
+    Methods
+    -------
+        write(raw_data: bytes) -> None:
+            Appends one raw UBX message to the log.
+        close() -> None:
+            Flushes and closes the log and its index.
+    '''
+
+    def __init__(self, filename: str, index_every: int = 10) -> None:
+        if index_every < 1:
+            raise ValueError("index_every must be a positive number of messages.")
+        self.filename = filename
+        self.index_filename = filename + '.idx'
+        self.index_every = index_every
+
+        self.messages = 0       # Messages written
+        self.offset = 0         # Bytes written
+
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._data = open(self.filename, 'wb')
+        self._index = open(self.index_filename, 'wb')
+        self._index.write(INDEX_HEADER.pack(INDEX_MAGIC, self.index_every))
+
+    def write(self, raw_data: bytes) -> None:
+        '''
+        Appends one raw UBX message to the log, indexing it if needed.
+
+        Args:
+            raw_data (bytes): The raw message as returned by UBXReader.read().
+
+        Returns:
+            None
+        '''
+        if self.messages % self.index_every == 0:
+            self._index.write(INDEX_ENTRY.pack(self.messages, self.offset, time_ns()))
+            self._index.flush()
+        self._data.write(raw_data)
+        self.messages += 1
+        self.offset += len(raw_data)
+
+    def close(self) -> None:
+        '''
+        Flushes and closes the log and its index.
+
+        Returns:
+            None
+        '''
+        if not self._data.closed:
+            self._data.close()
+        if not self._index.closed:
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_index(filename: str) -> list:
+    '''
+    Reads the sparse index of a raw UBX log.
+
+    Args:
+        filename (str): Path of the binary log (not the '.idx' file).
+
+    Returns:
+        list: Index entries as (message number, byte offset, epoch time [ns]) tuples.
+
+    Raises:
+        ValueError: If the index file is not a valid UBX log index.
+    '''
+    with open(filename + '.idx', 'rb') as file:
+        buffer = file.read()
+    if len(buffer) < INDEX_HEADER.size:
+        raise ValueError(f"Invalid UBX log index: {filename}.idx")
+    magic, _ = INDEX_HEADER.unpack_from(buffer)
+    if magic != INDEX_MAGIC:
+        raise ValueError(f"Invalid UBX log index: {filename}.idx")
+    # Ignore a trailing partial entry (log interrupted while writing the index)
+    end = INDEX_HEADER.size + (len(buffer) - INDEX_HEADER.size) // INDEX_ENTRY.size * INDEX_ENTRY.size
+    return list(INDEX_ENTRY.iter_unpack(buffer[INDEX_HEADER.size:end]))
+
+
+def _decode_chunk(filename: str, start: int, stop: int, extract):
+    # Runs in a worker process: parses the messages in [start, stop) bytes of the log.
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        buffer = file.read(stop - start)
+    ubxr = UBXReader(BytesIO(buffer), protfilter=UBX_PROTOCOL, quitonerror=ERR_IGNORE)
+    rows = []
+    for _, parsed_data in ubxr:
+        if parsed_data is None:
+            continue
+        row = extract(parsed_data)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+class UBXLogReader:
+    '''
+    Offline reader of a raw UBX log written by UBXLogWriter.
+
+    The sparse index splits the log in byte ranges aligned to message boundaries,
+    which are decoded in parallel across a process pool.
+
+    Args:
+        filename (str): Path of the binary log.
+
+    Methods
+    -------
+        chunks(n_chunks: int) -> list:
+            Splits the log in byte ranges aligned to indexed messages.
+        decode(extract, workers: int, n_chunks: int) -> list:
+            Decodes the whole log in parallel and returns the extracted rows in order.
+        replay(port: str, baudrate: int, speed: float) -> int:
+            Pushes the raw bytes back through a serial port at N× real time.
+    '''
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.index = read_index(filename)
+        self.size = os.path.getsize(filename)
+
+    def chunks(self, n_chunks: int) -> list:
+        '''
+        Splits the log in (at most) 'n_chunks' byte ranges aligned to indexed messages.
+
+        Args:
+            n_chunks (int): Desired number of chunks.
+
+        Returns:
+            list: (start, stop) byte offsets of each chunk.
+        '''
+        offsets = [entry[1] for entry in self.index if entry[1] < self.size]
+        if not offsets:
+            return [(0, self.size)] if self.size else []
+        step = max(1, -(-len(offsets) // max(1, n_chunks)))     # ceil division
+        starts = offsets[::step]
+        stops = starts[1:] + [self.size]
+        return list(zip(starts, stops))
+
+    def decode(self, extract=None, workers: int = None, n_chunks: int = None) -> list:
+        '''
+        Decodes the whole log in parallel across a process pool.
+
+        Args:
+            extract (callable): Picklable function applied to every parsed UBXMessage;
+                                messages for which it returns None are discarded.
+                                Defaults to gps.format_ubx (same rows as GPS.format_GPSData).
+            workers (int): Number of worker processes. Defaults to os.cpu_count().
+            n_chunks (int): Number of chunks. Defaults to 4 chunks per worker.
+
+        Returns:
+            list: Extracted rows, in log order.
+        '''
+        if extract is None:
+            from gps import format_ubx
+            extract = format_ubx
+        workers = workers or os.cpu_count() or 1
+        chunks = self.chunks(n_chunks or 4 * workers)
+        if workers == 1 or len(chunks) <= 1:
+            results = [_decode_chunk(self.filename, start, stop, extract) for start, stop in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_decode_chunk,
+                                        [self.filename] * len(chunks),
+                                        [start for start, _ in chunks],
+                                        [stop for _, stop in chunks],
+                                        [extract] * len(chunks)))
+        return [row for rows in results for row in rows]
+
+    def replay(self, port: str, baudrate: int = 19200, speed: float = 1.0) -> int:
+        '''
+        Pushes the raw bytes of the log back through a serial port.
+
+        The bytes between two index entries are written at the pace recorded in
+        the index, scaled by 'speed'. The port can be any pyserial URL or device,
+        e.g. one end of a com0com/socat virtual serial pair, whose other end is
+        opened by the GPS class as if it were the receiver.
+
+        Args:
+            port (str): Serial port name or pyserial URL.
+            baudrate (int): Baud rate of the port. Default is 19200.
+            speed (float): Replay speed as a multiple of real time; 0 or None
+                           replays as fast as possible. Default is 1.0.
+
+        Returns:
+            int: Number of bytes written.
+        '''
+        from serial import serial_for_url
+
+        boundaries = [(offset, t_ns) for _, offset, t_ns in self.index if offset < self.size]
+        boundaries.append((self.size, boundaries[-1][1] if boundaries else 0))
+        written = 0
+        with serial_for_url(port, baudrate=baudrate) as serial, open(self.filename, 'rb') as file:
+            start_clock = monotonic()
+            start_ns = boundaries[0][1]
+            for (offset, _), (next_offset, next_ns) in zip(boundaries, boundaries[1:]):
+                file.seek(offset)
+                written += serial.write(file.read(next_offset - offset))
+                if speed:
+                    # Wait for the recorded time of the next indexed message
+                    delay = start_clock + (next_ns - start_ns) / 1e9 / speed - monotonic()
+                    if delay > 0:
+                        sleep(delay)
+            serial.flush()
+        return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode or replay raw UBX logs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    decode_parser = subparsers.add_parser("decode", help="Decode a log in parallel and print its rows.")
+    decode_parser.add_argument("log")
+    decode_parser.add_argument("--workers", type=int, default=None)
+    replay_parser = subparsers.add_parser("replay", help="Replay a log through a serial port.")
+    replay_parser.add_argument("log")
+    replay_parser.add_argument("port")
+    replay_parser.add_argument("--baudrate", type=int, default=19200)
+    replay_parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    reader = UBXLogReader(args.log)
+    if args.command == "decode":
+        for row in reader.decode(workers=args.workers):
+            print(row)
+    else:
+        print(f"{reader.replay(args.port, args.baudrate, args.speed)} bytes replayed.")
@@ -22,8 +22,7 @@ Develop by:
 import uhd
 import threading
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+from time import monotonic, perf_counter_ns
 
 class USRP:
     '''
@@ -61,8 +60,10 @@ class USRP:
         tx_gain (float): The gain for the transmitter.
         tx_buffer_length (int): The length of the transmit buffer.
         rx_samples (numpy.ndarray): Array to hold received samples.
+        rx_time (float): Time at which the last frame was completed [s, time.monotonic()].
         rx_thread (threading.Thread): Thread for receiving samples.
         rx_continuous_sampling (bool): Flag for continuous sampling.
+        instruments (Instrumentation): Records the 'usrp_recv' latency of each frame, None if disabled.
         _usrp (uhd.usrp.MultiUSRP): The USRP device instance.
     
     Methods
@@ -138,8 +139,10 @@ class USRP:
 
         # Attributes needed for threading
         self.rx_samples = np.zeros(self.rx_num_samps, dtype=np.complex64)   # Allows access to samples
+        self.rx_time = None                                                 # Time of the last frame
         self.rx_thread = None                                               # Reception thread
         self.rx_continuous_sampling = True                                  # Allows continuous sampling function
+        self.instruments = None                                             # Instrumentation, records 'usrp_recv'
 
 
         try:
@@ -290,9 +293,13 @@ class USRP:
         '''
         # Get 1 frame of raw data
         # self.rx_samples = np.zeros(self.rx_num_samps, dtype=np.complex64) # Already declared in the constructor
+        start = perf_counter_ns()
         for i in range(self.rx_num_samps//self.rx_buffer_length):
             self.rx_streamer.recv(self.recv_buffer, self.rx_metadata)
             self.rx_samples[i*self.rx_buffer_length:(i+1)*self.rx_buffer_length] = self.recv_buffer[0]  #Save every pow of 2 samples
+        self.rx_time = monotonic()
+        if self.instruments is not None:
+            self.instruments.record('usrp_recv', perf_counter_ns() - start)
         return self.rx_samples
     
     # WARNING: ONLY USE IN A DAEMON THREAD!!!
@@ -390,7 +397,8 @@ class USRP:
             None
         '''
         self.rx_continuous_sampling = False     # Stop _continuousRxSampling
-        self.rx_thread.join()                   # Waits to USRP_RX_THREAD to finish
+        if self.rx_thread is not None:
+            self.rx_thread.join()               # Waits to USRP_RX_THREAD to finish
         self.stopRxStream()                     # Stop USRP transmission to host
 
     '''-------------------------------------------------------------------------------------------------------------------------------
@@ -503,6 +511,10 @@ To do:
 '''------------------------------------------------------------------------------------------'''
 
 def spectrum(usrp_test:USRP, tx = False, signal = np.ones(10)):
+        # Plotting only: imported here so the capture path does not load matplotlib
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+
         frequency = np.fft.fftshift(np.fft.fftfreq(usrp_test.rx_num_samps,d=1/usrp_test.rx_sample_rate)) + usrp_test.rx_center_freq
         window = np.hamming(usrp_test.rx_num_samps)
         spec = np.zeros(usrp_test.rx_num_samps)
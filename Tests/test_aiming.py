@@ -0,0 +1,70 @@
+# test_aiming.py - Binary aiming frames checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import aiming
+from aiming import decode_frames, encode_frame
+
+
+def test_decode_skips_garbage_and_keeps_partial_frame():
+    frames = [encode_frame(seq, 10.0*seq, 1.0, 2.0, 3, 25.0) for seq in range(4)]
+    corrupted = bytearray(frames[2])
+    corrupted[6] ^= 0xFF
+    buffer = b'\x00\xaa' + frames[0] + b'\xaa\x55\x01' + frames[1] + bytes(corrupted) + frames[3] + frames[0][:10]
+    decoded, consumed = decode_frames(buffer)
+    assert decoded['seq'].tolist() == [0, 1, 3]
+    assert decoded['bearing'].tolist() == [0.0, 10.0, 30.0]
+    assert buffer[consumed:] == frames[0][:10]
+
+
+def test_decode_empty_and_sync_split():
+    decoded, consumed = decode_frames(b'')
+    assert len(decoded) == 0 and consumed == 0
+    decoded, consumed = decode_frames(b'\x01\x02\xaa')
+    assert len(decoded) == 0 and consumed == 2
+
+
+class FakeSerial:
+    '''Serial port that returns the queued bytes.'''
+
+    def __init__(self, **kwargs) -> None:
+        self.data = bytearray()
+
+    def reset_input_buffer(self) -> None:
+        pass
+
+    def read(self, size:int = 1) -> bytes:
+        chunk = bytes(self.data[:size])
+        del self.data[:size]
+        return chunk
+
+    def close(self) -> None:
+        pass
+
+
+def binary_reader() -> aiming.RAiming:
+    serial = aiming.Serial
+    aiming.Serial = FakeSerial
+    try:
+        return aiming.RAiming(protocol="binary")
+    finally:
+        aiming.Serial = serial
+
+
+def test_get_aiming_without_frame_returns_five_fields():
+    reader = binary_reader()
+    reader.serial.data += b'\x00' * 10
+    bearing, pitch, roll, cal_stat, temp = reader.getAiming()
+    assert (bearing, pitch, roll, cal_stat, temp) == (None, None, None, None, None)
+
+
+def test_get_aiming_flush_is_not_a_loss():
+    reader = binary_reader()
+    reader.serial.data += encode_frame(100, 10.0, 1.0, 2.0, 3, 25.0)
+    assert reader.getAiming()[0] == 10.0
+    # Frames 101..499 are flushed by the next blocking read, not lost
+    reader.serial.data += encode_frame(500, 20.0, 1.0, 2.0, 3, 25.0)
+    assert reader.getAiming()[0] == 20.0
+    assert reader.lost_frames == 0
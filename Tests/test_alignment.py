@@ -0,0 +1,62 @@
+# test_alignment.py - TimestampJoin checks (run with: python -m pytest Tests)
+
+import os
+import sys
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+from acquisition import Producer
+from alignment import TimestampJoin
+
+
+class HistoryProducer(Producer):
+    '''Producer with a fixed history, GPS-like values.'''
+    numeric_fields = (0, 1, 2, 3, 4, 5)
+
+    def __init__(self, samples:list) -> None:
+        super().__init__()
+        self._history = deque(samples)
+        self._times = deque(sample[0] for sample in samples)
+
+    def latest(self):
+        return self._history[-1]
+
+    def timeline(self) -> tuple:
+        return self._times, self._history
+
+
+def alternating_history(n:int = 40, period:float = 0.05) -> list:
+    # NAV-RELPOSNED and NAV-HPPOSLLH interleaved, as read with GPS(type="all")
+    samples = []
+    for k in range(n):
+        t = k*period
+        if k % 2 == 0:
+            samples.append((t, [100*t, 200*t, 0.0, 1, 1, 1, 'relPos']))
+        else:
+            samples.append((t, [-74 + t, 4.6 + t, 2600.0, 2600, 10, 10, 'absPos']))
+    return samples
+
+
+def test_linear_interpolates_alternating_pos_types():
+    gps = HistoryProducer(alternating_history())
+    join = TimestampJoin(method='linear', tolerance=0.2)
+    for t in (0.51, 0.53):
+        join.push(t)
+    (t_rel, rel), (t_abs, abs_) = [(t, samples['gps']) for t, samples in join.pop({'gps': gps}, now=10.0)]
+
+    # Nearest sample relPos (0.50): interpolated between the relPos samples at 0.50 and 0.60
+    assert rel[6] == 'relPos'
+    assert abs(rel[0] - 100*t_rel) < 1e-9 and abs(rel[1] - 200*t_rel) < 1e-9
+    # Nearest sample absPos (0.55): interpolated between the absPos samples at 0.45 and 0.55
+    assert abs_[6] == 'absPos'
+    assert abs(abs_[0] - (-74 + t_abs)) < 1e-9 and abs(abs_[1] - (4.6 + t_abs)) < 1e-9
+
+
+def test_nearest_without_same_type_neighbour():
+    samples = alternating_history()
+    samples = [sample for sample in samples if not (sample[1][6] == 'relPos' and sample[0] > 0.5)]
+    gps = HistoryProducer(samples)
+    join = TimestampJoin(method='linear', tolerance=0.2)
+    join.push(0.51)
+    [(t, record)] = join.pop({'gps': gps}, now=10.0)
+    assert record['gps'] == samples[10][1]     # No relPos after 0.50, the nearest sample as it is
@@ -0,0 +1,34 @@
+# test_angles.py - Angular statistics checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import numpy as np
+from angles import circular_median, mean_centered_median, wrap_180
+
+
+def arc_cost(angles, center) -> float:
+    return float(np.abs(wrap_180(np.subtract(angles, center))).sum())
+
+
+def test_circular_median_minimizes_the_arc_distance():
+    rng = np.random.default_rng(0)
+    for n in (1, 2, 5, 30):
+        for _ in range(50):
+            angles = rng.uniform(0, 360, n)
+            brute = min(arc_cost(angles, candidate) for candidate in angles)
+            assert abs(arc_cost(angles, circular_median(angles)) - brute) < 1e-9
+
+
+def test_circular_median_across_zero_and_by_axis():
+    assert circular_median([350, 355, 5, 10, 20]) == 5.0
+    assert circular_median([[350, 10], [355, 5], [0, 0]], axis=0).tolist() == [355.0, 5.0]
+    assert np.isnan(circular_median([])) and np.isnan(circular_median([1.0, np.nan]))
+
+
+def test_mean_centered_median_is_an_approximation():
+    angles = [110, 200, 270, 330, 330]
+    assert circular_median(angles) == 330.0
+    assert mean_centered_median(angles) == 270.0
+    assert arc_cost(angles, 270.0) > arc_cost(angles, 330.0)
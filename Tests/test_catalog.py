@@ -0,0 +1,65 @@
+# test_catalog.py - Session catalog checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+from catalog import Catalog, FILE_DATETIME
+from test_convert import HEADER, write_journal
+
+
+def test_journal_indexed_once(tmp_path):
+    campaign = tmp_path / 'Data' / '5G_loss'
+    campaign.mkdir(parents=True)
+    journal = write_journal(campaign / 'journaled', 10, -40.0)
+    with open(campaign / '5G_loss_MEAS_01-08-2024-13-03-52.csv', 'w') as file:
+        file.write(','.join(HEADER) + '\n')
+        file.write('2024-08-01 13:03:52.000,1,2,0,10,10,10,relPos,-60.0,90.0,0.0,0.0,3,25.0\n')
+    session = FILE_DATETIME.findall(os.path.basename(journal))[-1]
+    with open(campaign / f'journaled_METADATA_{session}.csv', 'w') as file:
+        file.write('frequency,gain_rx\n3500000000.0,30\n')
+
+    with Catalog(str(tmp_path / 'Data')) as catalog:
+        assert catalog.scan(workers=1)['added'] == 3
+        sessions = catalog.query(kind='MEAS')
+        assert [entry['rows'] for entry in sessions] == [1, 10]
+        entry = sessions[1]
+        assert entry['path'] == f'5G_loss/{os.path.basename(journal)}'
+        assert entry['frequency'] == 3.5e9
+        assert entry['power_min'] == entry['power_max'] == -40.0
+        assert entry['time_start'].endswith(':00.000') and entry['time_end'].endswith(':09.000')
+
+        # A new segment updates the journal entry only
+        with open(os.path.join(journal, 'segment_00003.csv'), 'w') as file:
+            file.write(','.join(HEADER) + '\n')
+            file.write('2024-08-08 11:49:10.000,1,2,0,10,10,10,relPos,-40.0,90.0,0.0,0.0,3,25.0\n')
+        result = catalog.scan(workers=1)
+        assert (result['added'], result['updated'], result['unchanged']) == (0, 1, 2)
+        assert [entry['rows'] for entry in catalog.query(kind='MEAS')] == [1, 11]
+
+
+def test_queries_and_removed_files(tmp_path):
+    campaign = tmp_path / 'Data' / 'Drone' / 'flight'
+    campaign.mkdir(parents=True)
+    with open(campaign / 'catalog.json', 'w') as file:
+        file.write('{"frequency": 500e6}')
+    rows = {'Drone_MEAS_02-08-2024-10-00-00.csv': ['-74.08,4.63,2600,10,10,10,absPos,-50.0,90.0,0.0,0.0,3,25.0'],
+            'Drone_MEAS_03-08-2024-10-00-00.csv': ['-74.20,4.70,2600,10,10,10,absPos,-55.0,90.0,0.0,0.0,3,25.0',
+                                                   '1,2,0,10,10,10,relPos,-57.0,90.0,0.0,0.0,3,25.0']}
+    for filename, lines in rows.items():
+        with open(campaign / filename, 'w') as file:
+            file.write(','.join(HEADER[1:]) + '\n' + '\n'.join(lines) + '\n')
+
+    with Catalog(str(tmp_path / 'Data')) as catalog:
+        assert catalog.scan(workers=1)['added'] == 2
+        assert len(catalog.query(frequency=500e6, schema='PowerRx')) == 2
+        assert catalog.query(frequency=3.5e9) == [] and catalog.query(schema='Temperature') == []
+        found = catalog.query(bbox=(-74.1, 4.6, -74.0, 4.65))
+        assert [entry['path'] for entry in found] == ['Drone/flight/Drone_MEAS_02-08-2024-10-00-00.csv']
+        found = catalog.query(pos_type='relPos', start='2024-08-03')
+        assert len(found) == 1 and found[0]['power_min'] == -57.0 and found[0]['power_max'] == -55.0
+
+        os.remove(found[0]['abspath'])
+        result = catalog.scan(workers=1)
+        assert (result['removed'], result['unchanged']) == (1, 1)
+        assert len(catalog.query(kind='MEAS')) == 1
@@ -0,0 +1,80 @@
+# test_columnar.py - Parquet session file checks (run with: python -m pytest Tests)
+
+import os
+import sys
+import time
+from datetime import datetime as dt
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import pyarrow.parquet as pq
+from acquisition import format_row
+from columnar import FileParquet, read_session
+
+HEADER = ['Timestamp', 'PowerRx', 'PosType', 'cal_stat_aim']
+
+
+def local_timezone(name:str):
+    # Sets the local timezone of the process (Unix), returns the previous one
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = name
+    time.tzset()
+    return previous
+
+
+def test_timestamps_stored_as_utc_epoch(tmp_path):
+    previous = local_timezone('America/Bogota')      # UTC-5, so local and UTC times differ
+    try:
+        epoch = 1723135792.123
+        file = FileParquet(str(tmp_path / '5G_loss'), None, HEADER, 'MEAS', row_group_size=2)
+        file.saveData(format_row([epoch, -40.0, 'relPos', 3]))      # Local time string
+        file.saveData([epoch + 1, -41.0, 'absPos', 3])              # Epoch seconds
+        file.saveData([dt.fromtimestamp(epoch + 2), -42.0, 'relPos', 0])
+        file.saveData([None, -43.0, None, 0])
+        file.close()
+    finally:
+        if previous is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = previous
+        time.tzset()
+
+    table = pq.read_table(file.filename)
+    assert str(table.schema.field('Timestamp').type) == 'timestamp[ns, tz=UTC]'
+    stamps = table['Timestamp'].cast('int64').to_pylist()
+    assert stamps[:3] == [1723135792_123_000_000, 1723135793_123_000_000, 1723135794_123_000_000]
+    assert stamps[3] is None
+    assert table['PosType'].to_pylist() == ['relPos', 'absPos', 'relPos', None]
+    assert table['cal_stat_aim'].type == 'int16'
+
+
+def test_row_groups_and_projection(tmp_path):
+    with FileParquet(str(tmp_path / '5G_loss'), None, HEADER + ['Channel'], 'MEAS', row_group_size=4) as file:
+        for k in range(10):
+            file.saveData([1723135792.0 + k, -40.0 - k, 'relPos' if k < 6 else 'absPos', 3, k % 2])
+        assert file.rows_written == 8 and len(file.rows) == 2
+    assert file.rows_written == 10
+
+    metadata = pq.ParquetFile(file.filename).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [4, 4, 2]
+    session = read_session(file.filename, columns=['PowerRx', 'Channel'], filters=[('PosType', '==', 'absPos')])
+    assert list(session.columns) == ['PowerRx', 'Channel']
+    assert session['PowerRx'].tolist() == [-46.0, -47.0, -48.0, -49.0]
+    assert str(session['PowerRx'].dtype) == 'float32' and str(session['Channel'].dtype) == 'int64'
+    assert str(read_session(file.filename, columns=['PosType'])['PosType'].dtype) == 'category'
+
+
+def test_invalid_rows_rejected(tmp_path):
+    file = FileParquet(str(tmp_path / '5G_loss'), None, HEADER, 'MEAS')
+    try:
+        file.saveData([1723135792.0, -40.0])
+    except ValueError as e:
+        assert 'header has 4 columns' in str(e)
+    else:
+        raise AssertionError("A short row was saved")
+    file.close()
+    try:
+        file.saveData([1723135792.0, -40.0, 'relPos', 3])
+    except ValueError as e:
+        assert 'already closed' in str(e)
+    else:
+        raise AssertionError("A row was saved after close")
@@ -0,0 +1,56 @@
+# test_compression.py - Compressed session file checks (run with: python -m pytest Tests)
+
+import os
+import sys
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+from compression import CompressedWriter, read_frames, open_session, decompress_parallel
+from filewriter import FileCSV
+
+
+def test_frames_at_row_boundaries(tmp_path):
+    for compression in ('gzip', 'zstd'):
+        session = FileCSV(str(tmp_path / compression), None, ['k', 'PowerRx'], "MEAS",
+                          flush_rows=3, flush_interval=None, compression=compression)
+        for k in range(10):
+            session.saveData([k, -40.0 - k])
+        session.close()
+
+        # Header and 3 rows, 3 rows, 3 rows, and the last row on close
+        frames = read_frames(session.filename)
+        assert [size for _, _, size in frames] == [len('k,PowerRx\r\n0,-40.0\r\n1,-41.0\r\n2,-42.0\r\n'),
+                                                   27, 27, 9]
+        data = decompress_parallel(session.filename, workers=2)
+        assert data.endswith(b'\r\n') and data.count(b'\r\n') == 11
+        with open_session(session.filename, 'rb') as file:
+            assert file.read() == data
+        assert pd.read_csv(session.filename)['PowerRx'].tolist() == [-40.0 - k for k in range(10)]
+
+
+def test_reopened_file_appends_frames(tmp_path):
+    filename = str(tmp_path / 'session.csv.gz')
+    for part in (b'a,b\r\n1,2\r\n', b'3,4\r\n'):
+        with CompressedWriter(filename, 'gzip') as writer:
+            writer.write(part)
+    assert len(read_frames(filename)) == 2
+    assert decompress_parallel(filename) == b'a,b\r\n1,2\r\n3,4\r\n'
+
+
+def test_partial_frame_ignored(tmp_path):
+    filename = str(tmp_path / 'session.csv.zst')
+    writer = CompressedWriter(filename, 'zstd')
+    for k in range(3):
+        writer.write(f'{k},{k}\r\n'.encode())
+        writer.flush()
+    writer.close()
+    # A crash left the last frame and its index entry incomplete
+    offset, size, _ = read_frames(filename)[-1]
+    with open(filename, 'rb+') as file:
+        file.truncate(offset + size - 1)
+    with open(filename + '.frames', 'ab') as file:
+        file.write(b'\x01\x02')
+
+    frames = read_frames(filename)
+    assert len(frames) == 2
+    assert decompress_parallel(filename) == b'0,0\r\n1,1\r\n'
@@ -0,0 +1,80 @@
+# test_convert.py - Parquet dataset conversion checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+from convert import convert_tree, read_dataset
+from journal import FileJournal, join_journal
+
+HEADER = ['Timestamp', 'R_N/Lon', 'R_E/Lat', 'R_D/Hgt', 'accN/hMSL', 'accE/hAcc', 'accD/vAcc', 'PosType',
+          'PowerRx', 'Bearing', 'Roll_XZ', 'Pitch_YZ', 'cal_stat_aim', 'Temp']
+
+
+def write_journal(path, rows:int, power:float, segment_rows:int = 4) -> str:
+    # Journal of 'rows' relPos rows, a segment every 'segment_rows' rows, and the CSV joined from it
+    journal = FileJournal(str(path), None, HEADER, "MEAS")
+    for k in range(rows):
+        if k and k % segment_rows == 0:
+            journal.close()
+        journal.saveData([f"2024-08-08 11:49:{k:02d}.000", 100*k, 0, 0, 10, 10, 10, 'relPos',
+                          power, 90.0, 0.0, 0.0, 3, 25.0])
+    journal.close()
+    join_journal(journal.filename)
+    return journal.filename
+
+
+def test_journal_converted_once(tmp_path):
+    campaign = tmp_path / 'Data' / '5G_loss'
+    campaign.mkdir(parents=True)
+    first = write_journal(campaign / 'first', 10, -40.0)
+    second = write_journal(campaign / 'second', 10, -50.0)
+
+    result = convert_tree(str(tmp_path / 'Data'), workers=1)
+    assert result['converted'] == 2 and result['rows'] == 20
+    dataset = read_dataset(str(tmp_path / 'Data' / 'dataset'))
+    assert len(dataset) == 20
+    assert sorted(dataset.groupby('source', observed=True).size().tolist()) == [10, 10]
+    assert sorted(dataset['power_rx'].unique().tolist()) == [-50.0, -40.0]
+    assert set(dataset['date'].astype(str)) != {'unknown'}
+
+    # Removing a journal removes only its own Parquet file
+    for name in os.listdir(second):
+        os.remove(os.path.join(second, name))
+    os.rmdir(second)
+    os.remove(second + '.csv')
+    result = convert_tree(str(tmp_path / 'Data'), workers=1)
+    assert result['removed'] == 1
+    dataset = read_dataset(str(tmp_path / 'Data' / 'dataset'))
+    assert len(dataset) == 10 and dataset['power_rx'].unique().tolist() == [-40.0]
+    assert os.path.basename(first) in dataset['source'].iloc[0]
+
+
+def test_unchanged_sources_are_skipped(tmp_path):
+    campaign = tmp_path / 'Data' / '5G_loss'
+    campaign.mkdir(parents=True)
+    write_journal(campaign / 'first', 6, -40.0)
+    assert convert_tree(str(tmp_path / 'Data'), workers=1)['converted'] == 1
+    result = convert_tree(str(tmp_path / 'Data'), workers=1)
+    assert result['converted'] == 0 and result['unchanged'] == 1
+
+
+def test_modified_source_reconverted(tmp_path):
+    campaign = tmp_path / 'Data' / '5G_loss'
+    campaign.mkdir(parents=True)
+    session = campaign / '5G_loss_MEAS_01-08-2024-13-03-52.csv'
+    row = '2024-08-01 13:03:52.000,1,2,0,10,10,10,relPos,{},90.0,0.0,0.0,3,25.0\n'
+    with open(session, 'w') as file:
+        file.write(','.join(HEADER) + '\n' + row.format(-60.0))
+    with open(campaign / '5G_loss_METADATA_01-08-2024-13-03-52.csv', 'w') as file:
+        file.write('frequency,gain_rx\n3500000000.0,30\n')
+    result = convert_tree(str(tmp_path / 'Data'), workers=1)
+    assert (result['converted'], result['skipped']) == (1, 1)
+
+    with open(session, 'a') as file:
+        file.write(row.format(-61.0))
+    result = convert_tree(str(tmp_path / 'Data'), workers=1)
+    assert (result['converted'], result['unchanged'], result['rows']) == (1, 1, 2)
+    dataset = read_dataset(str(tmp_path / 'Data' / 'dataset'))
+    assert dataset['power_rx'].tolist() == [-60.0, -61.0]
+    assert set(dataset['date'].astype(str)) == {'2024-08-01'}
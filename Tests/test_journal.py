@@ -0,0 +1,93 @@
+# test_journal.py - Journaled writer and recovery checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+from journal import FileJournal, list_segments, read_manifest, recover_journal, join_journal, select_segments
+
+
+def row(k:int) -> list:
+    return [f"2024-08-08 11:49:{k:02d}.000", k, -40.0]
+
+
+def test_truncated_last_row_recovered(tmp_path):
+    journal = FileJournal(str(tmp_path / 'session'), None, ['Timestamp', 'k', 'PowerRx'], "MEAS")
+    journal.saveRows([row(k) for k in range(5)])
+    journal.close()
+    # A crash in the middle of a write leaves a partial last row
+    segment = list_segments(journal.filename)[-1]
+    with open(segment, 'ab') as file:
+        file.write(b'2024-08-08 11:49:05.000,5,-4')
+
+    result = recover_journal(journal.filename)
+    assert result == {'segments': 1, 'rows': 5, 'truncated_bytes': len(b'2024-08-08 11:49:05.000,5,-4')}
+    with open(segment, 'rb') as file:
+        assert file.read().endswith(b'2024-08-08 11:49:04.000,4,-40.0\r\n')
+    manifest = read_manifest(journal.filename)
+    assert manifest['segments'][0]['end'] == '2024-08-08 11:49:04.000'
+
+    # Nothing left to repair
+    assert recover_journal(journal.filename)['truncated_bytes'] == 0
+
+
+def test_segment_without_header_removed(tmp_path):
+    journal = FileJournal(str(tmp_path / 'session'), None, ['Timestamp', 'k', 'PowerRx'], "MEAS")
+    journal.saveRows([row(k) for k in range(3)])
+    journal.close()
+    # The crash happened while the header of a new segment was written
+    with open(os.path.join(journal.filename, 'segment_00001.csv'), 'wb') as file:
+        file.write(b'Timest')
+
+    result = recover_journal(journal.filename)
+    assert result == {'segments': 1, 'rows': 3, 'truncated_bytes': 6}
+    assert [os.path.basename(path) for path in list_segments(journal.filename)] == ['segment_00000.csv']
+
+
+def test_join_keeps_one_header(tmp_path):
+    journal = FileJournal(str(tmp_path / 'session'), None, ['Timestamp', 'k', 'PowerRx'], "MEAS")
+    for k in range(6):
+        if k and k % 2 == 0:
+            journal.close()
+        journal.saveData(row(k))
+    journal.close()
+    assert len(list_segments(journal.filename)) == 3
+
+    with open(join_journal(journal.filename)) as file:
+        lines = file.read().splitlines()
+    assert lines[0] == 'Timestamp,k,PowerRx'
+    assert lines[1:] == [','.join(map(str, row(k))) for k in range(6)]
+
+
+def test_segments_rolled_by_size(tmp_path):
+    journal = FileJournal(str(tmp_path / 'session'), None, ['Timestamp', 'k', 'PowerRx'], "MEAS", segment_size=100)
+    for k in range(10):
+        journal.saveData(row(k))
+    journal.close()
+
+    segments = read_manifest(journal.filename)['segments']
+    assert len(segments) == len(list_segments(journal.filename)) > 1
+    assert sum(segment['rows'] for segment in segments) == journal.rows_written == 10
+    for segment in segments:
+        assert segment['bytes'] == os.path.getsize(os.path.join(journal.filename, segment['file']))
+    assert segments[0]['start'] == '2024-08-08 11:49:00.000'
+    assert segments[-1]['end'] == '2024-08-08 11:49:09.000'
+
+
+def test_select_segments_by_time(tmp_path):
+    journal = FileJournal(str(tmp_path / 'session'), None, ['Timestamp', 'k', 'PowerRx'], "MEAS")
+    for k in range(9):
+        if k and k % 3 == 0:
+            journal.close()
+        journal.saveData(row(k))
+    journal.close()
+    first, second, third = list_segments(journal.filename)
+
+    assert select_segments(journal.filename) == [first, second, third]
+    assert select_segments(journal.filename, '2024-08-08 11:49:04') == [second, third]
+    assert select_segments(journal.filename, '2024-08-08 11:49:02.500', '2024-08-08 11:49:03.000') == [second]
+    assert select_segments(journal.filename, end='2024-08-08 11:48:59') == []
+
+    # Without manifest it is rebuilt from the segments
+    os.remove(os.path.join(journal.filename, 'manifest.json'))
+    assert select_segments(journal.filename, '2024-08-08 11:49:07') == [third]
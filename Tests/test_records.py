@@ -0,0 +1,61 @@
+# test_records.py - Structured measurement record checks (run with: python -m pytest Tests)
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import numpy as np
+from acquisition import format_timestamp
+from records import RecordBuffer, measurement_values, format_record, format_records, MEASUREMENT_HEADER
+from test_columnar import local_timezone
+
+GPS_DATA = [120.5, -33.25, 4.0, 14.0, 14.0, 21.0, 'relPos']
+AIMING_DATA = [91.5, 0.25, -1.75, 3, 24.5]
+
+
+def test_buffer_across_chunks():
+    buffer = RecordBuffer(chunk_size=3)
+    assert buffer.last() is None and len(buffer.array()) == 0
+    first = buffer.append(measurement_values(1_723_135_792_000_000_000, GPS_DATA, -40.0, AIMING_DATA))
+    for k in range(1, 7):
+        buffer.append(measurement_values(1_723_135_792_000_000_000 + k*100_000_000, None, -40.0 - k, AIMING_DATA))
+    assert len(buffer) == 7 and [len(chunk) for chunk in buffer.chunks()] == [3, 3, 1]
+    # The rows returned are views of the stored records
+    first['power_rx'] = -39.0
+    array = buffer.array()
+    assert array['power_rx'].tolist() == [-39.0, -41.0, -42.0, -43.0, -44.0, -45.0, -46.0]
+    assert array['pos_type'].tolist() == [0] + [-1]*6 and np.isnan(array['r_n_lon'][1:]).all()
+    assert buffer.last()['time_ns'] == 1_723_135_792_600_000_000
+
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.last() is None and first['power_rx'] == -39.0
+
+
+def test_missing_values():
+    values = measurement_values(0, [None]*6 + ['absPos'], np.nan, [None, None, None, np.nan, None])
+    assert values[7] == 1 and values[12] == 0
+    assert all(np.isnan(value) for value in values[1:7] + values[8:12] + values[13:])
+
+
+def test_vectorized_formatting_matches():
+    previous = local_timezone('America/Bogota')
+    try:
+        buffer = RecordBuffer(chunk_size=4)
+        epoch = 1_723_135_792_123_456_789
+        for k, gps_data in enumerate([GPS_DATA, None, GPS_DATA[:6] + ['other'], GPS_DATA[:6] + ['absPos']]*3):
+            buffer.append(measurement_values(epoch + k*250_000_000, gps_data, -40.0 - k, AIMING_DATA))
+        rows = buffer.toRows()
+        single = [format_record(record) for record in buffer.array()]
+        assert str(rows) == str(single) and len(rows[0]) == len(MEASUREMENT_HEADER)
+        # Local time, truncated to the millisecond, as the epoch seconds of the other session files
+        assert rows[0][0] == format_timestamp(1723135792.123) == '2024-08-08 11:49:52.123'
+        assert [row[7] for row in rows[:4]] == ['relPos', '', '', 'absPos']
+        assert rows[0][1:7] == GPS_DATA[:6] and rows[0][8:] == [-40.0, 91.5, -1.75, 0.25, 3, 24.5]
+    finally:
+        if previous is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = previous
+        time.tzset()
+    assert format_records(buffer.array()[:0]) == []
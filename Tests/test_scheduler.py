@@ -0,0 +1,64 @@
+# test_scheduler.py - Deadline scheduler checks (run with: python -m pytest Tests)
+
+import os
+import sys
+from time import monotonic, sleep
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import numpy as np
+from scheduler import DeadlineScheduler, PeriodicThread
+
+
+def test_deadlines_do_not_drift():
+    scheduler = DeadlineScheduler(200)
+    deadlines = []
+    for k in range(20):
+        deadlines.append(scheduler.wait())
+        assert monotonic() >= deadlines[-1]
+        sleep(0.6*scheduler.period if k % 2 else 0)      # Slow iterations do not shift the next ticks
+    assert np.allclose(np.diff(deadlines), scheduler.period)
+    stats = scheduler.getStats()
+    assert (stats['ticks'], stats['missed']) == (20, 0)
+    assert 0 <= stats['jitter_mean_ms'] <= stats['jitter_max_ms']
+
+
+def test_late_caller_skips_deadlines():
+    scheduler = DeadlineScheduler(100)
+    first = scheduler.wait()
+    sleep(0.045)
+    second = scheduler.wait()
+    # The missed deadlines are skipped, and the next one is still on the grid
+    steps = (second - first)/scheduler.period
+    assert abs(steps - round(steps)) < 1e-6 and round(steps) >= 4
+    assert scheduler.missed == round(steps) - 1 and scheduler.ticks == 2
+    assert monotonic() - second < scheduler.period
+
+
+def test_idle_called_while_waiting():
+    calls = []
+    scheduler = DeadlineScheduler(20)
+    scheduler.wait(idle=lambda: calls.append(monotonic()), idle_interval=0.002)
+    assert len(calls) > 5
+    assert scheduler.getStats()['jitter_max_ms'] < 50
+
+
+def test_invalid_rate():
+    try:
+        DeadlineScheduler(0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("A zero rate was accepted")
+
+
+def test_periodic_thread_rate():
+    calls = []
+    thread = PeriodicThread(lambda: calls.append(monotonic()), 100)
+    thread.startPeriodicThread()
+    assert thread.isActive()
+    sleep(0.3)
+    thread.stopPeriodicThread()
+    assert not thread.isActive()
+    stats = thread.getStats()
+    assert stats['ticks'] - len(calls) in (0, 1) and 20 <= len(calls) <= 31
+    assert stats['overruns'] == 0
@@ -0,0 +1,68 @@
+# test_sessioncache.py - Session cache checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import numpy as np
+import pandas as pd
+from sessioncache import SessionCache
+
+REFERENCE = (4.63600930, -74.08904440, 2579.220)        # lat, lon [deg], height [m]
+
+
+def write_session(path) -> pd.DataFrame:
+    # 2024 session ('MAG' header): relPos in m, absPos lon, lat [deg] and height [mm]
+    df = pd.DataFrame({
+        'R_N/Lon': [3.0, 6.0, -74.0890, -74.0891],
+        'R_E/Lat': [4.0, 8.0, 4.6361, 4.6362],
+        'R_D/Hgt': [12.0, -2.0, 2579500.0, 2580000.0],
+        'PosType': ['relPos', 'relPos', 'absPos', 'absPos'],
+        'PowerRx': [-40.0, -41.0, -42.0, -43.0],
+        'XZ': [0.0]*4, 'YZ': [0.0]*4, 'MAG': [10.0, 20.0, 30.0, 40.0],
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def old_abs_distance(df) -> np.ndarray:
+    # calcular_distancia_absPos of AbsYPos.py and PProcessing.py, reference height in mm
+    lat, lon = np.radians(df['R_E/Lat']), np.radians(df['R_N/Lon'])
+    ref_lat, ref_lon = np.radians(REFERENCE[0]), np.radians(REFERENCE[1])
+    a = np.sin((lat - ref_lat)/2)**2 + np.cos(ref_lat)*np.cos(lat)*np.sin((lon - ref_lon)/2)**2
+    horizontal = 6371*2*np.arctan2(np.sqrt(a), np.sqrt(1 - a))*1000
+    return np.sqrt(horizontal**2 + ((df['R_D/Hgt'] - REFERENCE[2]*1000)/1000)**2).to_numpy()
+
+
+def test_distance_matches_the_analysis_scripts(tmp_path):
+    source = write_session(tmp_path / 'session.csv')
+    cache = SessionCache(str(tmp_path / 'cache'))
+    rel, absolute = source['PosType'] == 'relPos', source['PosType'] == 'absPos'
+
+    # 3to1.py: sqrt(N² + E² + D²)
+    df = cache.load(str(tmp_path / 'session.csv'))
+    expected = np.sqrt(source['R_N/Lon']**2 + source['R_E/Lat']**2 + source['R_D/Hgt']**2)
+    assert np.allclose(df['Distance'][rel], expected[rel])
+    assert df['Distance'][absolute].isna().all()
+
+    # AbsYPos.py and PProcessing.py: sqrt(N² + E² + (D/1000)²), and the absPos distance from the reference
+    df = cache.load(str(tmp_path / 'session.csv'), REFERENCE, vertical_scale=1e-3)
+    expected = np.sqrt(source['R_N/Lon']**2 + source['R_E/Lat']**2 + (source['R_D/Hgt']/1000)**2)
+    assert np.allclose(df['Distance'][rel], expected[rel])
+    assert np.allclose(df['Distance'][absolute], old_abs_distance(source)[absolute.to_numpy()])
+    assert list(df.columns[:8]) == list(source.columns)
+
+
+def test_cache_hit_and_invalidation(tmp_path):
+    write_session(tmp_path / 'session.csv')
+    cache = SessionCache(str(tmp_path / 'cache'))
+    first = cache.load(str(tmp_path / 'session.csv'))
+    assert len(cache.index['entries']) == 1
+    assert cache.load(str(tmp_path / 'session.csv')).equals(first)
+    assert len(cache.index['entries']) == 1
+    # Other parameters and a modified file are new entries
+    cache.load(str(tmp_path / 'session.csv'), vertical_scale=1e-3)
+    with open(tmp_path / 'session.csv', 'a') as file:
+        file.write('1.0,1.0,0.0,relPos,-44.0,0.0,0.0,50.0\n')
+    assert len(cache.load(str(tmp_path / 'session.csv'))) == 5
+    assert len(cache.index['entries']) == 3
@@ -0,0 +1,91 @@
+# test_startup.py - Concurrent device startup checks (run with: python -m pytest Tests)
+
+import os
+import sys
+from time import monotonic
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+from startup import DeviceStartup
+
+
+class FakeDevice:
+    # Device ready 'delay' seconds after its start (never if None), whose start can fail
+    def __init__(self, delay, fail:bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.started = None
+        self.stopped = False
+
+    def start(self) -> None:
+        self.started = monotonic()
+        if self.fail:
+            raise OSError("port busy")
+
+    def ready(self) -> bool:
+        return self.delay is not None and monotonic() - self.started >= self.delay
+
+    def stop(self) -> None:
+        self.stopped = True
+
+
+def unplugged():
+    raise FileNotFoundError("no such device")
+
+
+def make_startup(devices:dict, timeout:float = 2.0) -> DeviceStartup:
+    startup = DeviceStartup(timeout=timeout, poll_interval=0.01, log=None)
+    for name, device in devices.items():
+        startup.add(name, lambda device=device: device, start=FakeDevice.start, ready=FakeDevice.ready,
+                    stop=FakeDevice.stop)
+    return startup
+
+
+def expect(error, function):
+    try:
+        function()
+    except error as e:
+        return str(e)
+    raise AssertionError(f"{error.__name__} not raised")
+
+
+def test_devices_started_concurrently():
+    devices = {name: FakeDevice(0.3) for name in ('usrp', 'gps', 'aiming')}
+    startup = make_startup(devices)
+    assert startup.run() == devices
+    # As long as the slowest device, not the sum of all of them
+    assert startup.elapsed < 0.6 and startup.allReady()
+    assert all(0.3 <= time < 0.6 for time in startup.getStats()['time_to_ready'].values())
+    assert not any(device.stopped for device in devices.values())
+    startup.stopAll()
+    assert all(device.stopped for device in devices.values())
+
+
+def test_timeout_stops_every_device():
+    devices = {'usrp': FakeDevice(0.0), 'gps': FakeDevice(None)}
+    startup = make_startup(devices, timeout=0.3)
+    message = expect(TimeoutError, startup.run)
+    assert 'gps (timeout)' in message and 'usrp' not in message
+    assert 0.3 <= startup.elapsed < 0.6
+    assert startup.status == {'usrp': 'ready', 'gps': 'timeout'}
+    assert devices['usrp'].stopped and devices['gps'].stopped
+
+
+def test_not_strict_returns_ready_devices():
+    devices = {'usrp': FakeDevice(0.0), 'gps': FakeDevice(None)}
+    startup = make_startup(devices, timeout=0.3)
+    assert startup.run(strict=False) == {'usrp': devices['usrp']}
+    assert not devices['usrp'].stopped and devices['gps'].stopped
+
+
+def test_failed_device_released():
+    devices = {'usrp': FakeDevice(0.0), 'aiming': FakeDevice(0.0, fail=True)}
+    startup = make_startup(devices)
+    startup.add('gps', unplugged, stop=FakeDevice.stop)
+    message = expect(RuntimeError, startup.run)
+    assert 'port busy' in message and 'no such device' in message
+    # The partially started device is stopped; the one that did not open has nothing to stop
+    assert startup.status == {'usrp': 'ready', 'aiming': 'failed', 'gps': 'failed'}
+    assert set(startup.errors) == {'aiming', 'gps'} and 'gps' not in startup.devices
+    assert devices['aiming'].stopped and devices['usrp'].stopped
+    assert startup.elapsed < 1.0
+    expect(ValueError, lambda: startup.add('usrp', lambda: None))
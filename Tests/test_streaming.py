@@ -0,0 +1,76 @@
+# test_streaming.py - Out-of-core aggregation checks (run with: python -m pytest Tests)
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Modules'))
+import numpy as np
+from streaming import TDigest, BinnedQuantiles, RunningFit, path_loss_profile
+from test_convert import HEADER
+
+QUANTILES = np.array([0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999])
+
+
+def rank_error(values, estimates) -> np.ndarray:
+    # Distance between the requested quantiles and the ranks of the estimates
+    return np.abs(np.searchsorted(np.sort(values), estimates) / len(values) - QUANTILES)
+
+
+def test_tdigest_accuracy():
+    values = np.random.default_rng(1).lognormal(0, 1, 200000)
+    digest = TDigest()
+    for chunk in np.array_split(values, 37):
+        digest.update(chunk)
+    # Bounded size, exact extremes, small rank error, relative to the distance to the tails
+    assert len(digest) <= 2*digest.delta
+    assert (digest.count, digest.min, digest.max) == (values.size, values.min(), values.max())
+    error = rank_error(values, digest.quantile(QUANTILES))
+    assert error.max() < 1e-3
+    assert (error / np.minimum(QUANTILES, 1 - QUANTILES)).max() < 0.25
+
+    # Two digests merged are as accurate as one
+    first, second = TDigest(), TDigest()
+    first.update(values[:70000])
+    second.update(values[70000:])
+    first.merge(second)
+    assert first.count == values.size and len(first) <= 2*first.delta
+    assert rank_error(values, first.quantile(QUANTILES)).max() < 1e-3
+    assert np.isnan(TDigest().median())
+
+
+def test_binned_quantiles_and_fit():
+    rng = np.random.default_rng(2)
+    distance = rng.uniform(1, 50, 20000)
+    power = -30 - 20*np.log10(distance) + rng.normal(0, 0.5, distance.size)
+    bins = BinnedQuantiles(bin_width=10.0)
+    fit, first, second = RunningFit(log_x=True), RunningFit(log_x=True), RunningFit(log_x=True)
+    bins.update(np.append(distance, np.nan), np.append(power, -40.0))
+    fit.update(distance, power)
+    first.update(distance[:5000], power[:5000])
+    second.update(distance[5000:], power[5000:])
+    first.merge(second)
+
+    result = bins.result((0.5, 0.9))
+    assert result['bin'].tolist() == [5.0, 15.0, 25.0, 35.0, 45.0]
+    assert result['count'].tolist() == np.bincount((distance // 10).astype(int)).tolist()
+    in_bin = power[(distance >= 20) & (distance < 30)]
+    assert abs(result['q0.5'].iloc[2] - np.median(in_bin)) < 0.01
+    assert np.allclose(fit.coefficients(), np.polyfit(10*np.log10(distance), power, 1)[::-1])
+    assert np.allclose(first.coefficients(), fit.coefficients()) and first.n == fit.n == distance.size
+    assert fit.r2() > 0.99 and abs(fit.rmse() - 0.5) < 0.02
+
+
+def test_profile_independent_of_chunks(tmp_path):
+    path = tmp_path / '5G_loss_MEAS_01-08-2024-13-03-52.csv'
+    with open(path, 'w') as file:
+        file.write(','.join(HEADER) + '\n')
+        for k in range(1, 41):
+            bearing = 90.0 + (k % 7 - 3)*4
+            file.write(f'2024-08-01 13:03:{k:02d}.000,{k},0,0,10,10,10,relPos,{-30 - k*0.5},{bearing},0,0,3,25\n')
+
+    whole = path_loss_profile(str(path), window=9.0, bin_width=5.0, chunksize=1000)['relPos']
+    chunked = path_loss_profile(str(path), window=9.0, bin_width=5.0, chunksize=3)['relPos']
+    assert whole['reference_bearing'] == chunked['reference_bearing'] == 82.0
+    assert whole['counters'] == chunked['counters'] == {'rows': 40, 'in_window': 23, 'valid': 23}
+    assert whole['bins'].equals(chunked['bins'])
+    assert np.allclose(whole['fit'].coefficients(), chunked['fit'].coefficients())